@@ -0,0 +1,178 @@
+import numpy as np
+
+from src.recorder import PathRecorder
+
+
+class BatchedLineSearchMinimization:
+    """
+    Class for unconstrained minimization from a batch of starting points using line search methods
+
+    The objective is called on stacked iterates: f(X, hessian_flag) with X of shape (N, n)
+    must return the values (N,), the gradients (N, n) and, when requested, the Hessians
+    (N, n, n). All the starts are advanced together and every start is retired as soon as
+    it meets the termination conditions.
+
+    Attributes:
+    method (str): method to use for minimization
+    recorder (PathRecorder): recorder of the (N, n) iterates, x_path and f_path
+    """
+
+    HESSIAN_METHODS = ["newton"]
+
+    def __init__(self, method, recorder=None):
+        self.method = method
+        self.hessian_flag = method in self.HESSIAN_METHODS
+        self.success = None
+        self.recorder = recorder if recorder is not None else PathRecorder()
+
+    def unconstrained_minimization(self,
+                                   f,
+                                   x0,
+                                   obj_tol,
+                                   param_tol,
+                                   max_iter,
+                                   alpha=1.0,
+                                   c1=0.01,
+                                   c2=0.5,
+                                   wolfe_tol=1e-6,
+                                   ):
+        """
+        This function implements the batched unconstrained minimization algorithm with Wolfe conditions.
+
+        Parameters:
+        -----------
+        f: function
+            The batched function to be minimized.
+        x0: np.ndarray
+            The starting points, one per row, of shape (N, n).
+        obj_tol: float
+            The numeric tolerance for successful termination in terms of small enough change in
+            objective function values, between two consecutive iterations of a start.
+        param_tol: float
+            The numeric tolerance for successful termination in terms of small enough distance
+            between two consecutive iterations locations of a start.
+        max_iter: int
+            The maximum allowed number of iterations.
+        alpha: float, optional
+            Initial step size for the line search.
+        c1: float value between (0, 1)
+            The parameter for the sufficient decrease condition (Armijo condition)
+            in Wolfe conditions.
+        c2: float, optional
+            The parameter for reducing the step size.
+        wolfe_tol: float, optional
+            The tolerance for the step size.
+
+        Returns:
+        --------
+        final_locations: np.ndarray
+            The final locations, of shape (N, n).
+        final_objective_values: np.ndarray
+            The final objective values, of shape (N,).
+        success: np.ndarray
+            A success/failure boolean flag per start.
+        """
+        self.recorder.reset()
+        x = np.array(x0, dtype=float)
+        f_x = np.full(x.shape[0], np.nan)
+        self.success = np.zeros(x.shape[0], dtype=bool)
+        # every start carries its own step size from one line search to the next
+        alphas = np.full(x.shape[0], float(alpha))
+        # indices of the starts that have not converged yet
+        active = np.arange(x.shape[0])
+        for _ in range(max_iter):
+            x_active = x[active]
+            f_active, grad, hess = f(x_active, hessian_flag=self.hessian_flag)
+            f_x[active] = f_active
+            self.recorder.append(x, f_x)
+
+            # Find the descent directions
+            if self.method == "newton":
+                # using pseudo-inverse to avoid singular matrices
+                p = -np.einsum("nij,nj->ni", np.linalg.pinv(hess), grad)
+            else:
+                p = -grad
+            # find the alphas, the objective at the accepted steps comes for free
+            alphas[active], f_next = batched_wolfe_conditions(
+                f=f, x=x_active, p=p, alpha=alphas[active], c=c1, t=c2, tol=wolfe_tol, f_x=f_active, grad=grad,
+            )
+            # take the steps
+            x_next = x_active + alphas[active, np.newaxis] * p
+
+            converged = (
+                (np.sum(np.abs(x_next - x_active), axis=1) < param_tol) |
+                (np.abs(f_next - f_active) < obj_tol)
+            )
+            x[active[~converged]] = x_next[~converged]
+            self.success[active[converged]] = True
+            active = active[~converged]
+            if active.size == 0:
+                break
+
+        self.recorder.close()
+        return x, f_x, self.success
+
+    @property
+    def x_path(self):
+        return self.recorder.x
+
+    @property
+    def f_path(self):
+        return self.recorder.f
+
+
+def batched_wolfe_conditions(f, x, p, alpha, c, t, tol=1e-6, f_x=None, grad=None):
+    """
+    Backtracking line search on the Armijo condition, applied row-wise to a batch of points.
+
+    Only the rows that still violate the condition are re-evaluated, in a single call
+    of the batched objective per backtracking step.
+
+    Parameters:
+    -----------
+    f: function
+        The batched function to be minimized.
+    x: np.ndarray
+        The current locations, of shape (N, n).
+    p: np.ndarray
+        The descent directions, of shape (N, n).
+    alpha: float or np.ndarray
+        The initial step size, shared by all the rows or one per row.
+    c: float value between (0, 1)
+        The parameter for the sufficient decrease condition (Armijo condition).
+    t: float, optional
+        The parameter for reducing the step size.
+    tol: float, optional
+        The tolerance for the step size.
+    f_x: np.ndarray, optional
+        The objective values at x, evaluated when not given.
+    grad: np.ndarray, optional
+        The gradients at x, evaluated when not given.
+
+    Returns:
+    --------
+    alphas: np.ndarray
+        The step size of every row.
+    f_next: np.ndarray
+        The objective values at x + alphas * p.
+    """
+    if f_x is None or grad is None:
+        f_x, grad, _ = f(x, False)
+    alphas = np.broadcast_to(np.asarray(alpha, dtype=float), x.shape[:1]).copy()
+    f_next = np.empty(x.shape[0])
+    slopes = np.einsum("ni,ni->n", grad, p)
+    pending = np.arange(x.shape[0])
+    exhausted = [np.empty(0, dtype=int)]
+    while pending.size:
+        f_next[pending] = f(x[pending] + alphas[pending, np.newaxis] * p[pending], False)[0]
+        pending = pending[f_next[pending] - f_x[pending] > alphas[pending] * c * slopes[pending]]
+        # backtracking
+        alphas[pending] *= t
+        too_small = alphas[pending] < tol
+        exhausted.append(pending[too_small])
+        pending = pending[~too_small]
+
+    exhausted = np.concatenate(exhausted)
+    if exhausted.size:
+        f_next[exhausted] = f(x[exhausted] + alphas[exhausted, np.newaxis] * p[exhausted], False)[0]
+    return alphas, f_next
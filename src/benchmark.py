@@ -0,0 +1,416 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from src.constrained_min import InteriorPointMinimizer
+from src.primal_dual_min import PrimalDualInteriorPointMinimizer
+from src.recorder import PathRecorder
+from src.trust_region_min import TrustRegionMinimization
+from src.unconstrained_min import LineSearchMinimization
+
+FORMAT_VERSION = 1
+
+
+class ExtendedRosenbrock:
+    """
+    f(x) = sum_i 100 * (x2i - x2i-1 ** 2) ** 2 + (1 - x2i-1) ** 2, for an even dimension n
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.x0 = np.tile([-1.2, 1.0], n // 2)
+
+    def __call__(self, x, hessian_flag):
+        odd, even = x[::2], x[1::2]
+        f = (100 * (even - odd ** 2) ** 2 + (1 - odd) ** 2).sum()
+        g = np.zeros(self.n)
+        g[::2] = 400 * odd ** 3 - 400 * odd * even + 2 * odd - 2
+        g[1::2] = 200 * (even - odd ** 2)
+        h = None
+        if hessian_flag:
+            h = np.zeros((self.n, self.n))
+            i = np.arange(0, self.n, 2)
+            h[i, i] = 1200 * odd ** 2 - 400 * even + 2
+            h[i, i + 1] = h[i + 1, i] = -400 * odd
+            h[i + 1, i + 1] = 200
+        return f, g, h
+
+    def hessp(self, x, v):
+        odd, even = x[::2], x[1::2]
+        hv = np.empty(self.n)
+        hv[::2] = (1200 * odd ** 2 - 400 * even + 2) * v[::2] - 400 * odd * v[1::2]
+        hv[1::2] = -400 * odd * v[::2] + 200 * v[1::2]
+        return hv
+
+
+class IllConditionedQuadratic:
+    """
+    f(x) = 1/2 * x.T @ Q @ D @ Q @ x, with the eigenvalues D log-spaced between 1 and
+    condition, rotated by the Householder reflection Q = I - 2 * u @ u.T so every product
+    costs O(n)
+    """
+
+    def __init__(self, n, condition=1e4, seed=0):
+        self.n = n
+        self.eigenvalues = np.logspace(0, np.log10(condition), n)
+        u = np.random.default_rng(seed).normal(size=n)
+        self.u = u / np.linalg.norm(u)
+        self.x0 = np.ones(n)
+
+    def __call__(self, x, hessian_flag):
+        qx = self._reflect(x)
+        f = 1/2 * qx @ (self.eigenvalues * qx)
+        g = self.hessp(x, x)
+        h = None
+        if hessian_flag:
+            d, u = self.eigenvalues, self.u
+            du = d * u
+            h = np.diag(d) - 2 * np.outer(u, du) - 2 * np.outer(du, u) + 4 * (u @ du) * np.outer(u, u)
+        return f, g, h
+
+    def hessp(self, x, v):
+        return self._reflect(self.eigenvalues * self._reflect(v))
+
+    def _reflect(self, v):
+        return v - 2 * (self.u @ v) * self.u
+
+
+class LinearObjective:
+    """
+    f(x) = c.T @ x
+    """
+
+    def __init__(self, c):
+        self.c = c
+
+    def __call__(self, x, hessian_flag):
+        n = self.c.shape[0]
+        return self.c @ x, self.c, np.zeros((n, n)) if hessian_flag else None
+
+
+class QuadraticObjective:
+    """
+    f(x) = 1/2 * x.T @ P @ x + q.T @ x
+    """
+
+    def __init__(self, P, q):
+        self.P = P
+        self.q = q
+
+    def __call__(self, x, hessian_flag):
+        px = self.P @ x
+        return 1/2 * x @ px + self.q @ x, px + self.q, self.P if hessian_flag else None
+
+
+def random_constrained_problem(n, quadratic=False, seed=0):
+    """
+    Random LP or QP over the box 0 <= x <= 1, with n // 2 random inequality rows and the
+    equality sum(x) = n / 2, all strictly satisfied at the starting point x0 = 1/2.
+
+    Returns:
+    --------
+    func: function
+        The objective.
+    kwargs: dict
+        The constraints and the starting point, in the format of interior_pt.
+    """
+    rng = np.random.default_rng(seed)
+    x0 = np.full(n, 0.5)
+    rows = rng.normal(size=(n // 2, n))
+    G = np.concatenate([np.eye(n), -np.eye(n), rows])
+    h = np.concatenate([np.ones(n), np.zeros(n), rows @ x0 + 1])
+    if quadratic:
+        M = rng.normal(size=(n, n))
+        func = QuadraticObjective(M @ M.T / n + np.eye(n), rng.normal(size=n))
+    else:
+        func = LinearObjective(rng.normal(size=n))
+    kwargs = {
+        "ineq_constraints": [],
+        "eq_constraints_mat": np.ones((1, n)),
+        "eq_constraints_rhs": np.array([n / 2]),
+        "x0": x0,
+        "ineq_constraints_mat": G,
+        "ineq_constraints_rhs": h,
+    }
+    return func, kwargs
+
+
+class BenchmarkSuite:
+    """
+    Class for benchmarking the minimizers on scalable problems
+
+    Every (problem, n, method) case is solved repeat times, and its best wall time is
+    recorded with the iterations, the function, gradient and Hessian evaluations and the
+    linear solves of the solve. The results are written to a JSON file that compare_results
+    checks against the results of another version.
+
+    Attributes:
+    sizes (list): the dimensions of the unconstrained problems
+    constrained_sizes (list): the dimensions of the random LPs and QPs
+    methods (list): the LineSearchMinimization methods, and "trust_region" for TrustRegionMinimization
+    max_iter (int): the maximum number of iterations of every solve
+    repeat (int): the number of timed solves of every case
+    line_search (str): the line search of the LineSearchMinimization methods
+    """
+
+    UNCONSTRAINED_PROBLEMS = {
+        "extended_rosenbrock": ExtendedRosenbrock,
+        "ill_conditioned_quadratic": IllConditionedQuadratic,
+    }
+    CONSTRAINED_PROBLEMS = ["random_lp", "random_qp"]
+    METHODS = [
+        "gradient_descent",
+        "nesterov",
+        "barzilai_borwein",
+        "newton",
+        "newton_cholesky",
+        "newton_cg",
+        "bfgs",
+        "lbfgs",
+        "trust_region",
+    ]
+    # the largest dimension of the methods that form n x n matrices, "newton" computes a
+    # pseudo-inverse on every iteration
+    DENSE_LIMITS = {"newton": 100, "newton_cholesky": 1_000, "bfgs": 1_000}
+    CONSTRAINED_METHODS = {
+        "barrier": InteriorPointMinimizer,
+        "primal_dual": PrimalDualInteriorPointMinimizer,
+    }
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+
+    def __init__(
+        self,
+        sizes=(10, 100, 1_000, 10_000, 100_000),
+        constrained_sizes=(10, 50, 200),
+        methods=None,
+        max_iter=1_000,
+        repeat=1,
+        line_search="backtracking",
+    ):
+        self.sizes = list(sizes)
+        self.constrained_sizes = list(constrained_sizes)
+        self.methods = list(methods or self.METHODS)
+        self.max_iter = max_iter
+        self.repeat = repeat
+        self.line_search = line_search
+
+    def run(self):
+        """
+        Runs every case of the suite.
+
+        Returns:
+        --------
+        results: dict
+            The metadata of the run and a list of results, one per case.
+        """
+        results = []
+        for name, problem in self.UNCONSTRAINED_PROBLEMS.items():
+            for n in self.sizes:
+                for method in self.methods:
+                    if n > self.DENSE_LIMITS.get(method, n):
+                        continue
+                    results.append(self._run_unconstrained(name, problem(n), method))
+        for name in self.CONSTRAINED_PROBLEMS:
+            for n in self.constrained_sizes:
+                func, kwargs = random_constrained_problem(n, quadratic=name == "random_qp")
+                for method, minimizer in self.CONSTRAINED_METHODS.items():
+                    results.append(self._run_constrained(name, n, method, minimizer, func, kwargs))
+        run_metadata = dict(metadata(), line_search=self.line_search, max_iter=self.max_iter)
+        return {"version": FORMAT_VERSION, "metadata": run_metadata, "results": results}
+
+    def _run_unconstrained(self, name, problem, method):
+        def solve():
+            if method == "trust_region":
+                minimizer = TrustRegionMinimization(recorder=PathRecorder(mode="off"))
+            else:
+                minimizer = LineSearchMinimization(
+                    method=method, line_search=self.line_search, recorder=PathRecorder(mode="off")
+                )
+            x, f_x, success = minimizer.unconstrained_minimization(
+                f=problem,
+                x0=problem.x0,
+                obj_tol=self.OBJ_TOL,
+                param_tol=self.PARAM_TOL,
+                max_iter=self.max_iter,
+                hessp=problem.hessp,
+            )
+            return minimizer, f_x, success
+
+        wall_time, (minimizer, f_x, success) = best_time(solve, self.repeat)
+        return {
+            "problem": name,
+            "n": problem.n,
+            "method": method,
+            "wall_time": wall_time,
+            "iterations": minimizer.recorder.iterations,
+            "f_evaluations": minimizer.evaluation_counts["f"],
+            "grad_evaluations": minimizer.evaluation_counts["grad"],
+            "hess_evaluations": minimizer.evaluation_counts["hess"],
+            "linear_solves": minimizer.linear_solves,
+            "success": bool(success),
+            "f": float(f_x),
+        }
+
+    def _run_constrained(self, name, n, method, minimizer_class, func, kwargs):
+        calls = {"f": 0, "hess": 0}
+
+        def counted_func(x, hessian_flag):
+            calls["f"] += 1
+            calls["hess"] += int(bool(hessian_flag))
+            return func(x, hessian_flag)
+
+        def solve():
+            calls.update(f=0, hess=0)
+            minimizer = minimizer_class(
+                inner_recorder=PathRecorder(mode="off"),
+                outer_recorder=PathRecorder(mode="off"),
+            )
+            x, f_x, success = minimizer.interior_pt(func=counted_func, max_iter=self.max_iter, **kwargs)
+            return minimizer, f_x, success
+
+        wall_time, (minimizer, f_x, success) = best_time(solve, self.repeat)
+        return {
+            "problem": name,
+            "n": n,
+            "method": method,
+            "wall_time": wall_time,
+            "iterations": minimizer.inner_recorder.iterations,
+            "f_evaluations": calls["f"],
+            "grad_evaluations": calls["f"],
+            "hess_evaluations": calls["hess"],
+            "linear_solves": minimizer.newton_systems,
+            "success": bool(success),
+            "f": float(f_x),
+        }
+
+
+def best_time(solve, repeat):
+    """
+    Runs solve repeat times, and returns the best wall time with the result of the last run.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = solve()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def metadata():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(results, filename):
+    with open(filename, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def read_results(filename):
+    with open(filename) as file:
+        results = json.load(file)
+    if results.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported benchmark results version: {results.get('version')}")
+    return results
+
+
+def compare_results(baseline, current, time_threshold=1.25, min_time=1e-3):
+    """
+    Compares two benchmark runs case by case.
+
+    Parameters:
+    -----------
+    baseline: dict
+        The results of the reference version.
+    current: dict
+        The results of the version under test.
+    time_threshold: float, optional
+        The wall time ratio above which a case is reported as a slowdown.
+    min_time: float, optional
+        Cases faster than min_time in both runs are too noisy for a time comparison.
+
+    Returns:
+    --------
+    regressions: list
+        One (case, reason) pair per regression. A case regresses when it is slower by more
+        than time_threshold, when it needs more iterations, evaluations or linear solves, or
+        when it stops converging.
+    """
+    baseline_cases = {case_key(case): case for case in baseline["results"]}
+    regressions = []
+    for case in current["results"]:
+        reference = baseline_cases.get(case_key(case))
+        if reference is None:
+            continue
+        key = case_key(case)
+        if reference["success"] and not case["success"]:
+            regressions.append((key, "no longer converges"))
+        ratio = case["wall_time"] / max(reference["wall_time"], min_time)
+        if max(case["wall_time"], reference["wall_time"]) >= min_time and ratio > time_threshold:
+            regressions.append((key, f"wall time x{ratio:.2f}"))
+        for count in ["iterations", "f_evaluations", "grad_evaluations", "hess_evaluations", "linear_solves"]:
+            if case[count] > reference[count]:
+                regressions.append((key, f"{count} {reference[count]} -> {case[count]}"))
+    return regressions
+
+
+def case_key(case):
+    return case["problem"], case["n"], case["method"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the minimizers on scalable problems.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="run the suite and write the results to a JSON file")
+    run_parser.add_argument("output")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000, 100_000])
+    run_parser.add_argument("--constrained-sizes", type=int, nargs="+", default=[10, 50, 200])
+    run_parser.add_argument("--methods", nargs="+", default=None)
+    run_parser.add_argument("--max-iter", type=int, default=1_000)
+    run_parser.add_argument("--repeat", type=int, default=1)
+    run_parser.add_argument("--line-search", default="backtracking", choices=LineSearchMinimization.LINE_SEARCHES)
+    compare_parser = subparsers.add_parser("compare", help="compare two JSON results, fails on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--time-threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        suite = BenchmarkSuite(
+            sizes=args.sizes,
+            constrained_sizes=args.constrained_sizes,
+            methods=args.methods,
+            max_iter=args.max_iter,
+            repeat=args.repeat,
+            line_search=args.line_search,
+        )
+        results = suite.run()
+        for case in results["results"]:
+            print(
+                f"{case['problem']:>26} n={case['n']:<7} {case['method']:>16}: "
+                f"{case['wall_time']:.4f}s, iterations: {case['iterations']}, success: {case['success']}"
+            )
+        write_results(results, args.output)
+        return 0
+
+    regressions = compare_results(
+        read_results(args.baseline), read_results(args.current), time_threshold=args.time_threshold
+    )
+    for key, reason in regressions:
+        print(f"{key}: {reason}")
+    print(f"regressions: {len(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
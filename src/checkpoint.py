@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+
+class Checkpoint:
+    """
+    Class for saving the state of a long solve every few iterations, and resuming from it
+
+    A LineSearchMinimization or InteriorPointMinimizer given a Checkpoint writes the state of
+    its solve every `every` iterations: the iterate, the state of the method (the barrier
+    parameter t and the multipliers, the quasi-Newton model, the line search step, the
+    momentum...), the counters and the last path_tail records of its recorders. When a
+    solve starts with a Checkpoint whose file exists, it resumes from the saved state
+    instead of x0, and follows the path the interrupted solve would have followed. The
+    problem and the solve arguments have to be those of the interrupted solve. Only the
+    evaluation counts can differ, by the evaluations the emptied cache repeats. A solve that
+    returns, converged or not, deletes the file, so the next solve starts from its x0.
+
+    The file is an .npz archive of arrays, without pickled objects, with the format version
+    VERSION and the minimizer class and method, which are checked on load. It is written
+    next to filename and swapped in, so a solve preempted while writing leaves the previous
+    checkpoint intact.
+
+    Attributes:
+    filename (str): the .npz file
+    every (int): the number of iterations between two checkpoints
+    path_tail (int): the number of last records of every recorder saved, 0 for none
+    writes (int): the number of checkpoints written since the Checkpoint was built
+    """
+
+    VERSION = 1
+
+    def __init__(self, filename, every=100, path_tail=0):
+        self.filename = os.fspath(filename)
+        self.every = every
+        self.path_tail = path_tail
+        self.writes = 0
+
+    def due(self, iteration):
+        """
+        Returns whether a checkpoint is written after the iteration number iteration, counted from 1.
+        """
+        return iteration % self.every == 0
+
+    def save(self, minimizer, state, recorders):
+        """
+        Writes the state of the solve of minimizer.
+
+        Parameters:
+        -----------
+        minimizer: object
+            The minimizer, whose class and method are saved with the state.
+        state: dict
+            The arrays and scalars of the state, None values are left out.
+        recorders: dict
+            The PathRecorders of the minimizer, by name.
+        """
+        arrays = {
+            "version": self.VERSION,
+            "minimizer": type(minimizer).__name__,
+            "method": getattr(minimizer, "method", ""),
+        }
+        arrays.update({key: value for key, value in state.items() if value is not None})
+        for name, recorder in recorders.items():
+            arrays[f"{name}.iterations"] = recorder.iterations
+            if self.path_tail:
+                arrays[f"{name}.x"] = recorder.x[-self.path_tail:]
+                arrays[f"{name}.f"] = recorder.f[-self.path_tail:]
+        temporary = f"{self.filename}.tmp.npz"
+        np.savez(temporary, **arrays)
+        os.replace(temporary, self.filename)
+        self.writes += 1
+
+    def load(self, minimizer, recorders):
+        """
+        Reads the state saved by a solve of minimizer, and restores the path tails of its
+        recorders.
+
+        Parameters:
+        -----------
+        minimizer: object
+            The minimizer resuming the solve.
+        recorders: dict
+            The PathRecorders of the minimizer, by name.
+
+        Returns:
+        --------
+        state: dict
+            The saved arrays, scalars as 0-d arrays, or None when there is no checkpoint.
+        """
+        if not os.path.exists(self.filename):
+            return None
+        with np.load(self.filename, allow_pickle=False) as archive:
+            state = {key: archive[key] for key in archive.files}
+        version = int(state.pop("version"))
+        if version != self.VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {version}")
+        saved = (str(state.pop("minimizer")), str(state.pop("method")))
+        if saved != (type(minimizer).__name__, getattr(minimizer, "method", "")):
+            raise ValueError(f"The checkpoint is for another minimizer: {saved}")
+        for name, recorder in recorders.items():
+            recorder.restore(
+                state.pop(f"{name}.x", np.zeros((0, 0))),
+                state.pop(f"{name}.f", np.zeros(0)),
+                int(state.pop(f"{name}.iterations")),
+            )
+        return state
+
+    def clear(self):
+        """
+        Deletes the checkpoint file, the next solve starts from x0.
+        """
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
@@ -1,5 +1,9 @@
 import numpy as np
+from scipy import sparse
 
+from src.kkt import KKTSystem
+from src.profiler import NULL_PROFILER
+from src.recorder import PathRecorder
 from src.unconstrained_min import wolfe_conditions
 
 
@@ -7,12 +11,17 @@ class InteriorPointMinimizer:
     T = 1
     MU = 10
 
-    def __init__(self):
+    def __init__(self, inner_recorder=None, outer_recorder=None, profiler=None):
         self.success = False
-        self.x_path_inner = []
-        self.f_path_inner = []
-        self.x_path_outer = []
-        self.f_path_outer = []
+        self.inner_recorder = inner_recorder if inner_recorder is not None else PathRecorder()
+        self.outer_recorder = outer_recorder if outer_recorder is not None else PathRecorder()
+        # timers of the "objective", "barrier", "kkt", "line_search" and "phase_one" phases
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        self.newton_systems = 0
+        self.lambda_ = None
+        self.nu = None
+        self._kkt = None
+        self._warm_start = None
 
     def interior_pt(
         self,
@@ -28,79 +37,534 @@ class InteriorPointMinimizer:
         c1=0.01,
         c2=0.5,
         wolfe_tol=1e-6,
+        ineq_constraints_mat=None,
+        ineq_constraints_rhs=None,
+        kkt_method=None,
+        phase_one=True,
+        t0=None,
+        nu0=None,
+        callback=None,
+        checkpoint=None,
     ):
+        """
+        Log-barrier interior point method for minimizing func subject to the inequality
+        constraints f_i(x) <= 0 and to the equality constraints A x = b.
+
+        x0 does not need to be feasible. When it is not strictly feasible for the inequality
+        constraints, a Phase I problem finds a starting point, and the residual of A x = b
+        is driven to zero by infeasible start Newton steps.
+
+        The inequality constraints can be given as callables following the func protocol,
+        as a matrix pair G x <= h, or both. The matrix form is the fast path for linear
+        inequalities: its barrier is computed with a few matrix products, however many
+        rows G has.
+
+        A and G can be scipy.sparse matrices (CSR, COO...). The barrier Hessian and the
+        KKT system are then assembled and solved sparsely, so memory and time scale with
+        the number of nonzeros instead of n ** 2. func then has to return a sparse Hessian
+        as well, e.g. scipy.sparse.csr_matrix((n, n)) for a linear objective.
+
+        Parameters:
+        -----------
+        func: function
+            The function to be minimized.
+        ineq_constraints: np.ndarray
+            The inequality constraint callables f_i, can be empty.
+        eq_constraints_mat: np.ndarray or scipy.sparse matrix
+            The equality constraints matrix A.
+        eq_constraints_rhs: np.ndarray
+            The equality constraints right hand side b.
+        x0: np.ndarray
+            The starting point.
+        tol: float, optional
+            The tolerance on the duality gap m / t and on the inner Newton iterations.
+        max_iter: int, optional
+            The maximum number of outer and of inner iterations.
+        ineq_constraints_mat: np.ndarray or scipy.sparse matrix, optional
+            The linear inequality constraints matrix G.
+        ineq_constraints_rhs: np.ndarray, optional
+            The linear inequality constraints right hand side h.
+        kkt_method: str, optional
+            The elimination used by the KKTSystem of the Newton steps, one of
+            KKTSystem.METHODS. "sparse" when A or G is sparse, "schur" otherwise, by default.
+        phase_one: bool, optional
+            Whether to solve a Phase I problem when x0 is not strictly feasible.
+        t0: float, optional
+            The initial barrier parameter, T by default.
+        nu0: np.ndarray, optional
+            The initial multipliers of A x = b for the barrier objective t0 f + phi, i.e. t0
+            times the multipliers of the problem, zeros by default.
+        callback: function, optional
+            Called after every inner Newton step with the iteration state, a dict with the
+            keys "outer", "inner", "t", "x", "f" (the barrier objective), "alpha" and
+            "residual" (the norm of A x - b). The solve stops, unsuccessfully, when it
+            returns True.
+        checkpoint: Checkpoint, optional
+            Saves the state of the solve every checkpoint.every inner Newton steps, and
+            resumes from it, without Phase I, when its file exists. The file is deleted when
+            the solve returns.
+
+        Returns:
+        --------
+        final_location: np.ndarray
+            The final location.
+        final_objective_value: float
+            The final objective value.
+        success: bool
+            A success/failure boolean flag.
+        """
         _alpha = alpha
-        eq_const_n = eq_constraints_mat.shape[0]
+        self.success = False
+        self.inner_recorder.reset()
+        self.outer_recorder.reset()
+        profiler = self.profiler
+        objective = profiler.wrap("objective", func)
+        ineq_const_n = len(ineq_constraints)
+        if ineq_constraints_mat is not None:
+            ineq_const_n += ineq_constraints_mat.shape[0]
+        linear_ineq = (ineq_constraints_mat, ineq_constraints_rhs)
+        if kkt_method is None:
+            kkt_method = "sparse" if is_sparse_problem(eq_constraints_mat, ineq_constraints_mat) else "schur"
+        # the KKT system of the last solve is reused while A is unchanged
+        kkt = self._kkt
+        if kkt is None or not kkt.is_for(eq_constraints_mat, x0.shape[0], kkt_method):
+            kkt = KKTSystem(eq_constraints_mat, x0.shape[0], method=kkt_method)
+        self._kkt = kkt
+        factorizations = kkt.factorizations
+        eq_mat = kkt.eq_constraints_mat
+        eq_rhs = np.asarray(eq_constraints_rhs, dtype=float).reshape(kkt.eq_n)
+        recorders = {"inner_recorder": self.inner_recorder, "outer_recorder": self.outer_recorder}
+        state = checkpoint.load(self, recorders) if checkpoint is not None else None
+        if state is not None and state["x"].shape != x0.shape:
+            raise ValueError("The checkpoint is for a problem of another dimension")
+        if state is None and phase_one and not is_strictly_feasible(ineq_constraints, x0, *linear_ineq):
+            with profiler.phase("phase_one"):
+                x0 = phase_one_feasible_point(
+                    ineq_constraints, eq_constraints_mat, eq_constraints_rhs, x0, *linear_ineq, max_iter=max_iter,
+                )
         x = x0
-        t = self.T
-
-        self.x_path_outer.append(x)
-        self.f_path_outer.append(func(x, False)[0])
-        f_x, g_x, h_x = self.update_step(func, x, ineq_constraints, t)
-        for i in range(max_iter):
-            if eq_const_n:
-                block_matrix = np.concatenate([
-                    np.concatenate([h_x, eq_constraints_mat.T], axis=1),
-                    np.concatenate([eq_constraints_mat, np.zeros((eq_const_n, eq_const_n))], axis=1)
-                ], axis=0)
-            else:
-                block_matrix = h_x
-
-            eq_vec = np.concatenate([-g_x, np.zeros(block_matrix.shape[0] - g_x.shape[0])])
+        nu = np.zeros(kkt.eq_n) if nu0 is None else np.asarray(nu0, dtype=float).reshape(kkt.eq_n)
+        t = self.T if t0 is None else t0
+        stopped = False
+        outer_start = inner_start = steps = 0
+        x_prev = np.inf
+        f_prev = np.inf
 
-            x_prev = np.inf
-            f_prev = np.inf
-            for j in range(max_iter):
-                p = np.linalg.solve(block_matrix, eq_vec)[: x.shape[0]]
-                lambda_ = np.matmul(p.transpose(), np.matmul(h_x, p)) ** 0.5
-                if 0.5 * (lambda_ ** 2) < tol or sum(abs(x_prev - x)) < tol or f_prev - f_x < tol:
-                    break
+        if state is None:
+            self.outer_recorder.append(x, objective(x, False)[0])
+            f_x, g_x, h_x = self.update_step(objective, x, ineq_constraints, t, *linear_ineq)
+        else:
+            x, nu, t = state["x"], state["nu"], float(state["t"])
+            x_prev, f_prev = state["x_prev"], float(state["f_prev"])
+            outer_start, inner_start, steps = int(state["outer"]), int(state["inner"]), int(state["steps"])
+            factorizations -= int(state["newton_systems"])
+            f_x, g_x, h_x = barrier_objective(objective, ineq_constraints, t, *linear_ineq)(x, True)
+        for i in range(outer_start, max_iter):
+            for j in range(inner_start, max_iter):
+                barrier = barrier_objective(objective, ineq_constraints, t, *linear_ineq)
+                r_pri = eq_mat @ x - eq_rhs
+                with profiler.phase("kkt"):
+                    kkt.update(h_x)
+                    p, w = kkt.solve(g_x, r_pri)
+                if np.linalg.norm(r_pri) > tol:
+                    # infeasible start Newton step, damped on the norm of the primal and dual residuals
+                    with profiler.phase("line_search"):
+                        alpha = residual_line_search(
+                            f=barrier, eq_constraints_mat=eq_mat, eq_constraints_rhs=eq_rhs,
+                            x=x, nu=nu, p=p, d_nu=w - nu, c=c1, t=c2, tol=wolfe_tol,
+                        )
+                    if alpha == 0:
+                        break
+                    nu = nu + alpha * (w - nu)
+                else:
+                    lambda_ = (p @ (h_x @ p)) ** 0.5
+                    if 0.5 * (lambda_ ** 2) < tol or sum(abs(x_prev - x)) < tol or f_prev - f_x < tol:
+                        break
 
-                alpha = wolfe_conditions(f=func, x=x, p=p, alpha=_alpha, c=c1, t=c2, tol=wolfe_tol)
+                    with profiler.phase("line_search"):
+                        alpha = wolfe_conditions(f=barrier, x=x, p=p, alpha=_alpha, c=c1, t=c2, tol=wolfe_tol)
+                    nu = w
 
                 x_prev = x
                 f_prev = f_x
                 x = x + alpha * p
-                f_x, g_x, h_x = self.update_step(func, x, ineq_constraints, t)
+                f_x, g_x, h_x = self.update_step(objective, x, ineq_constraints, t, *linear_ineq)
+                if callback is not None and callback({
+                    "outer": i,
+                    "inner": j,
+                    "t": t,
+                    "x": x,
+                    "f": f_x,
+                    "alpha": alpha,
+                    "residual": np.linalg.norm(eq_mat @ x - eq_rhs),
+                }):
+                    stopped = True
+                    break
+                steps += 1
+                if checkpoint is not None and checkpoint.due(steps):
+                    checkpoint.save(self, {
+                        "outer": i,
+                        "inner": j + 1,
+                        "steps": steps,
+                        "x": x,
+                        "nu": nu,
+                        "t": t,
+                        "x_prev": x_prev,
+                        "f_prev": f_prev,
+                        "newton_systems": kkt.factorizations - factorizations,
+                    }, recorders)
 
-            if ineq_constraints.shape[0] / t < tol:
-                self.success = True
+            if stopped:
                 break
 
-            self.x_path_outer.append(x)
-            self.f_path_outer.append(func(x, False)[0])
+            if ineq_const_n / t < tol:
+                self.success = bool(np.linalg.norm(eq_mat @ x - eq_rhs) <= tol)
+                break
+
+            self.outer_recorder.append(x, objective(x, False)[0])
 
             t *= self.MU
+            # the barrier at the new t, the first Newton step of the next centering needs it
+            f_x, g_x, h_x = barrier_objective(objective, ineq_constraints, t, *linear_ineq)(x, True)
+            inner_start = 0
+            x_prev = np.inf
+            f_prev = np.inf
+
+        self.newton_systems = kkt.factorizations - factorizations
+        self.inner_recorder.close()
+        self.outer_recorder.close()
+        if checkpoint is not None:
+            checkpoint.clear()
+        # dual estimates from the central path, lambda_i = -1 / (t f_i(x)) and nu = w / t
+        self.lambda_ = -1 / (t * evaluate_constraints(ineq_constraints, *linear_ineq, x, hessian_flag=False)[0])
+        self.nu = nu / t
+        self._warm_start = dict(
+            func=func,
+            ineq_constraints=ineq_constraints,
+            eq_constraints_mat=eq_constraints_mat,
+            eq_constraints_rhs=eq_constraints_rhs,
+            x0=x,
+            tol=tol,
+            max_iter=max_iter,
+            alpha=_alpha,
+            c1=c1,
+            c2=c2,
+            wolfe_tol=wolfe_tol,
+            ineq_constraints_mat=ineq_constraints_mat,
+            ineq_constraints_rhs=ineq_constraints_rhs,
+            kkt_method=kkt_method,
+            phase_one=phase_one,
+            t0=t,
+            callback=callback,
+        )
+        return x, objective(x, True)[0], self.success
+
+    def resolve(self, backoff=1, **changes):
+        """
+        Re-solves the last problem given to interior_pt after the changes, e.g. a shifted
+        eq_constraints_rhs, another func or an extra inequality constraint, warm starting
+        from the last solution.
+
+        The last solution, the barrier parameter, and, when A is unchanged, the multipliers
+        nu and the KKT system (with its null space basis) are reused. The barrier parameter backs off by MU ** backoff
+        towards the central path, so the warm start is re-centered before t grows again.
+        When the last solution is not strictly feasible for the changed inequality constraints,
+        the solve goes through Phase I and restarts at t = T.
+
+        Parameters:
+        -----------
+        backoff: int, optional
+            The number of barrier parameter updates to undo.
+        changes: dict
+            The interior_pt arguments that changed.
+
+        Returns:
+        --------
+        The interior_pt results of the changed problem.
+        """
+        if self._warm_start is None:
+            raise ValueError("resolve needs a previous interior_pt solve")
+        problem = {**self._warm_start, **changes}
+        problem["t0"] = max(self.T, problem["t0"] / self.MU ** backoff)
+        if not is_strictly_feasible(
+            problem["ineq_constraints"], problem["x0"], problem["ineq_constraints_mat"], problem["ineq_constraints_rhs"]
+        ):
+            problem["t0"] = self.T
+        if "eq_constraints_mat" not in changes and "nu0" not in changes:
+            # the multipliers of the barrier objective at t0
+            problem["nu0"] = self.nu * problem["t0"]
+        return self.interior_pt(**problem)
 
-        return x, func(x, True)[0], self.success
+    @property
+    def x_path_inner(self):
+        return self.inner_recorder.x
 
-    def update_step(self, func, x, ineq_constraints, t):
+    @property
+    def f_path_inner(self):
+        return self.inner_recorder.f
+
+    @property
+    def x_path_outer(self):
+        return self.outer_recorder.x
+
+    @property
+    def f_path_outer(self):
+        return self.outer_recorder.f
+
+    def update_step(self, func, x, ineq_constraints, t, ineq_constraints_mat=None, ineq_constraints_rhs=None):
         f_x, g_x, h_x = func(x, True)
-        self.x_path_inner.append(x)
-        self.f_path_inner.append(f_x)
-        f_x, g_x, h_x = update_phi(ineq_constraints, x, f_x, g_x, h_x, t)
+        self.inner_recorder.append(x, f_x)
+        with self.profiler.phase("barrier"):
+            f_x, g_x, h_x = update_phi(
+                ineq_constraints, x, f_x, g_x, h_x, t, ineq_constraints_mat, ineq_constraints_rhs
+            )
         return f_x, g_x, h_x
 
 
-def phi(ineq_constraints, x):
+def phi(ineq_constraints, x, hessian_flag=True):
     f_star = 0
     g_star = 0
     h_star = 0
     for func in ineq_constraints:
-        f_x, g_x, h_x = func(x, True)
+        f_x, g_x, h_x = func(x, hessian_flag)
         f_star += np.log(-f_x)
-        g = g_x / f_x
-        g_star += g
-        g_mesh = np.tile(
-            g.reshape(g.shape[0], -1), (1, g.shape[0])
-        ) * np.tile(g.reshape(g.shape[0], -1).T, (g.shape[0], 1))
-        h_star += (h_x * f_x - g_mesh) / f_x**2
+        g_star += g_x / f_x
+        if hessian_flag:
+            h_star += (h_x * f_x - np.outer(g_x, g_x)) / f_x ** 2
     return -f_star, -g_star, -h_star
 
 
-def update_phi(ineq_constraints, x, f_x, g_x, h_x, t):
-    f_x_phi, g_x_phi, h_x_phi = phi(ineq_constraints, x)
+def is_sparse_problem(eq_constraints_mat, ineq_constraints_mat=None):
+    """
+    Returns whether the constraints matrices A or G are scipy.sparse matrices.
+    """
+    return sparse.issparse(eq_constraints_mat) or sparse.issparse(ineq_constraints_mat)
+
+
+def add_hessians(h_1, h_2):
+    """
+    Returns h_1 + h_2, sparse when either is sparse. Adding an ndarray to a sparse
+    matrix would give an np.matrix.
+    """
+    if sparse.issparse(h_1) and isinstance(h_2, np.ndarray):
+        h_2 = sparse.csr_matrix(h_2)
+    elif sparse.issparse(h_2) and isinstance(h_1, np.ndarray):
+        h_1 = sparse.csr_matrix(h_1)
+    return h_1 + h_2
+
+
+def linear_phi(ineq_constraints_mat, ineq_constraints_rhs, x, hessian_flag=True):
+    """
+    Log-barrier of the linear inequality constraints G x <= h,
+    -sum(log(s)) with the slacks s = h - G x, its gradient G.T @ (1 / s)
+    and its Hessian G.T @ diag(1 / s ** 2) @ G, a sparse matrix when G is sparse.
+    """
+    inv_slack = 1 / (ineq_constraints_rhs - ineq_constraints_mat @ x)
+    f_star = np.sum(np.log(inv_slack))
+    g_star = ineq_constraints_mat.T @ inv_slack
+    h_star = 0
+    if hessian_flag and sparse.issparse(ineq_constraints_mat):
+        g = sparse.csr_matrix(ineq_constraints_mat)
+        h_star = (g.T @ sparse.diags(inv_slack ** 2) @ g).tocsr()
+    elif hessian_flag:
+        h_star = (ineq_constraints_mat.T * inv_slack ** 2) @ ineq_constraints_mat
+    return f_star, g_star, h_star
+
+
+def update_phi(
+    ineq_constraints, x, f_x, g_x, h_x, t, ineq_constraints_mat=None, ineq_constraints_rhs=None, hessian_flag=True,
+):
+    f_x_phi, g_x_phi, h_x_phi = phi(ineq_constraints, x, hessian_flag)
     f_x = t * f_x + f_x_phi
     g_x = t * g_x + g_x_phi
-    h_x = t * h_x + h_x_phi
+    h_x = add_hessians(t * h_x, h_x_phi) if hessian_flag else None
+    if ineq_constraints_mat is not None:
+        f_x_phi, g_x_phi, h_x_phi = linear_phi(ineq_constraints_mat, ineq_constraints_rhs, x, hessian_flag)
+        f_x = f_x + f_x_phi
+        g_x = g_x + g_x_phi
+        h_x = add_hessians(h_x, h_x_phi) if hessian_flag else None
     return f_x, g_x, h_x
+
+
+def is_strictly_feasible(ineq_constraints, x, ineq_constraints_mat=None, ineq_constraints_rhs=None):
+    """
+    Returns whether x is in the interior of the region f_i(x) < 0, G x < h.
+    """
+    if any(func(x, False)[0] >= 0 for func in ineq_constraints):
+        return False
+    if ineq_constraints_mat is not None:
+        return bool(np.all(ineq_constraints_mat @ x < ineq_constraints_rhs))
+    return True
+
+
+def barrier_objective(func, ineq_constraints, t, ineq_constraints_mat=None, ineq_constraints_rhs=None):
+    """
+    Returns the log-barrier objective t * func + phi with the func protocol. It evaluates
+    to +inf outside of the strictly feasible region, so a backtracking line search on it
+    never leaves the barrier's domain.
+    """
+    def f(x, hessian_flag):
+        if not is_strictly_feasible(ineq_constraints, x, ineq_constraints_mat, ineq_constraints_rhs):
+            return np.inf, None, None
+        f_x, g_x, h_x = func(x, hessian_flag)
+        return update_phi(
+            ineq_constraints, x, f_x, g_x, h_x, t, ineq_constraints_mat, ineq_constraints_rhs, hessian_flag
+        )
+    return f
+
+
+def evaluate_constraints(
+    ineq_constraints, ineq_constraints_mat, ineq_constraints_rhs, x, lambda_=None, hessian_flag=True,
+):
+    """
+    Evaluates all the inequality constraints, callables first and then the rows of G x <= h.
+
+    Returns:
+    --------
+    f_i: np.ndarray
+        The constraint values, of shape (m,).
+    jac: np.ndarray
+        The constraint gradients, of shape (m, n), a sparse matrix when G is sparse.
+    h_i: np.ndarray or float
+        The sum of the constraint Hessians weighted by lambda_, 0 when lambda_ is not given.
+    """
+    values = []
+    grads = []
+    h_i = 0
+    for i, func in enumerate(ineq_constraints):
+        f_x, g_x, h_x = func(x, hessian_flag and lambda_ is not None)
+        values.append(f_x)
+        grads.append(g_x)
+        if hessian_flag and lambda_ is not None:
+            h_i = h_i + lambda_[i] * h_x
+    f_i = np.array(values, dtype=float)
+    jac = np.array(grads, dtype=float).reshape(len(values), x.shape[0])
+    if ineq_constraints_mat is not None:
+        f_i = np.concatenate([f_i, ineq_constraints_mat @ x - ineq_constraints_rhs])
+        if sparse.issparse(ineq_constraints_mat):
+            jac = sparse.vstack([sparse.csr_matrix(jac), ineq_constraints_mat], format="csr")
+        else:
+            jac = np.concatenate([jac, ineq_constraints_mat])
+    return f_i, jac, h_i
+
+
+def residual_line_search(f, eq_constraints_mat, eq_constraints_rhs, x, nu, p, d_nu, c, t, tol=1e-6):
+    """
+    Backtracking line search of the infeasible start Newton method, on the norm of the
+    residual r(x, nu) = [grad f(x) + A.T nu, A x - b]
+        - |r(x + alpha * p, nu + alpha * d_nu)| <= (1 - c * alpha) * |r(x, nu)|
+    Steps outside of the domain of f, where it evaluates to +inf, are rejected, and a zero
+    step is returned when the step size falls below tol.
+    """
+    def residual_norm(x, nu):
+        f_x, g_x, _ = f(x, False)
+        if not np.isfinite(f_x):
+            return np.inf
+        return np.linalg.norm(np.concatenate([
+            g_x + eq_constraints_mat.T @ nu,
+            eq_constraints_mat @ x - eq_constraints_rhs,
+        ]))
+
+    _alpha = 1.0
+    r_norm = residual_norm(x, nu)
+    while residual_norm(x + _alpha * p, nu + _alpha * d_nu) > (1 - c * _alpha) * r_norm:
+        _alpha *= t
+        if _alpha < tol:
+            # no acceptable step, stay in the domain
+            return 0.0
+    return _alpha
+
+
+def phase_one_feasible_point(
+    ineq_constraints,
+    eq_constraints_mat,
+    eq_constraints_rhs,
+    x0,
+    ineq_constraints_mat=None,
+    ineq_constraints_rhs=None,
+    tol=1e-3,
+    max_iter=100,
+):
+    """
+    Phase I method, finds a point that is strictly feasible for the inequality constraints
+    and satisfies A x = b, by solving
+
+        min s   subject to   f_i(x) <= s,  G x - s <= h,  A x = b,  s >= -1
+
+    from the strictly feasible (x0, max(f_i(x0), 0) + 1), with the barrier method and
+    infeasible start Newton steps for the equality constraints.
+
+    Returns:
+    --------
+    x: np.ndarray
+        The strictly feasible point.
+
+    Raises:
+    -------
+    ValueError: if the constraints have no strictly feasible point.
+    """
+    n = x0.shape[0]
+    x0 = np.asarray(x0, dtype=float)
+    sparse_problem = is_sparse_problem(eq_constraints_mat, ineq_constraints_mat)
+    values = [func(x0, False)[0] for func in ineq_constraints]
+    if ineq_constraints_mat is not None:
+        values.extend(ineq_constraints_mat @ x0 - ineq_constraints_rhs)
+    z0 = np.append(x0, max(max(values, default=0), 0) + 1)
+
+    def objective(z, hessian_flag):
+        g = np.zeros(n + 1)
+        g[-1] = 1
+        if not hessian_flag:
+            return z[-1], g, None
+        return z[-1], g, sparse.csr_matrix((n + 1, n + 1)) if sparse_problem else np.zeros((n + 1, n + 1))
+
+    def shifted(func):
+        def constraint(z, hessian_flag):
+            f_x, g_x, h_x = func(z[:-1], hessian_flag)
+            h = None
+            if hessian_flag and sparse.issparse(h_x):
+                h = sparse.block_diag([h_x, sparse.csr_matrix((1, 1))], format="csr")
+            elif hessian_flag:
+                h = np.zeros((n + 1, n + 1))
+                h[:-1, :-1] = h_x
+            return f_x - z[-1], np.append(g_x, -1), h
+        return constraint
+
+    # -s <= 1 keeps the Phase I problem bounded
+    linear_mat = np.zeros((1, n + 1))
+    linear_mat[0, -1] = -1
+    linear_rhs = np.ones(1)
+    if ineq_constraints_mat is not None and sparse_problem:
+        linear_mat = sparse.vstack([
+            sparse.hstack([ineq_constraints_mat, -np.ones((ineq_constraints_mat.shape[0], 1))]),
+            linear_mat,
+        ], format="csr")
+        linear_rhs = np.concatenate([ineq_constraints_rhs, linear_rhs])
+    elif ineq_constraints_mat is not None:
+        linear_mat = np.vstack([
+            np.hstack([ineq_constraints_mat, -np.ones((ineq_constraints_mat.shape[0], 1))]),
+            linear_mat,
+        ])
+        linear_rhs = np.concatenate([ineq_constraints_rhs, linear_rhs])
+    if sparse.issparse(eq_constraints_mat):
+        eq_mat = sparse.hstack([eq_constraints_mat, sparse.csr_matrix((eq_constraints_mat.shape[0], 1))], format="csr")
+    else:
+        eq_n = eq_constraints_mat.shape[0] if eq_constraints_mat.size else 0
+        eq_mat = np.zeros((eq_n, n + 1))
+        eq_mat[:, :-1] = np.asarray(eq_constraints_mat, dtype=float).reshape(eq_n, n)
+
+    z, _, _ = InteriorPointMinimizer().interior_pt(
+        func=objective,
+        ineq_constraints=[shifted(func) for func in ineq_constraints],
+        eq_constraints_mat=eq_mat,
+        eq_constraints_rhs=eq_constraints_rhs,
+        x0=z0,
+        tol=tol,
+        max_iter=max_iter,
+        ineq_constraints_mat=linear_mat,
+        ineq_constraints_rhs=linear_rhs,
+        phase_one=False,
+    )
+    if z[-1] >= 0:
+        raise ValueError("The inequality constraints have no strictly feasible point")
+    return z[:-1]
@@ -0,0 +1,348 @@
+import numpy as np
+
+
+class FiniteDifferenceObjective:
+    """
+    Wraps a value-only function into the f(x, hessian_flag) -> (f, g, h) protocol with
+    finite-difference derivatives
+
+    All the perturbed points of an evaluation are stacked into one (N, n) array and passed
+    to the function in a single call, so a gradient costs one call of 2n points (n + 1 for
+    "forward") and a Hessian one call of O(n^2) points, instead of a Python call per point.
+
+    Attributes:
+    f (function): the value-only function, maps an (N, n) array to N values when vectorized,
+        and a point to a value otherwise
+    method (str): the gradient difference, "forward" or "central"
+    vectorized (bool): whether f evaluates a batch of points in one call
+    calls (int): the number of calls of f
+    points (int): the number of points evaluated by f
+    """
+
+    METHODS = ["forward", "central"]
+
+    def __init__(self, f, method="central", vectorized=True):
+        if method not in self.METHODS:
+            raise ValueError(f"Invalid finite difference method: {method}")
+        self.f = f
+        self.method = method
+        self.vectorized = vectorized
+        self.calls = 0
+        self.points = 0
+
+    def __call__(self, x, hessian_flag):
+        x = np.asarray(x, dtype=float)
+        n = x.shape[0]
+        scale = np.maximum(1.0, np.abs(x))
+        eps = np.finfo(float).eps
+        if self.method == "central":
+            step = eps ** (1 / 3) * scale
+            steps = np.diag(step)
+            points = [x[None], x + steps, x - steps]
+        else:
+            step = eps ** (1 / 2) * scale
+            points = [x[None], x + np.diag(step)]
+        if hessian_flag:
+            # the four corners x +- h_i e_i +- h_j e_j of every pair i <= j
+            hess_step = eps ** (1 / 4) * scale
+            i, j = np.triu_indices(n)
+            steps_i = np.diag(hess_step)[i]
+            steps_j = np.diag(hess_step)[j]
+            points += [
+                x + steps_i + steps_j,
+                x + steps_i - steps_j,
+                x - steps_i + steps_j,
+                x - steps_i - steps_j,
+            ]
+        values = self._evaluate(np.concatenate(points))
+
+        f_x = values[0]
+        if self.method == "central":
+            g_x = (values[1:n + 1] - values[n + 1:2 * n + 1]) / (2 * step)
+            values = values[2 * n + 1:]
+        else:
+            g_x = (values[1:n + 1] - f_x) / step
+            values = values[n + 1:]
+        h_x = None
+        if hessian_flag:
+            f_pp, f_pm, f_mp, f_mm = values.reshape(4, -1)
+            h_x = np.zeros((n, n))
+            h_x[i, j] = (f_pp - f_pm - f_mp + f_mm) / (4 * hess_step[i] * hess_step[j])
+            h_x[j, i] = h_x[i, j]
+        return f_x, g_x, h_x
+
+    def _evaluate(self, points):
+        self.points += points.shape[0]
+        if self.vectorized:
+            self.calls += 1
+            return np.asarray(self.f(points), dtype=float)
+        self.calls += points.shape[0]
+        return np.array([self.f(point) for point in points], dtype=float)
+
+
+class ForwardModeObjective:
+    """
+    Wraps a value-only function into the f(x, hessian_flag) -> (f, g, h) protocol with
+    forward-mode derivatives
+
+    The function is called once with x lifted to a Dual number, which carries the gradient
+    and the Hessian of every entry with respect to x, so the derivatives are exact up to
+    rounding. f has to be written with the operations supported by Dual (arithmetic, powers,
+    indexing, sums, matrix products and the common numpy functions).
+
+    Every entry of every intermediate array carries n gradient and n ** 2 Hessian entries,
+    so the memory of a Hessian evaluation grows as n ** 3 for a vector of n entries, about
+    64 MB per intermediate vector at n = 200. Hessians are refused above
+    max_hessian_dimension. Gradients, which grow as n ** 2, stay available, e.g. for the
+    "newton_cg" method with finite differences of the gradient as Hessian-vector products.
+
+    Attributes:
+    f (function): the value-only function
+    max_hessian_dimension (int): the largest n of a Hessian evaluation
+    calls (int): the number of calls of f
+    """
+
+    MAX_HESSIAN_DIMENSION = 200
+
+    def __init__(self, f, max_hessian_dimension=MAX_HESSIAN_DIMENSION):
+        self.f = f
+        self.max_hessian_dimension = max_hessian_dimension
+        self.calls = 0
+
+    def __call__(self, x, hessian_flag):
+        x = np.asarray(x, dtype=float)
+        n = x.shape[0]
+        if hessian_flag and n > self.max_hessian_dimension:
+            raise ValueError(
+                f"Forward-mode Hessians need O(n^3) memory, n = {n} is above max_hessian_dimension = "
+                f"{self.max_hessian_dimension}, use a Hessian-free method or FiniteDifferenceObjective"
+            )
+        self.calls += 1
+        result = self.f(Dual.variables(x, hessian_flag))
+        if not isinstance(result, Dual):
+            # f does not depend on x
+            return float(result), np.zeros(n), np.zeros((n, n)) if hessian_flag else None
+        return float(result.value), result.grad, result.hess if hessian_flag else None
+
+
+class Dual:
+    """
+    Second order dual number, an array of values with the gradient and the Hessian of every
+    entry with respect to the n variables
+
+    The gradient has the shape of the value followed by (n,) and the Hessian the shape of
+    the value followed by (n, n). The Hessian is None when only first derivatives are
+    propagated.
+    """
+
+    def __init__(self, value, grad, hess=None):
+        self.value = np.asarray(value, dtype=float)
+        self.grad = grad
+        self.hess = hess
+
+    @classmethod
+    def variables(cls, x, hessian_flag=True):
+        """
+        Lifts the point x to the dual number of the n variables.
+        """
+        n = x.shape[0]
+        return cls(x, np.eye(n), np.zeros((n, n, n)) if hessian_flag else None)
+
+    @property
+    def shape(self):
+        return self.value.shape
+
+    @property
+    def ndim(self):
+        return self.value.ndim
+
+    @property
+    def T(self):
+        axes = tuple(reversed(range(self.ndim)))
+        return self.transpose(axes)
+
+    def transpose(self, axes):
+        grad = self.grad.transpose(axes + (self.ndim,))
+        hess = None if self.hess is None else self.hess.transpose(axes + (self.ndim, self.ndim + 1))
+        return Dual(self.value.transpose(axes), grad, hess)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __getitem__(self, key):
+        key = key if isinstance(key, tuple) else (key,)
+        grad = self.grad[key + (slice(None),)]
+        hess = None if self.hess is None else self.hess[key + (slice(None), slice(None))]
+        return Dual(self.value[key], grad, hess)
+
+    def sum(self, axis=None, **kwargs):
+        if axis is None:
+            axis = tuple(range(self.ndim))
+        # normalize the axes, the derivative axes trail the value axes
+        axis = tuple(a % self.ndim for a in np.atleast_1d(axis))
+        hess = None if self.hess is None else self.hess.sum(axis=axis)
+        return Dual(self.value.sum(axis=axis), self.grad.sum(axis=axis), hess)
+
+    def __add__(self, other):
+        if not isinstance(other, Dual):
+            value = self.value + np.asarray(other, dtype=float)
+            grad = np.broadcast_to(self.grad, value.shape + self.grad.shape[-1:])
+            hess = self.hess
+            if hess is not None:
+                hess = np.broadcast_to(hess, value.shape + hess.shape[-2:])
+            return Dual(value, grad, hess)
+        return Dual(self.value + other.value, self.grad + other.grad, _add(self.hess, other.hess))
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __neg__(self):
+        return Dual(-self.value, -self.grad, None if self.hess is None else -self.hess)
+
+    def __mul__(self, other):
+        if not isinstance(other, Dual):
+            other = np.asarray(other, dtype=float)
+            hess = None if self.hess is None else self.hess * other[..., None, None]
+            return Dual(self.value * other, self.grad * other[..., None], hess)
+        value = self.value * other.value
+        grad = self.grad * other.value[..., None] + other.grad * self.value[..., None]
+        hess = None
+        if self.hess is not None:
+            cross = self.grad[..., :, None] * other.grad[..., None, :]
+            hess = (
+                self.hess * other.value[..., None, None] +
+                other.hess * self.value[..., None, None] +
+                cross + np.swapaxes(cross, -1, -2)
+            )
+        return Dual(value, grad, hess)
+
+    def __truediv__(self, other):
+        if not isinstance(other, Dual):
+            return self * (1 / np.asarray(other, dtype=float))
+        return self * other.reciprocal()
+
+    def __pow__(self, other):
+        if isinstance(other, Dual):
+            return (self.log() * other).exp()
+        p = np.asarray(other, dtype=float)
+        v = self.value
+        return self._chain(v ** p, p * v ** (p - 1), p * (p - 1) * v ** (p - 2))
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __rtruediv__(self, other):
+        return self.reciprocal() * other
+
+    def __rpow__(self, other):
+        return (self * np.log(other)).exp()
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __matmul__(self, other):
+        return _matmul(self, other)
+
+    def __rmatmul__(self, other):
+        return _matmul(other, self)
+
+    def reciprocal(self):
+        v = self.value
+        return self._chain(1 / v, -1 / v ** 2, 2 / v ** 3)
+
+    def exp(self):
+        e = np.exp(self.value)
+        return self._chain(e, e, e)
+
+    def log(self):
+        v = self.value
+        return self._chain(np.log(v), 1 / v, -1 / v ** 2)
+
+    def sqrt(self):
+        s = np.sqrt(self.value)
+        return self._chain(s, 0.5 / s, -0.25 / s ** 3)
+
+    def sin(self):
+        v = self.value
+        return self._chain(np.sin(v), np.cos(v), -np.sin(v))
+
+    def cos(self):
+        v = self.value
+        return self._chain(np.cos(v), -np.sin(v), -np.cos(v))
+
+    def tanh(self):
+        t = np.tanh(self.value)
+        return self._chain(t, 1 - t ** 2, -2 * t * (1 - t ** 2))
+
+    def square(self):
+        return self * self
+
+    def _chain(self, value, d1, d2):
+        """
+        Applies an elementwise function with value, first and second derivatives d1, d2.
+        """
+        grad = self.grad * d1[..., None]
+        hess = None
+        if self.hess is not None:
+            hess = (
+                self.hess * d1[..., None, None] +
+                d2[..., None, None] * self.grad[..., :, None] * self.grad[..., None, :]
+            )
+        return Dual(value, grad, hess)
+
+    UFUNCS = {
+        np.add: lambda a, b: b + a,
+        np.subtract: lambda a, b: -b + a,
+        np.multiply: lambda a, b: b * a,
+        np.true_divide: lambda a, b: _lift(a, b) / b,
+        np.power: lambda a, b: _lift(a, b) ** b,
+        np.matmul: lambda a, b: _matmul(a, b),
+        np.negative: lambda a: -a,
+        np.exp: lambda a: a.exp(),
+        np.log: lambda a: a.log(),
+        np.sqrt: lambda a: a.sqrt(),
+        np.sin: lambda a: a.sin(),
+        np.cos: lambda a: a.cos(),
+        np.tanh: lambda a: a.tanh(),
+        np.square: lambda a: a.square(),
+        np.reciprocal: lambda a: a.reciprocal(),
+    }
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != "__call__" or kwargs or ufunc not in self.UFUNCS:
+            return NotImplemented
+        return self.UFUNCS[ufunc](*inputs)
+
+
+def _lift(a, like):
+    """
+    Lifts a constant to a Dual with zero derivatives over the variables of like.
+    """
+    if isinstance(a, Dual):
+        return a
+    a = np.asarray(a, dtype=float)
+    n = like.grad.shape[-1]
+    hess = None if like.hess is None else np.zeros(a.shape + (n, n))
+    return Dual(a, np.zeros(a.shape + (n,)), hess)
+
+
+def _add(a, b):
+    return None if a is None or b is None else a + b
+
+
+def _matmul(a, b):
+    """
+    Matrix product of 1-D and 2-D operands, one or both of them Dual.
+    """
+    a_ndim = a.ndim if isinstance(a, Dual) else np.ndim(a)
+    b_ndim = b.ndim if isinstance(b, Dual) else np.ndim(b)
+    if a_ndim == 1 and b_ndim == 1:
+        return (a * b).sum()
+    if a_ndim == 1:
+        # (k,) @ (k, m)
+        return (a[:, None] * b).sum(axis=0)
+    if b_ndim == 1:
+        # (m, k) @ (k,)
+        return (a * b[None, :]).sum(axis=1)
+    # (m, k) @ (k, p)
+    return (a[:, :, None] * b[None, :, :]).sum(axis=1)
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+class CachedObjective:
+    """
+    Memoizing wrapper around an objective following the f(x, hessian_flag) -> (f, g, h) protocol
+
+    The most recent evaluations are kept in a small LRU cache keyed on the exact bytes of x,
+    so a solver and its line search can ask for the same point without paying twice. A cached
+    entry without a Hessian is re-evaluated when a Hessian is requested.
+
+    Attributes:
+    f (function): the wrapped objective
+    max_size (int): the number of evaluations kept in the cache, 0 disables it
+    counts (dict): the number of function, gradient and Hessian evaluations of the wrapped objective
+    """
+
+    def __init__(self, f, max_size=8):
+        self.f = f
+        self.max_size = max_size
+        self.counts = {"f": 0, "grad": 0, "hess": 0}
+        self._cache = OrderedDict()
+
+    def __call__(self, x, hessian_flag):
+        x = np.asarray(x)
+        key = (x.shape, x.dtype.str, x.tobytes())
+        entry = self._cache.get(key)
+        if entry is None or (hessian_flag and entry[2] is None):
+            entry = self.f(x, hessian_flag)
+            self.counts["f"] += 1
+            self.counts["grad"] += 1
+            self.counts["hess"] += int(bool(hessian_flag))
+            self._cache[key] = entry
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        f_x, g_x, h_x = entry
+        return f_x, g_x, h_x if hessian_flag else None
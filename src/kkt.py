@@ -0,0 +1,200 @@
+import numpy as np
+from scipy import sparse
+from scipy.linalg import cho_factor, cho_solve, LinAlgError, solve_triangular
+from scipy.sparse.linalg import splu
+
+
+class KKTSystem:
+    """
+    Class for the equality constrained Newton (KKT) system
+
+        [H  A.T] [dx]   [-g]
+        [A   0 ] [w ] = [-r]
+
+    The constraints matrix A is fixed for the lifetime of the system, everything that
+    depends on it alone is computed once, and every Newton step only updates the Hessian
+    block H. When H is not positive definite the system falls back to a dense solve of the
+    preallocated block matrix.
+
+    The "sparse" method keeps A and H as scipy.sparse matrices and never forms a dense n x n
+    array, so its memory and time scale with the number of nonzeros (and the fill-in of the
+    factorization). A, and H in update, can be given dense or sparse to any method, and are
+    converted to the method's format.
+
+    Attributes:
+    method (str): elimination of the equality constraints, "schur", "nullspace", "dense" or "sparse"
+        - "schur": Cholesky of H and a dense solve of the Schur complement A H^-1 A.T.
+        - "nullspace": a basis Z of the null space of A, computed once, and a Cholesky of
+          the reduced Hessian Z.T H Z. Cheapest when A has many rows.
+        - "dense": LU of the full block matrix.
+        - "sparse": sparse LU (SuperLU) of the normal equations A H^-1 A.T when H is diagonal,
+          as the barrier Hessians of LPs, and of the full block matrix otherwise.
+    """
+
+    METHODS = ["schur", "nullspace", "dense", "sparse"]
+
+    def __init__(self, eq_constraints_mat, n, method="schur"):
+        if method not in self.METHODS:
+            raise ValueError(f"Invalid KKT method: {method}")
+        self.method = method
+        self.n = n
+        self.is_sparse = method == "sparse"
+        if sparse.issparse(eq_constraints_mat):
+            self.eq_n = eq_constraints_mat.shape[0]
+        else:
+            self.eq_n = eq_constraints_mat.shape[0] if eq_constraints_mat.size else 0
+        if self.is_sparse:
+            self.eq_constraints_mat = sparse.csr_matrix(eq_constraints_mat, dtype=float).reshape(self.eq_n, n)
+        elif sparse.issparse(eq_constraints_mat):
+            self.eq_constraints_mat = eq_constraints_mat.toarray().astype(float).reshape(self.eq_n, n)
+        else:
+            self.eq_constraints_mat = np.asarray(eq_constraints_mat, dtype=float).reshape(self.eq_n, n)
+        self.factorizations = 0
+        self.solves = 0
+
+        self._hess = None
+        self._factor = None
+        self._hess_inv_at = None
+        self._schur_complement = None
+        self._hess_inv = None
+        if self.is_sparse:
+            return
+        self._block_matrix = np.zeros((n + self.eq_n, n + self.eq_n))
+        self._block_matrix[:n, n:] = self.eq_constraints_mat.T
+        self._block_matrix[n:, :n] = self.eq_constraints_mat
+        if method == "nullspace" and self.eq_n:
+            # A.T = [Q1 Q2] [R; 0], Q2 spans the null space of A
+            q, r = np.linalg.qr(self.eq_constraints_mat.T, mode="complete")
+            self._range_basis = q[:, :self.eq_n]
+            self._null_basis = q[:, self.eq_n:]
+            self._r = r[:self.eq_n]
+
+    def is_for(self, eq_constraints_mat, n, method):
+        """
+        Returns whether the system can be reused for the constraints matrix eq_constraints_mat.
+        """
+        if self.method != method or self.n != n:
+            return False
+        a = self.eq_constraints_mat
+        if sparse.issparse(eq_constraints_mat) or sparse.issparse(a):
+            eq_constraints_mat = sparse.csr_matrix(eq_constraints_mat)
+            if eq_constraints_mat.shape != a.shape:
+                return False
+            return (sparse.csr_matrix(a) != eq_constraints_mat).nnz == 0
+        return a.size == eq_constraints_mat.size and np.array_equal(a.ravel(), np.ravel(eq_constraints_mat))
+
+    def update(self, hess):
+        """
+        Replaces the Hessian block and factorizes the system.
+        """
+        if self.is_sparse:
+            return self._update_sparse(hess)
+        if sparse.issparse(hess):
+            hess = hess.toarray()
+        self._hess = hess
+        self._block_matrix[:self.n, :self.n] = hess
+        self._factor = None
+        self.factorizations += 1
+        if self.method == "dense":
+            return
+        reduced = hess
+        if self.method == "nullspace" and self.eq_n:
+            reduced = self._null_basis.T @ hess @ self._null_basis
+        try:
+            self._factor = cho_factor(reduced)
+        except LinAlgError:
+            # not positive definite, fall back to the block matrix
+            self._factor = None
+            return
+        if self.method == "schur" and self.eq_n:
+            self._hess_inv_at = cho_solve(self._factor, self.eq_constraints_mat.T)
+            self._schur_complement = self.eq_constraints_mat @ self._hess_inv_at
+
+    def solve(self, grad, residual=None):
+        """
+        Solves the system for the right hand side [-g, -r], with r = 0 when not given.
+
+        Returns:
+        --------
+        dx: np.ndarray
+            The primal step.
+        w: np.ndarray
+            The multipliers of the equality constraints.
+        """
+        self.solves += 1
+        if residual is None:
+            residual = np.zeros(self.eq_n)
+        if self.is_sparse:
+            return self._solve_sparse(grad, residual)
+        if self._factor is None:
+            return self._solve_dense(grad, residual)
+        if not self.eq_n:
+            return -cho_solve(self._factor, grad), np.zeros(0)
+        if self.method == "nullspace":
+            return self._solve_nullspace(grad, residual)
+        return self._solve_schur(grad, residual)
+
+    def _update_sparse(self, hess):
+        self._hess = sparse.csr_matrix(hess, dtype=float)
+        self.factorizations += 1
+        a = self.eq_constraints_mat
+        hess_diag = self._hess.diagonal()
+        self._hess_inv = None
+        if self.eq_n and self._hess.count_nonzero() == np.count_nonzero(hess_diag) and np.all(hess_diag > 0):
+            # diagonal H, the normal equations A H^-1 A.T are sparse and symmetric positive definite
+            self._hess_inv = 1 / hess_diag
+            matrix = (a @ sparse.diags(self._hess_inv) @ a.T).tocsc()
+            options = dict(permc_spec="MMD_AT_PLUS_A", diag_pivot_thresh=0, options={"SymmetricMode": True})
+        elif self.eq_n:
+            matrix = sparse.bmat([[self._hess, a.T], [a, None]], format="csc")
+            options = dict(permc_spec="COLAMD")
+        else:
+            matrix = self._hess.tocsc()
+            options = dict(permc_spec="MMD_AT_PLUS_A")
+        try:
+            self._factor = splu(matrix, **options)
+        except RuntimeError as error:
+            raise LinAlgError(f"Singular KKT system: {error}")
+
+    def _solve_sparse(self, grad, residual):
+        # the barrier Hessians close to the boundary are badly scaled, as in _solve_schur, one
+        # step of iterative refinement on the block system restores the accuracy
+        a = self.eq_constraints_mat
+        dx, w = self._sparse_step(grad, residual)
+        ddx, dw = self._sparse_step(self._hess @ dx + a.T @ w + grad, a @ dx + residual)
+        return dx + ddx, w + dw
+
+    def _sparse_step(self, grad, residual):
+        if self._hess_inv is not None:
+            hess_inv_g = self._hess_inv * grad
+            w = self._factor.solve(residual - self.eq_constraints_mat @ hess_inv_g)
+            return -(hess_inv_g + self._hess_inv * (self.eq_constraints_mat.T @ w)), w
+        solution = self._factor.solve(-np.concatenate([grad, residual]))
+        return solution[:self.n], solution[self.n:]
+
+    def _solve_dense(self, grad, residual):
+        solution = np.linalg.solve(self._block_matrix, -np.concatenate([grad, residual]))
+        return solution[:self.n], solution[self.n:]
+
+    def _solve_schur(self, grad, residual):
+        a = self.eq_constraints_mat
+        dx, w = self._schur_step(grad, residual)
+        # the Schur complement loses accuracy when H is ill-conditioned, as the barrier Hessians
+        # are close to the boundary, one step of iterative refinement on the block system
+        # restores it
+        ddx, dw = self._schur_step(self._hess @ dx + a.T @ w + grad, a @ dx + residual)
+        return dx + ddx, w + dw
+
+    def _schur_step(self, grad, residual):
+        a = self.eq_constraints_mat
+        hess_inv_g = cho_solve(self._factor, grad)
+        w = np.linalg.solve(self._schur_complement, residual - a @ hess_inv_g)
+        return -(hess_inv_g + self._hess_inv_at @ w), w
+
+    def _solve_nullspace(self, grad, residual):
+        # particular solution of A dx = -r, then the reduced Newton step in the null space
+        dx = -self._range_basis @ solve_triangular(self._r, residual, trans="T")
+        g_reduced = self._null_basis.T @ (grad + self._hess @ dx)
+        dx = dx - self._null_basis @ cho_solve(self._factor, g_reduced)
+        w = -solve_triangular(self._r, self._range_basis.T @ (grad + self._hess @ dx))
+        return dx, w
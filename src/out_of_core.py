@@ -0,0 +1,150 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class ChunkedObjective:
+    """
+    Objective over a dataset that does not fit in memory, with the f(x, hessian_flag) protocol
+
+    The objective is a mean over the rows a_i of A of a loss of the prediction u_i = a_i.T @ x,
+
+        f(x) = 1/m * sum_i loss(u_i, b_i) + regularization / 2 * |x| ** 2
+
+    A and b are read from memory-mapped .npy files (or any array) in chunks of chunk_size
+    rows. Every chunk contributes its part of the value, of the gradient A.T @ loss' and of
+    the Gauss-Newton Hessian A.T @ diag(loss'') @ A, and the chunks run on a thread pool,
+    where NumPy releases the GIL in the matrix products. At most 2 * max_workers chunks are
+    in flight, so the peak memory is set by chunk_size and max_workers, whatever the number
+    of rows.
+
+    Attributes:
+    loss (str): the loss of a row, a LOSSES key
+        - "least_squares": 1/2 * (u - b) ** 2, the Gauss-Newton Hessian is the Hessian.
+        - "logistic": log(1 + e ** (-b * u)) for the labels b in {-1, 1}, the Gauss-Newton
+          Hessian is the Hessian.
+    chunk_size (int): the number of rows read at once
+    max_workers (int): the number of threads, the number of cores by default
+    regularization (float): the weight of the l2 regularization
+    n_samples (int): the number m of rows
+    n (int): the dimension of x
+    chunk_evaluations (int): the number of chunks evaluated since the objective was built
+    """
+
+    LOSSES = ["least_squares", "logistic"]
+
+    def __init__(self, A, b, loss="least_squares", chunk_size=100_000, max_workers=None, regularization=0.0):
+        if loss not in self.LOSSES:
+            raise ValueError(f"Invalid loss: {loss}")
+        self._paths = (A, b) if isinstance(A, (str, os.PathLike)) else None
+        self.A = np.load(A, mmap_mode="r") if isinstance(A, (str, os.PathLike)) else A
+        self.b = np.load(b, mmap_mode="r") if isinstance(b, (str, os.PathLike)) else b
+        self.loss = loss
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or os.cpu_count()
+        self.regularization = regularization
+        self.n_samples, self.n = self.A.shape
+        self.x0 = np.zeros(self.n)
+        self.chunk_evaluations = 0
+        self._executor = None
+
+    def __call__(self, x, hessian_flag):
+        x = np.asarray(x, dtype=float)
+        f = 0.0
+        g = np.zeros(self.n)
+        h = np.zeros((self.n, self.n)) if hessian_flag else None
+        for f_chunk, g_chunk, h_chunk in self._map_chunks(x, hessian_flag):
+            f += f_chunk
+            g += g_chunk
+            if hessian_flag:
+                h += h_chunk
+        f = f / self.n_samples + self.regularization / 2 * (x @ x)
+        g = g / self.n_samples + self.regularization * x
+        if hessian_flag:
+            h /= self.n_samples
+            h[np.diag_indices(self.n)] += self.regularization
+        return f, g, h
+
+    def minibatch(self, x, indices):
+        """
+        The mean value and gradient over the rows indices, the protocol of StochasticMinimization.
+        """
+        indices = np.sort(indices)
+        f, g, _ = self._evaluate(np.asarray(self.A[indices], dtype=float), np.asarray(self.b[indices]), x, False)
+        return (
+            f / indices.shape[0] + self.regularization / 2 * (x @ x),
+            g / indices.shape[0] + self.regularization * x,
+        )
+
+    def close(self):
+        """
+        Shuts the thread pool down, a later call starts a new one.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __getstate__(self):
+        # the thread pool is not picklable, and the memory maps are re-opened from their files
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        if self._paths is not None:
+            state["A"] = state["b"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._paths is not None:
+            self.A = np.load(self._paths[0], mmap_mode="r")
+            self.b = np.load(self._paths[1], mmap_mode="r")
+
+    def _map_chunks(self, x, hessian_flag):
+        """
+        Yields the sums of every chunk, in order, with a bounded number of chunks in flight.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = deque()
+        for start in range(0, self.n_samples, self.chunk_size):
+            if len(pending) == 2 * self.max_workers:
+                yield pending.popleft().result()
+            pending.append(self._executor.submit(self._chunk, start, x, hessian_flag))
+            self.chunk_evaluations += 1
+        while pending:
+            yield pending.popleft().result()
+
+    def _chunk(self, start, x, hessian_flag):
+        stop = min(start + self.chunk_size, self.n_samples)
+        return self._evaluate(
+            np.asarray(self.A[start:stop], dtype=float), np.asarray(self.b[start:stop]), x, hessian_flag
+        )
+
+    def _evaluate(self, rows, targets, x, hessian_flag):
+        """
+        The sums of the loss, of its gradient and of its Gauss-Newton Hessian over the rows.
+        """
+        u = rows @ x
+        if self.loss == "least_squares":
+            r = u - targets
+            value, slope, curvature = 1/2 * (r @ r), r, None
+        else:
+            margins = targets * u
+            # the logistic function of the margins, computed without overflow
+            sigma = np.exp(-np.logaddexp(0, -margins))
+            value = np.logaddexp(0, -margins).sum()
+            slope = -targets * (1 - sigma)
+            curvature = sigma * (1 - sigma)
+        g = rows.T @ slope
+        h = None
+        if hessian_flag:
+            h = rows.T @ rows if curvature is None else (rows.T * curvature) @ rows
+        return value, g, h
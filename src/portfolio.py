@@ -0,0 +1,176 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+# the thread limits of a worker process, kept alive for the lifetime of the worker
+_thread_limits = None
+
+
+class PortfolioRunner:
+    """
+    Class for solving a portfolio of independent problems on a process pool
+
+    A problem is a (minimizer, kwargs) pair, the minimizer is a LineSearchMinimization,
+    TrustRegionMinimization, InteriorPointMinimizer or any other minimizer with a
+    SOLVE_METHODS entry, and kwargs are the arguments of its solve method. Objectives and
+    constraints have to be picklable, i.e. module level functions. The problems are sent to
+    the workers in chunks and the results are streamed back as the chunks finish.
+
+    A problem whose solve raises does not stop the portfolio: its row has success False,
+    f nan, the exception in error, and its final location is None.
+
+    Every worker limits its BLAS thread pool to blas_threads, so the processes do not
+    oversubscribe the cores with BLAS threads of their own. The limit is set through the
+    environment of the spawned workers, and through threadpoolctl when it is installed. The
+    environment of the calling process is only changed while the workers are started.
+
+    Attributes:
+    max_workers (int): the number of worker processes, the number of cores by default
+    blas_threads (int): the number of BLAS threads of every worker
+    chunk_size (int): the number of problems sent to a worker at once
+    locations (dict): the final location of every solved problem, by problem index
+    """
+
+    SOLVE_METHODS = {
+        "LineSearchMinimization": "unconstrained_minimization",
+        "TrustRegionMinimization": "unconstrained_minimization",
+        "StochasticMinimization": "stochastic_minimization",
+        "InteriorPointMinimizer": "interior_pt",
+        "PrimalDualInteriorPointMinimizer": "interior_pt",
+    }
+    BLAS_ENVIRONMENT_VARIABLES = [
+        "OMP_NUM_THREADS",
+        "OPENBLAS_NUM_THREADS",
+        "MKL_NUM_THREADS",
+        "BLIS_NUM_THREADS",
+        "VECLIB_MAXIMUM_THREADS",
+    ]
+    RESULTS_DTYPE = np.dtype([
+        ("index", int),
+        ("success", bool),
+        ("f", float),
+        ("iterations", int),
+        ("time", float),
+        ("worker", int),
+        ("error", "U256"),
+    ])
+
+    def __init__(self, max_workers=None, blas_threads=1, chunk_size=1):
+        self.max_workers = max_workers or os.cpu_count()
+        self.blas_threads = blas_threads
+        self.chunk_size = chunk_size
+        self.locations = {}
+
+    def run(self, problems):
+        """
+        Solves the problems on the process pool, and yields the results as they finish.
+
+        Parameters:
+        -----------
+        problems: iterable
+            The (minimizer, kwargs) pairs.
+
+        Returns:
+        --------
+        results: generator
+            The results table row and the final location of every problem, in completion order.
+        """
+        problems = list(problems)
+        chunks = [
+            [(index, *problems[index]) for index in range(start, min(start + self.chunk_size, len(problems)))]
+            for start in range(0, len(problems), self.chunk_size)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=limit_blas_threads,
+            initargs=(self.blas_threads,),
+        ) as executor:
+            # spawned workers read the BLAS limit from the environment before they import numpy,
+            # they are started by the submits, the caller consumes the results in its own environment
+            with blas_environment(self.BLAS_ENVIRONMENT_VARIABLES, self.blas_threads):
+                futures = [executor.submit(solve_chunk, chunk, self.SOLVE_METHODS) for chunk in chunks]
+            for future in as_completed(futures):
+                for row, x in future.result():
+                    yield row, x
+
+    def solve(self, problems):
+        """
+        Solves the problems on the process pool.
+
+        Parameters:
+        -----------
+        problems: iterable
+            The (minimizer, kwargs) pairs.
+
+        Returns:
+        --------
+        results: np.ndarray
+            The results table, a structured array with the fields index, success, f,
+            iterations, time, worker and error, sorted by problem index.
+        """
+        self.locations = {}
+        rows = []
+        for row, x in self.run(problems):
+            rows.append(row)
+            self.locations[row[0]] = x
+        results = np.array(rows, dtype=self.RESULTS_DTYPE)
+        return np.sort(results, order="index")
+
+
+def solve_chunk(chunk, solve_methods):
+    """
+    Solves a chunk of (index, minimizer, kwargs) problems in a worker process.
+    """
+    results = []
+    for index, minimizer, kwargs in chunk:
+        solve = getattr(minimizer, solve_methods[type(minimizer).__name__])
+        start = time.perf_counter()
+        error = ""
+        try:
+            x, f_x, success = solve(**kwargs)
+        except Exception as exception:
+            # one failing problem is reported in its row, the rest of the chunk goes on
+            x, f_x, success = None, np.nan, False
+            error = f"{type(exception).__name__}: {exception}"
+        elapsed = time.perf_counter() - start
+        recorder = getattr(minimizer, "recorder", getattr(minimizer, "inner_recorder", None))
+        iterations = recorder.iterations if recorder is not None else 0
+        row = (index, bool(success), float(f_x), iterations, elapsed, os.getpid(), error)
+        results.append((row, x))
+    return results
+
+
+def limit_blas_threads(threads):
+    """
+    Worker initializer, limits the BLAS thread pools that are already loaded.
+    """
+    global _thread_limits
+    if threadpool_limits is not None:
+        _thread_limits = threadpool_limits(limits=threads, user_api="blas")
+
+
+@contextmanager
+def blas_environment(variables, threads):
+    """
+    Sets the BLAS thread environment variables, and restores them on exit.
+    """
+    saved = {variable: os.environ.get(variable) for variable in variables}
+    os.environ.update({variable: str(threads) for variable in variables})
+    try:
+        yield
+    finally:
+        for variable, value in saved.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
@@ -0,0 +1,275 @@
+import numpy as np
+from scipy import sparse
+
+from src.constrained_min import add_hessians, evaluate_constraints, is_sparse_problem, phase_one_feasible_point
+from src.kkt import KKTSystem
+from src.profiler import NULL_PROFILER
+from src.recorder import PathRecorder
+
+
+class PrimalDualInteriorPointMinimizer:
+    """
+    Class for constrained minimization using a primal-dual interior point method with
+    Mehrotra predictor-corrector steps
+
+    Every iteration factorizes one Newton system and solves it twice: an affine scaling
+    (predictor) step towards the boundary, and a corrector step whose centering parameter
+    sigma = (mu_aff / mu) ** 3 adapts to the progress of the predictor. The dual variables
+    are part of the iterate, so there is no fixed barrier schedule and no inner centering loop.
+
+    When the equality constraints have no solution in the interior of the inequality
+    constraints, the iterates are driven to the boundary and the steps shrink to nothing.
+    The solve stops, unsuccessfully, when the step falls below MIN_STEP or the Newton
+    system is no longer finite.
+
+    Attributes:
+    STEP_FRACTION (float): fraction of the step to the boundary of the positive orthant
+    MIN_STEP (float): the step length below which the solve stops
+    inner_recorder (PathRecorder): recorder of x_path_inner and f_path_inner
+    outer_recorder (PathRecorder): recorder of x_path_outer and f_path_outer
+    profiler (Profiler): timers of the "objective", "constraints", "kkt", "step" and
+        "phase_one" phases, disabled by default
+    """
+
+    STEP_FRACTION = 0.99
+    MIN_STEP = 1e-12
+
+    def __init__(self, inner_recorder=None, outer_recorder=None, profiler=None):
+        self.success = False
+        self.inner_recorder = inner_recorder if inner_recorder is not None else PathRecorder()
+        self.outer_recorder = outer_recorder if outer_recorder is not None else PathRecorder()
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        self.newton_systems = 0
+        self.lambda_ = None
+        self.nu = None
+
+    def interior_pt(
+        self,
+        func,
+        ineq_constraints,
+        eq_constraints_mat,
+        eq_constraints_rhs,
+        x0,
+        tol=1e-8,
+        max_iter=100,
+        ineq_constraints_mat=None,
+        ineq_constraints_rhs=None,
+        kkt_method=None,
+        feas_tol=1e-8,
+        phase_one=True,
+        callback=None,
+    ):
+        """
+        Primal-dual interior point method for minimizing func subject to the inequality
+        constraints f_i(x) <= 0 and to the equality constraints A x = b, with the same
+        arguments as InteriorPointMinimizer.interior_pt. A and G can be dense arrays or
+        scipy.sparse matrices.
+
+        Parameters:
+        -----------
+        func: function
+            The function to be minimized.
+        ineq_constraints: np.ndarray
+            The inequality constraint callables f_i, can be empty.
+        eq_constraints_mat: np.ndarray or scipy.sparse matrix
+            The equality constraints matrix A.
+        eq_constraints_rhs: np.ndarray
+            The equality constraints right hand side b.
+        x0: np.ndarray
+            The starting point. When it is not strictly feasible for the inequality constraints
+            a Phase I problem finds a starting point, and the equality constraints residual is
+            driven to zero during the solve.
+        tol: float, optional
+            The tolerance on the surrogate duality gap.
+        max_iter: int, optional
+            The maximum number of iterations.
+        ineq_constraints_mat: np.ndarray or scipy.sparse matrix, optional
+            The linear inequality constraints matrix G.
+        ineq_constraints_rhs: np.ndarray, optional
+            The linear inequality constraints right hand side h.
+        kkt_method: str, optional
+            The elimination used by the KKTSystem of the Newton steps, "sparse" by default when
+            A or G is sparse and "schur" otherwise.
+        feas_tol: float, optional
+            The tolerance on the primal and dual residuals.
+        phase_one: bool, optional
+            Whether to solve a Phase I problem when x0 is not strictly feasible.
+        callback: function, optional
+            Called before every step with the iteration state, a dict with the keys
+            "iteration", "x", "f", "gap", "primal_residual", "dual_residual" and "step". The
+            solve stops, unsuccessfully, when it returns True.
+
+        Returns:
+        --------
+        final_location: np.ndarray
+            The final location.
+        final_objective_value: float
+            The final objective value.
+        success: bool
+            A success/failure boolean flag.
+        """
+        self.success = False
+        self.inner_recorder.reset()
+        self.outer_recorder.reset()
+        profiler = self.profiler
+        func = profiler.wrap("objective", func)
+        if kkt_method is None:
+            kkt_method = "sparse" if is_sparse_problem(eq_constraints_mat, ineq_constraints_mat) else "schur"
+        kkt = KKTSystem(eq_constraints_mat, x0.shape[0], method=kkt_method)
+        a = kkt.eq_constraints_mat
+        b = np.asarray(eq_constraints_rhs, dtype=float).reshape(kkt.eq_n)
+        constraints = (ineq_constraints, ineq_constraints_mat, ineq_constraints_rhs)
+
+        x = np.asarray(x0, dtype=float)
+        f_i, jac, _ = evaluate_constraints(*constraints, x)
+        if np.any(f_i >= 0):
+            if not phase_one:
+                raise ValueError("x0 is not strictly feasible for the inequality constraints")
+            with profiler.phase("phase_one"):
+                x = phase_one_feasible_point(
+                    ineq_constraints, eq_constraints_mat, eq_constraints_rhs, x,
+                    ineq_constraints_mat, ineq_constraints_rhs, max_iter=max_iter,
+                )
+            f_i, jac, _ = evaluate_constraints(*constraints, x)
+        m = f_i.shape[0]
+        # start on the central path of t = 1
+        lambda_ = -1 / f_i
+        nu = np.zeros(kkt.eq_n)
+
+        for k in range(max_iter):
+            f_x, g_x, h_x = func(x, True)
+            with profiler.phase("constraints"):
+                f_i, jac, h_i = evaluate_constraints(*constraints, x, lambda_)
+            self.outer_recorder.append(x, f_x)
+            self.inner_recorder.append(x, f_x)
+
+            slack = -f_i
+            r_dual = g_x + jac.T @ lambda_ + a.T @ nu
+            r_pri = a @ x - b
+            gap = slack @ lambda_
+            if (
+                gap < tol and
+                np.linalg.norm(r_pri) < feas_tol and
+                np.linalg.norm(r_dual) < feas_tol
+            ):
+                self.success = True
+                break
+
+            # eliminate the dual step: (H + J.T diag(lambda / s) J) dx + A.T dnu = -(r_dual + J.T (r_cent / f_i))
+            with np.errstate(divide="ignore", over="ignore"):
+                weights = lambda_ / slack
+            if not np.all(np.isfinite(weights)):
+                # the slacks underflowed, there is no interior point to go on from
+                break
+            with profiler.phase("kkt"):
+                kkt.update(add_hessians(add_hessians(h_x, h_i), weighted_gram(jac, weights)))
+            residuals = (r_dual, r_pri, jac, slack, lambda_, nu)
+
+            # predictor, the affine scaling step
+            dx, d_lambda, d_nu = self._newton_step(kkt, residuals, lambda_ * slack)
+            d_slack = -jac @ dx
+            if m:
+                mu = gap / m
+                step = min(max_step(slack, d_slack), max_step(lambda_, d_lambda))
+                mu_aff = (slack + step * d_slack) @ (lambda_ + step * d_lambda) / m
+                sigma = (mu_aff / mu) ** 3
+                # corrector, centering and the second order term of the complementarity
+                r_cent = lambda_ * slack - sigma * mu + d_slack * d_lambda
+                dx, d_lambda, d_nu = self._newton_step(kkt, residuals, r_cent)
+
+            with profiler.phase("step"):
+                d_slack = -jac @ dx
+                step = self.STEP_FRACTION * min(max_step(slack, d_slack), max_step(lambda_, d_lambda))
+                x_next = x + step * dx
+                # the linearized slacks are exact for linear constraints only, backtrack into the interior
+                while step >= self.MIN_STEP and np.any(
+                    evaluate_constraints(*constraints, x_next, hessian_flag=False)[0] >= 0
+                ):
+                    step /= 2
+                    x_next = x + step * dx
+            if not (np.isfinite(step) and step >= self.MIN_STEP and np.all(np.isfinite(x_next))):
+                # no step into the interior, e.g. the equality constraints cannot be met in it
+                break
+
+            if callback is not None and callback({
+                "iteration": k,
+                "x": x,
+                "f": f_x,
+                "gap": gap,
+                "primal_residual": np.linalg.norm(r_pri),
+                "dual_residual": np.linalg.norm(r_dual),
+                "step": step,
+            }):
+                break
+
+            x = x_next
+            lambda_ = lambda_ + step * d_lambda
+            nu = nu + step * d_nu
+
+        self.newton_systems = kkt.factorizations
+        self.lambda_ = lambda_
+        self.nu = nu
+        self.inner_recorder.close()
+        self.outer_recorder.close()
+        return x, func(x, False)[0], self.success
+
+    def _newton_step(self, kkt, residuals, r_cent):
+        """
+        Solves the factorized Newton system for the complementarity residual r_cent, and
+        recovers the dual steps.
+
+        Parameters:
+        -----------
+        kkt: KKTSystem
+            The system of the equality constraints, updated with the Hessian of the iteration.
+        residuals: tuple
+            The dual residual, the primal residual, the constraints Jacobian, the slacks, lambda
+            and nu of the iteration.
+        r_cent: np.ndarray
+            The complementarity residual.
+
+        Returns:
+        --------
+        dx, d_lambda, d_nu: np.ndarray
+            The steps of x, lambda and nu.
+        """
+        r_dual, r_pri, jac, slack, lambda_, nu = residuals
+        with self.profiler.phase("kkt"):
+            dx, nu_next = kkt.solve(r_dual - kkt.eq_constraints_mat.T @ nu - jac.T @ (r_cent / slack), r_pri)
+        d_lambda = (lambda_ * (jac @ dx) - r_cent) / slack
+        return dx, d_lambda, nu_next - nu
+
+    @property
+    def x_path_inner(self):
+        return self.inner_recorder.x
+
+    @property
+    def f_path_inner(self):
+        return self.inner_recorder.f
+
+    @property
+    def x_path_outer(self):
+        return self.outer_recorder.x
+
+    @property
+    def f_path_outer(self):
+        return self.outer_recorder.f
+
+
+def weighted_gram(jac, weights):
+    """
+    J.T diag(weights) J, a sparse matrix when J is sparse.
+    """
+    if sparse.issparse(jac):
+        return (jac.T @ sparse.diags(weights) @ jac).tocsr()
+    return (jac.T * weights) @ jac
+
+
+def max_step(v, dv):
+    """
+    Largest step in [0, 1] that keeps v + step * dv non-negative.
+    """
+    decreasing = dv < 0
+    if not np.any(decreasing):
+        return 1.0
+    return min(1.0, np.min(-v[decreasing] / dv[decreasing]))
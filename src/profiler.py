@@ -0,0 +1,121 @@
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+
+class Profiler:
+    """
+    Class for collecting per-phase timers and counters of the solvers
+
+    A minimizer given a Profiler times its phases (objective calls, linear algebra, line
+    searches, barrier assembly...) with phase(name), and counts events with count(name).
+    Phases can be nested, the time of a phase includes the time of the phases it calls,
+    e.g. "line_search" includes the "objective" calls of its trials. The timers accumulate
+    over solves until reset is called.
+
+    Minimizers without a profiler use NULL_PROFILER, whose phases are a shared no-op
+    context manager, so the instrumentation costs a method call per phase when disabled.
+
+    Attributes:
+    times (dict): the total time spent in every phase, in seconds
+    counts (dict): the number of times every phase was entered, and the counted events
+    """
+
+    enabled = True
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """
+        Drops all the timers and counters.
+        """
+        self.times = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def phase(self, name):
+        """
+        Returns a context manager timing the phase name.
+        """
+        return _PhaseTimer(self, name)
+
+    def count(self, name, n=1):
+        """
+        Counts n events of name.
+        """
+        self.counts[name] += n
+
+    def wrap(self, name, func):
+        """
+        Returns func with every call timed as the phase name.
+        """
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return timed
+
+    def summary(self):
+        """
+        Returns the timers and counters, {name: {"time": seconds, "calls": count}}.
+        """
+        return {
+            name: {"time": self.times.get(name, 0.0), "calls": self.counts[name]}
+            for name in self.counts
+        }
+
+    def report(self):
+        """
+        Returns the summary as a table, the slowest phase first.
+        """
+        rows = sorted(self.summary().items(), key=lambda item: -item[1]["time"])
+        lines = [f"{'phase':<20}{'time [s]':>12}{'calls':>10}"]
+        lines += [f"{name:<20}{entry['time']:>12.6f}{entry['calls']:>10}" for name, entry in rows]
+        return "\n".join(lines)
+
+
+class NullProfiler:
+    """
+    Disabled profiler, every phase is the same no-op context manager.
+    """
+
+    enabled = False
+    _phase = nullcontext()
+
+    def reset(self):
+        pass
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, name, n=1):
+        pass
+
+    def wrap(self, name, func):
+        return func
+
+    def summary(self):
+        return {}
+
+    def report(self):
+        return ""
+
+
+class _PhaseTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = self.profiler.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.times[self.name] += self.profiler.clock() - self.start
+        self.profiler.counts[self.name] += 1
+        return False
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+
+
+class PathRecorder:
+    """
+    Class for recording the iterates and objective values along a solver path
+
+    The records are kept in a preallocated structured array with the fields "x" and "f",
+    which grows by doubling, so an iteration costs a copy into the array instead of a new
+    Python object per iterate.
+
+    Attributes:
+    mode (str): what is recorded
+        - "full": every iterate.
+        - "off": nothing.
+        - "every": every k-th iterate, starting from the first one.
+        - "last": the last n iterates, in a ring buffer.
+        - "memmap": every iterate, spilled to the memory-mapped .npy file filename.
+    k (int): the stride of the "every" mode
+    n (int): the size of the ring buffer of the "last" mode
+    filename (str): the .npy file of the "memmap" mode
+    """
+
+    MODES = ["full", "off", "every", "last", "memmap"]
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, mode="full", k=10, n=1000, filename=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid recorder mode: {mode}")
+        if mode == "memmap" and filename is None:
+            raise ValueError("The memmap mode needs a filename")
+        self.mode = mode
+        self.k = k
+        self.n = n
+        self.filename = filename
+        self.reset()
+
+    def reset(self):
+        """
+        Drops all the records, the recorder is reset at the start of every solve.
+        """
+        self._records = None
+        self._count = 0
+        self.iterations = 0
+
+    def append(self, x, f):
+        """
+        Records the iterate x and its objective value f.
+        """
+        iteration = self.iterations
+        self.iterations += 1
+        if self.mode == "off" or (self.mode == "every" and iteration % self.k):
+            return
+        x = np.asarray(x, dtype=float)
+        if self._records is None:
+            capacity = self.n if self.mode == "last" else self.INITIAL_CAPACITY
+            dtype = np.dtype([("x", float, x.shape), ("f", float, np.shape(f))])
+            self._records = self._allocate(dtype, capacity)
+        if self.mode == "last":
+            index = self._count % self.n
+        else:
+            index = self._count
+            if index == self._records.shape[0]:
+                self._grow()
+        self._records[index] = (x, f)
+        self._count += 1
+
+    def restore(self, x, f, iterations):
+        """
+        Replaces the records by the iterates x and their objective values f, e.g. the path
+        tail of a checkpoint, and sets the number of iterations seen to iterations.
+        """
+        self.reset()
+        if self.mode != "off" and len(x):
+            if self.mode == "last":
+                x, f = x[-self.n:], f[-self.n:]
+            dtype = np.dtype([("x", float, x.shape[1:]), ("f", float, f.shape[1:])])
+            capacity = self.n if self.mode == "last" else max(self.INITIAL_CAPACITY, len(x))
+            self._records = self._allocate(dtype, capacity)
+            self._records["x"][:len(x)] = x
+            self._records["f"][:len(x)] = f
+            self._count = len(x)
+        self.iterations = iterations
+
+    @property
+    def x(self):
+        """
+        The recorded iterates, one per row, of shape (0, 0) when nothing is recorded.
+        """
+        return self._ordered()["x"]
+
+    @property
+    def f(self):
+        """
+        The recorded objective values.
+        """
+        return self._ordered()["f"]
+
+    def __len__(self):
+        return min(self._count, self.n) if self.mode == "last" else self._count
+
+    def close(self):
+        """
+        Truncates the memory-mapped file of the "memmap" mode to the recorded iterates, the
+        minimizers close their recorders at the end of every solve.
+        """
+        if self.mode == "memmap" and self._records is not None:
+            self._records = self._reallocate(self._count)
+
+    def _ordered(self):
+        if self._records is None:
+            return np.zeros(0, dtype=[("x", float, (0,)), ("f", float)])
+        if self.mode == "last" and self._count > self.n:
+            start = self._count % self.n
+            return np.concatenate([self._records[start:], self._records[:start]])
+        return self._records[:len(self)]
+
+    def _allocate(self, dtype, capacity):
+        if self.mode == "memmap":
+            return np.lib.format.open_memmap(self.filename, mode="w+", dtype=dtype, shape=(capacity,))
+        return np.zeros(capacity, dtype=dtype)
+
+    def _grow(self):
+        self._records = self._reallocate(max(2 * self._records.shape[0], self.INITIAL_CAPACITY))
+
+    def _reallocate(self, capacity):
+        records = self._records
+        if self.mode != "memmap":
+            grown = np.zeros(capacity, dtype=records.dtype)
+            grown[:self._count] = records[:self._count]
+            return grown
+        # write the resized array next to the file and swap it in
+        temporary = f"{self.filename}.tmp.npy"
+        grown = np.lib.format.open_memmap(temporary, mode="w+", dtype=records.dtype, shape=(capacity,))
+        grown[:self._count] = records[:self._count]
+        grown.flush()
+        del grown, records
+        self._records = None
+        os.replace(temporary, self.filename)
+        return np.lib.format.open_memmap(self.filename, mode="r+")
@@ -0,0 +1,250 @@
+import numpy as np
+from scipy import sparse
+
+
+class ProblemScaling:
+    """
+    Class for solving a problem in scaled variables, x = d * z for a vector of scales d
+
+    The scaled objective is f(d * z), with the gradient d * g and the Hessian D H D, for
+    D = diag(d). The scales are estimated once, at the starting point, by fit, and minimize
+    solves the scaled problem with any LineSearchMinimization, TrustRegionMinimization or
+    InteriorPointMinimizer, then maps the solution, the recorded paths and the multipliers
+    back to the original variables, so the scaling is invisible to the caller.
+
+    The rows of the linear constraints A x = b and G x <= h are scaled as well, to a unit
+    largest entry. A positive row scale changes neither the feasible set nor, for G, the
+    central path of the log-barrier.
+
+    Attributes:
+    method (str): how the variable scales are estimated
+        - "hessian": d_i = 1 / sqrt(|H_ii(x0)|), the scaled Hessian has a unit diagonal. The
+          diagonal is estimated by finite differences of the gradient when f has no Hessian.
+        - "equilibration": the column scales of the Ruiz equilibration of the stacked
+          constraints matrices [A; G], for problems whose Hessian is zero or uninformative
+          as LPs.
+    iterations (int): the number of Ruiz iterations of the "equilibration" method
+    variable_scale (np.ndarray): the scales d
+    eq_row_scale (np.ndarray): the scales of the rows of A
+    ineq_row_scale (np.ndarray): the scales of the rows of G
+    """
+
+    METHODS = ["hessian", "equilibration"]
+
+    def __init__(self, method="hessian", iterations=10):
+        if method not in self.METHODS:
+            raise ValueError(f"Invalid scaling method: {method}")
+        self.method = method
+        self.iterations = iterations
+        self.variable_scale = None
+        self.eq_row_scale = None
+        self.ineq_row_scale = None
+
+    def fit(self, f, x0, eq_constraints_mat=None, ineq_constraints_mat=None):
+        """
+        Estimates the variable scales at x0, and the row scales of the constraints matrices.
+
+        Parameters:
+        -----------
+        f: function
+            The objective.
+        x0: np.ndarray
+            The starting point.
+        eq_constraints_mat: np.ndarray or scipy.sparse matrix, optional
+            The equality constraints matrix A.
+        ineq_constraints_mat: np.ndarray or scipy.sparse matrix, optional
+            The linear inequality constraints matrix G.
+
+        Returns:
+        --------
+        self: ProblemScaling
+            The fitted scaling.
+        """
+        x0 = np.asarray(x0, dtype=float)
+        matrices = [m for m in (eq_constraints_mat, ineq_constraints_mat) if _rows(m)]
+        if self.method == "hessian":
+            diagonal = np.abs(hessian_diagonal(f, x0))
+            scale = np.ones(x0.shape[0])
+            positive = np.isfinite(diagonal) & (diagonal > 0)
+            scale[positive] = 1 / np.sqrt(diagonal[positive])
+        elif not matrices:
+            raise ValueError("The equilibration method needs constraints matrices")
+        else:
+            stacked = sparse.vstack(matrices) if any(sparse.issparse(m) for m in matrices) else np.vstack(matrices)
+            scale = ruiz_column_scale(stacked, self.iterations)
+        self.variable_scale = scale
+        self.eq_row_scale = _row_scale(eq_constraints_mat, scale)
+        self.ineq_row_scale = _row_scale(ineq_constraints_mat, scale)
+        return self
+
+    def minimize(self, minimizer, f=None, x0=None, hessp=None, **kwargs):
+        """
+        Solves the scaled problem with minimizer, and maps the results back.
+
+        The tolerances on the steps, param_tol and the step sizes, apply to the scaled
+        variables. The scales are fitted at x0 when fit was not called.
+
+        Parameters:
+        -----------
+        minimizer: object
+            A LineSearchMinimization, TrustRegionMinimization or InteriorPointMinimizer.
+        f: function
+            The objective, the func argument of interior_pt.
+        x0: np.ndarray
+            The starting point.
+        hessp: function, optional
+            The Hessian-vector product of the unconstrained minimizers.
+        kwargs: dict
+            The other arguments of the solve method.
+
+        Returns:
+        --------
+        The results of the solve method, with the final location in the original variables.
+        """
+        constrained = hasattr(minimizer, "interior_pt")
+        if constrained:
+            f = kwargs.pop("func")
+        x0 = np.asarray(x0, dtype=float)
+        if self.variable_scale is None:
+            self.fit(f, x0, kwargs.get("eq_constraints_mat"), kwargs.get("ineq_constraints_mat"))
+        scale = self.variable_scale
+        recorders = ["inner_recorder", "outer_recorder"] if constrained else ["recorder"]
+        for name in recorders:
+            setattr(minimizer, name, UnscalingRecorder(getattr(minimizer, name), scale))
+        try:
+            if constrained:
+                z, f_z, success = minimizer.interior_pt(
+                    func=ScaledObjective(f, scale), x0=x0 / scale, **self._scale_constraints(kwargs)
+                )
+            else:
+                if hessp is not None:
+                    kwargs["hessp"] = lambda z, v: scale * hessp(scale * z, scale * v)
+                z, f_z, success = minimizer.unconstrained_minimization(
+                    f=ScaledObjective(f, scale), x0=x0 / scale, **kwargs
+                )
+        finally:
+            for name in recorders:
+                setattr(minimizer, name, getattr(minimizer, name).recorder)
+        if constrained:
+            # the multipliers of the scaled rows, r_i * c_i(x) <= 0, are lambda_i / r_i
+            row_scale = np.concatenate([np.ones(len(kwargs.get("ineq_constraints", []))), self.ineq_row_scale])
+            minimizer.lambda_ = minimizer.lambda_ * row_scale
+            if minimizer.nu is not None and self.eq_row_scale.shape[0]:
+                minimizer.nu = minimizer.nu * self.eq_row_scale
+        return scale * z, f_z, success
+
+    def _scale_constraints(self, kwargs):
+        scale = self.variable_scale
+        scaled = dict(kwargs)
+        scaled["ineq_constraints"] = np.array([ScaledObjective(func, scale) for func in kwargs["ineq_constraints"]])
+        if _rows(kwargs["eq_constraints_mat"]):
+            scaled["eq_constraints_mat"] = _scale_matrix(kwargs["eq_constraints_mat"], self.eq_row_scale, scale)
+            scaled["eq_constraints_rhs"] = self.eq_row_scale * np.ravel(kwargs["eq_constraints_rhs"])
+        if kwargs.get("ineq_constraints_mat") is not None:
+            scaled["ineq_constraints_mat"] = _scale_matrix(kwargs["ineq_constraints_mat"], self.ineq_row_scale, scale)
+            scaled["ineq_constraints_rhs"] = self.ineq_row_scale * kwargs["ineq_constraints_rhs"]
+        return scaled
+
+
+class ScaledObjective:
+    """
+    The objective z -> f(d * z) with the f(x, hessian_flag) protocol, for points or batches.
+    """
+
+    def __init__(self, f, scale):
+        self.f = f
+        self.scale = scale
+
+    def __call__(self, z, hessian_flag):
+        f_x, g_x, h_x = self.f(self.scale * z, hessian_flag)
+        g_z = None if g_x is None else self.scale * g_x
+        h_z = None
+        if hessian_flag and sparse.issparse(h_x):
+            d = sparse.diags(self.scale)
+            h_z = (d @ h_x @ d).tocsr()
+        elif hessian_flag and h_x is not None:
+            h_z = self.scale[:, None] * h_x * self.scale
+        return f_x, g_z, h_z
+
+
+class UnscalingRecorder:
+    """
+    Proxy of a PathRecorder that records the iterates in the original variables, d * z.
+    """
+
+    def __init__(self, recorder, scale):
+        self.recorder = recorder
+        self.scale = scale
+
+    def append(self, x, f):
+        self.recorder.append(self.scale * np.asarray(x), f)
+
+    def __len__(self):
+        return len(self.recorder)
+
+    def __getattr__(self, name):
+        return getattr(self.recorder, name)
+
+
+def hessian_diagonal(f, x, eps=None):
+    """
+    Returns the diagonal of the Hessian of f at x, from f itself when it returns a Hessian,
+    else by forward differences of the gradient along the coordinates.
+    """
+    f_x, g_x, h_x = f(x, True)
+    if h_x is not None:
+        return np.asarray(h_x.diagonal() if sparse.issparse(h_x) else np.diag(h_x), dtype=float)
+    eps = eps or np.sqrt(np.finfo(float).eps) * (1 + np.abs(x))
+    diagonal = np.empty(x.shape[0])
+    for i in range(x.shape[0]):
+        x_i = x.copy()
+        x_i[i] += eps[i]
+        diagonal[i] = (f(x_i, False)[1][i] - g_x[i]) / eps[i]
+    return diagonal
+
+
+def ruiz_column_scale(mat, iterations=10):
+    """
+    Ruiz equilibration, alternately divides the rows and the columns of mat by the square
+    roots of their largest entries, and returns the accumulated column scales. The rows and
+    columns of the scaled matrix have their largest entries close to 1.
+    """
+    column_scale = np.ones(mat.shape[1])
+    row_scale = np.ones(mat.shape[0])
+    for _ in range(iterations):
+        scaled = _scale_matrix(mat, row_scale, column_scale)
+        row_norms = _max_abs(scaled, axis=1)
+        column_norms = _max_abs(scaled, axis=0)
+        row_norms[row_norms == 0] = 1
+        column_norms[column_norms == 0] = 1
+        row_scale /= np.sqrt(row_norms)
+        column_scale /= np.sqrt(column_norms)
+    return column_scale
+
+
+def _row_scale(mat, column_scale):
+    if not _rows(mat):
+        return np.ones(0)
+    norms = _max_abs(_scale_matrix(mat, np.ones(mat.shape[0]), column_scale), axis=1)
+    norms[norms == 0] = 1
+    return 1 / norms
+
+
+def _scale_matrix(mat, row_scale, column_scale):
+    if sparse.issparse(mat):
+        return (sparse.diags(row_scale) @ mat @ sparse.diags(column_scale)).tocsr()
+    return row_scale[:, None] * np.asarray(mat, dtype=float) * column_scale
+
+
+def _max_abs(mat, axis):
+    if sparse.issparse(mat):
+        return abs(mat).max(axis=axis).toarray().ravel()
+    return np.abs(mat).max(axis=axis)
+
+
+def _rows(mat):
+    if mat is None:
+        return 0
+    if sparse.issparse(mat):
+        return mat.shape[0]
+    return mat.shape[0] if np.size(mat) else 0
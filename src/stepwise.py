@@ -0,0 +1,267 @@
+import asyncio
+import queue
+import threading
+import time
+
+import numpy as np
+
+from src.portfolio import PortfolioRunner
+
+
+class SteppedSolve:
+    """
+    Step-wise interface to a solve, an iterator over the states of its iterations
+
+    The solve method of the minimizer runs on a worker thread, which is suspended in the
+    callback of every iteration until the next state is asked for, so the solve advances
+    by one iteration per next() (or per await of __anext__ in an event loop) and the
+    caller decides when to go on. The states are the callback dicts of the solve method.
+
+    The solve stops, unsuccessfully, when a budget is exhausted or when it is cancelled.
+    The budgets are checked at the end of every iteration, so a solve can overrun its
+    budgets by one iteration, and by the final work of the solve method. The objective
+    evaluations are counted on the objective argument, f or func, not on the constraints.
+
+    A solve that is left before its end has to be closed, with close() or by iterating it
+    in a with block. Until then its worker thread waits for the next step, and as the
+    thread holds the SteppedSolve, dropping the last reference to it neither collects it
+    nor stops the thread.
+
+    Attributes:
+    minimizer (object): a minimizer with a PortfolioRunner.SOLVE_METHODS entry
+    solve_method (str): the name of the solve method of the minimizer
+    kwargs (dict): the arguments of the solve method, a callback among them is called first
+    max_time (float): the budget of wall-clock seconds since the first step, no limit by default
+    max_evaluations (int): the budget of objective evaluations, no limit by default
+    clock (function): the clock of the time budget, in seconds
+    iterations (int): the number of iterations run
+    evaluations (int): the number of objective evaluations
+    stop_reason (str): why the solve stopped, None while it runs
+        - "success" or "failure": the solve method returned on its own.
+        - "max_time" or "max_evaluations": a budget was exhausted.
+        - "cancelled": cancel was called.
+        - "callback": the callback of kwargs returned True.
+    result (tuple): the final location, objective value and success flag, None while the
+        solve runs. The location is the iterate of lowest objective value of the
+        unconstrained solves, and the final iterate of interior_pt, whose iterates are
+        compared on the barrier objective.
+    """
+
+    def __init__(self, minimizer, max_time=None, max_evaluations=None, clock=time.perf_counter, **kwargs):
+        self.minimizer = minimizer
+        self.solve_method = PortfolioRunner.SOLVE_METHODS[type(minimizer).__name__]
+        self.kwargs = kwargs
+        self.max_time = max_time
+        self.max_evaluations = max_evaluations
+        self.clock = clock
+        self.iterations = 0
+        self.evaluations = 0
+        self.stop_reason = None
+        self.result = None
+        self._reason = None
+        self._best = None
+        self._start = None
+        self._thread = None
+        self._running = False
+        self._cancelled = threading.Event()
+        self._resume = threading.Semaphore(0)
+        self._items = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiter = None
+
+    @property
+    def done(self):
+        return self.stop_reason is not None
+
+    def cancel(self):
+        """
+        Asks the solve to stop at the end of its current iteration, from any thread.
+        """
+        self._cancelled.set()
+
+    def close(self):
+        """
+        Cancels the solve and runs it to its end, so the worker thread exits. Needed for
+        every solve that is not iterated to its end.
+        """
+        self.cancel()
+        if self._thread is None:
+            self.stop_reason = "cancelled"
+        for _ in self:
+            pass
+
+    async def aclose(self):
+        """
+        Cancels the solve and runs it to its end without blocking the event loop.
+        """
+        self.cancel()
+        if self._thread is None:
+            self.stop_reason = "cancelled"
+        async for _ in self:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.done:
+            raise StopIteration
+        self._advance()
+        return self._consume(self._items.get(), StopIteration)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done:
+            raise StopAsyncIteration
+        self._advance()
+        with self._lock:
+            if self._items.empty():
+                loop = asyncio.get_running_loop()
+                self._waiter = (loop, loop.create_future())
+        if self._waiter is not None:
+            try:
+                await self._waiter[1]
+            finally:
+                self._waiter = None
+        return self._consume(self._items.get_nowait(), StopAsyncIteration)
+
+    def _advance(self):
+        """
+        Starts the worker thread, or resumes it when it waits for the next step.
+        """
+        if self._running:
+            # the step was interrupted before its state was consumed, e.g. by a cancelled task
+            return
+        self._running = True
+        if self._thread is None:
+            self._start = self.clock()
+            self._thread = threading.Thread(target=self._solve, daemon=True)
+            self._thread.start()
+        else:
+            self._resume.release()
+
+    def _consume(self, item, stop):
+        self._running = False
+        kind, value = item
+        if kind == "state":
+            return value
+        self._thread.join()
+        if kind == "error":
+            self.stop_reason = "failure"
+            raise value
+        x, f_x, success = value
+        self.stop_reason = self._reason or ("success" if success else "failure")
+        self.result = value
+        raise stop
+
+    def _post(self, item):
+        with self._lock:
+            self._items.put(item)
+            waiter = self._waiter
+        if waiter is not None:
+            loop, future = waiter
+            loop.call_soon_threadsafe(_wake, future)
+
+    def _solve(self):
+        """
+        The body of the worker thread.
+        """
+        objective = "func" if self.solve_method == "interior_pt" else "f"
+        kwargs = dict(self.kwargs)
+        kwargs[objective] = _CountedObjective(kwargs[objective], self)
+        kwargs["callback"] = self._callback
+        try:
+            x, f_x, success = getattr(self.minimizer, self.solve_method)(**kwargs)
+        except Exception as error:
+            self._post(("error", error))
+            return
+        if self._best is not None and self.solve_method != "interior_pt" and self._best[1] < f_x:
+            x, f_x = self._best
+        self._post(("result", (x, f_x, success)))
+
+    def _callback(self, state):
+        self.iterations += 1
+        if self._best is None or state["f"] < self._best[1]:
+            self._best = (np.array(state["x"]), state["f"])
+        callback = self.kwargs.get("callback")
+        if callback is not None and callback(state):
+            self._reason = "callback"
+            return True
+        reason = self._exhausted()
+        if reason is None:
+            self._post(("state", state))
+            self._resume.acquire()
+            reason = self._exhausted()
+        self._reason = reason
+        return reason is not None
+
+    def _exhausted(self):
+        """
+        The stop reason of a cancelled solve or an exhausted budget, None otherwise.
+        """
+        if self._cancelled.is_set():
+            return "cancelled"
+        if self.max_time is not None and self.clock() - self._start >= self.max_time:
+            return "max_time"
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            return "max_evaluations"
+        return None
+
+
+class _CountedObjective:
+    """
+    Objective wrapper counting the evaluations of a SteppedSolve.
+    """
+
+    def __init__(self, f, solve):
+        self.f = f
+        self.solve = solve
+
+    def __call__(self, *args, **kwargs):
+        self.solve.evaluations += 1
+        return self.f(*args, **kwargs)
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+async def solve_async(minimizer, max_time=None, max_evaluations=None, **kwargs):
+    """
+    Runs a SteppedSolve in the running event loop, which gets control back after every
+    iteration, so many solves gathered in one loop advance in turns. When the task is
+    cancelled, the solve is stopped at the end of its current iteration.
+
+    Parameters:
+    -----------
+    minimizer: object
+        A minimizer with a PortfolioRunner.SOLVE_METHODS entry.
+    max_time: float, optional
+        The budget of wall-clock seconds.
+    max_evaluations: int, optional
+        The budget of objective evaluations.
+    kwargs: dict
+        The arguments of the solve method.
+
+    Returns:
+    --------
+    The final location, objective value and success flag, as SteppedSolve.result.
+    """
+    solve = SteppedSolve(minimizer, max_time=max_time, max_evaluations=max_evaluations, **kwargs)
+    try:
+        async for _ in solve:
+            pass
+    except asyncio.CancelledError:
+        await solve.aclose()
+        raise
+    return solve.result
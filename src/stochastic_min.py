@@ -0,0 +1,157 @@
+import numpy as np
+
+from src.profiler import NULL_PROFILER
+from src.recorder import PathRecorder
+
+
+class StochasticMinimization:
+    """
+    Class for minimizing finite sums f(x) = 1/m * sum_i f_i(x) with mini-batch gradients
+
+    The objective follows the mini-batch protocol f(x, indices) -> (f, g): the mean value and
+    the mean gradient of the terms f_i for the sample indices of the batch. Every epoch
+    shuffles the m samples and takes one step per mini-batch of batch_size samples, so an
+    iteration costs batch_size / m of a full gradient.
+
+    With variance_reduction, every epoch starts with a full gradient mu at a snapshot x~,
+    and the steps use the SVRG estimate g_B(x) - g_B(x~) + mu, whose variance vanishes at
+    the minimum, so a constant learning rate converges (Johnson & Zhang, 2013).
+
+    Attributes:
+    method (str): the update, "sgd" (with momentum) or "adam"
+    learning_rate (float): the step size, LEARNING_RATES[method] by default
+    batch_size (int): the number of samples of every mini-batch
+    momentum (float): the heavy-ball momentum of "sgd", 0 for plain SGD
+    betas (tuple): the decay rates of the first and second moment estimates of "adam"
+    variance_reduction (bool): whether to use the SVRG gradient estimate
+    recorder (PathRecorder): recorder of the iterates at the end of every epoch, x_path and
+        f_path, with the mean mini-batch objective of the epoch
+    profiler (Profiler): timers of the "objective", "full_gradient" and "update" phases,
+        disabled by default
+    sample_gradients (int): the number of per-sample gradients computed in the last solve
+    """
+
+    METHODS = ["sgd", "adam"]
+    LEARNING_RATES = {"sgd": 0.01, "adam": 0.001}
+    ADAM_EPSILON = 1e-8
+
+    def __init__(
+        self,
+        method,
+        learning_rate=None,
+        batch_size=32,
+        momentum=0.9,
+        betas=(0.9, 0.999),
+        variance_reduction=False,
+        seed=None,
+        recorder=None,
+        profiler=None,
+    ):
+        if method not in self.METHODS:
+            raise ValueError(f"Invalid stochastic method: {method}")
+        self.method = method
+        self.learning_rate = self.LEARNING_RATES[method] if learning_rate is None else learning_rate
+        self.batch_size = batch_size
+        self.momentum = momentum
+        self.betas = betas
+        self.variance_reduction = variance_reduction
+        self.rng = np.random.default_rng(seed)
+        self.success = False
+        self.recorder = recorder if recorder is not None else PathRecorder()
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        self.sample_gradients = 0
+
+    def stochastic_minimization(self, f, x0, n_samples, obj_tol, max_epochs, callback=None):
+        """
+        This function implements mini-batch stochastic gradient descent.
+
+        Parameters:
+        -----------
+        f: function
+            The finite sum to be minimized, f(x, indices) -> (mean value, mean gradient).
+        x0: np.ndarray
+            The starting point.
+        n_samples: int
+            The number m of terms of the sum.
+        obj_tol: float
+            The numeric tolerance for successful termination in terms of small enough change in
+            the mean mini-batch objective value between two consecutive epochs.
+        max_epochs: int
+            The maximum allowed number of passes over the samples.
+        callback: function, optional
+            Called after every epoch with the epoch state, a dict with the keys "epoch", "x",
+            "f" (the mean mini-batch objective of the epoch) and "steps". The solve stops,
+            unsuccessfully, when it returns True.
+
+        Returns:
+        --------
+        final_location: np.ndarray
+            The final location.
+        final_objective_value: float
+            The mean mini-batch objective value of the last epoch.
+        success: bool
+            A success/failure boolean flag.
+        """
+        self.success = False
+        self.recorder.reset()
+        self.sample_gradients = 0
+        profiler = self.profiler
+        objective = profiler.wrap("objective", f)
+        x = np.array(x0, dtype=float)
+        velocity = np.zeros_like(x)
+        second_moment = np.zeros_like(x)
+        beta_1, beta_2 = self.betas
+        all_samples = np.arange(n_samples)
+        f_prev = np.inf
+        f_epoch = np.inf
+        steps = 0
+
+        for epoch in range(max_epochs):
+            if self.variance_reduction:
+                with profiler.phase("full_gradient"):
+                    snapshot = x.copy()
+                    full_gradient = objective(snapshot, all_samples)[1]
+                self.sample_gradients += n_samples
+            order = self.rng.permutation(n_samples)
+            f_sum = 0.0
+            for start in range(0, n_samples, self.batch_size):
+                batch = order[start:start + self.batch_size]
+                f_batch, g = objective(x, batch)
+                self.sample_gradients += batch.shape[0]
+                if self.variance_reduction:
+                    g = g - objective(snapshot, batch)[1] + full_gradient
+                    self.sample_gradients += batch.shape[0]
+                f_sum += f_batch * batch.shape[0]
+                steps += 1
+
+                with profiler.phase("update"):
+                    if self.method == "adam":
+                        # bias corrected moment estimates (Kingma & Ba, 2015)
+                        velocity = beta_1 * velocity + (1 - beta_1) * g
+                        second_moment = beta_2 * second_moment + (1 - beta_2) * g ** 2
+                        velocity_hat = velocity / (1 - beta_1 ** steps)
+                        second_moment_hat = second_moment / (1 - beta_2 ** steps)
+                        x = x - self.learning_rate * velocity_hat / (np.sqrt(second_moment_hat) + self.ADAM_EPSILON)
+                    else:
+                        velocity = self.momentum * velocity - self.learning_rate * g
+                        x = x + velocity
+
+            f_epoch = f_sum / n_samples
+            self.recorder.append(x, f_epoch)
+            if callback is not None and callback({"epoch": epoch, "x": x, "f": f_epoch, "steps": steps}):
+                break
+            if np.abs(f_prev - f_epoch) < obj_tol:
+                self.success = True
+                break
+            f_prev = f_epoch
+
+        self.recorder.close()
+        return x, f_epoch, self.success
+
+    @property
+    def x_path(self):
+        return self.recorder.x
+
+    @property
+    def f_path(self):
+        return self.recorder.f
@@ -0,0 +1,253 @@
+import numpy as np
+
+from src.evaluation import CachedObjective
+from src.profiler import NULL_PROFILER
+from src.recorder import PathRecorder
+from src.unconstrained_min import finite_difference_hessp
+
+
+class TrustRegionMinimization:
+    """
+    Class for unconstrained minimization using a trust-region Newton method
+
+    Every iteration minimizes the quadratic model m(p) = f + g.T p + 1/2 p.T H p inside the
+    ball |p| <= radius with Steihaug's truncated conjugate gradient, which only needs
+    Hessian-vector products, and stops on the boundary of the ball or along a direction of
+    negative curvature. The step is accepted when the ratio rho of the actual to the
+    predicted reduction is above ETA, and the radius shrinks when rho is small and grows
+    when the model is good and the step reached the boundary (Nocedal & Wright,
+    Algorithms 4.1 and 7.2).
+
+    Unlike a line search on a Newton direction, the steps stay bounded on nonconvex and
+    unbounded problems, and a rejected step costs a single objective evaluation.
+
+    Attributes:
+    recorder (PathRecorder): recorder of the accepted iterates, x_path and f_path
+    profiler (Profiler): timers of the "objective" and "subproblem" phases, disabled by default
+    radius (float): the trust-region radius at the end of the last solve
+    evaluation_counts (dict): the number of function, gradient and Hessian evaluations of the last solve
+    hessian_vector_products (int): the number of Hessian-vector products of the last solve
+    linear_solves (int): the number of subproblems solved in the last solve
+    rejected_steps (int): the number of rejected steps of the last solve
+    """
+
+    ETA = 0.1
+    SHRINK_BELOW = 0.25
+    EXPAND_ABOVE = 0.75
+    SHRINK = 0.25
+    EXPAND = 2
+
+    def __init__(self, recorder=None, profiler=None):
+        self.success = False
+        self.recorder = recorder if recorder is not None else PathRecorder()
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        self.radius = None
+        self.evaluation_counts = {}
+        self.hessian_vector_products = 0
+        self.linear_solves = 0
+        self.rejected_steps = 0
+
+    def unconstrained_minimization(self,
+                                   f,
+                                   x0,
+                                   obj_tol,
+                                   param_tol,
+                                   max_iter,
+                                   radius=1.0,
+                                   max_radius=1e3,
+                                   cache_size=8,
+                                   hessp=None,
+                                   callback=None,
+                                   ):
+        """
+        This function implements the trust-region Newton method with Steihaug-CG steps.
+
+        The termination conditions are those of LineSearchMinimization, checked on the
+        accepted steps, with the decrease predicted by the model in place of the Newton
+        decrement, and a gradient of norm below obj_tol.
+
+        Parameters:
+        -----------
+        f: function
+            The function to be minimized.
+        x0: np.ndarray
+            The starting point.
+        obj_tol: float
+            The numeric tolerance for successful termination in terms of small enough change in
+            objective function values, between two consecutive iterations.
+        param_tol: float
+            The numeric tolerance for successful termination in terms of small enough distance
+            between two consecutive iterations locations.
+        max_iter: int
+            The maximum allowed number of iterations, accepted and rejected steps included.
+        radius: float, optional
+            The initial trust-region radius.
+        max_radius: float, optional
+            The largest trust-region radius, the longest step of the method.
+        cache_size: int, optional
+            The number of recent evaluations kept in the cache.
+        hessp: function, optional
+            Hessian-vector product hessp(x, v). When not given, the products are approximated
+            by finite differences of the gradient.
+        callback: function, optional
+            Called after every iteration with the iteration state, a dict with the keys
+            "iteration", "x", "f", "grad", "step", "radius", "rho" and "accepted". The solve
+            stops, unsuccessfully, when it returns True.
+
+        Returns:
+        --------
+        final_location: np.ndarray
+            The final location.
+        final_objective_value: float
+            The final objective value.
+        success: bool
+            A success/failure boolean flag.
+        """
+        self.success = False
+        self.recorder.reset()
+        profiler = self.profiler
+        f = CachedObjective(profiler.wrap("objective", f), max_size=cache_size)
+        self.evaluation_counts = f.counts
+        self.hessian_vector_products = 0
+        self.linear_solves = 0
+        self.rejected_steps = 0
+        x = np.asarray(x0, dtype=float)
+        f_x, grad, _ = f(x, False)
+        self.recorder.append(x, f_x)
+
+        def product(v):
+            self.hessian_vector_products += 1
+            if hessp is None:
+                return finite_difference_hessp(f, x, grad, v)
+            return hessp(x, v)
+
+        for i in range(max_iter):
+            if np.linalg.norm(grad) < obj_tol:
+                self.success = True
+                break
+
+            with profiler.phase("subproblem"):
+                p, hp, on_boundary = steihaug_cg(product, grad, radius)
+            self.linear_solves += 1
+            predicted = -(grad @ p + 0.5 * p @ hp)
+            if 0 <= predicted < obj_tol:
+                # the model decrease, the trust-region counterpart of the Newton decrement
+                self.success = True
+                break
+            x_next = x + p
+            f_next, grad_next, _ = f(x_next, False)
+            rho = (f_x - f_next) / predicted if predicted > 0 else -np.inf
+
+            if rho < self.SHRINK_BELOW:
+                radius = self.SHRINK * radius
+            elif rho > self.EXPAND_ABOVE and on_boundary:
+                radius = min(self.EXPAND * radius, max_radius)
+            accepted = rho > self.ETA
+
+            if callback is not None and callback({
+                "iteration": i,
+                "x": x,
+                "f": f_x,
+                "grad": grad,
+                "step": p,
+                "radius": radius,
+                "rho": rho,
+                "accepted": accepted,
+            }):
+                break
+
+            if not accepted:
+                self.rejected_steps += 1
+                if radius < np.finfo(float).eps * (1 + np.linalg.norm(x)):
+                    # the model does not predict the function even on the smallest steps
+                    break
+                continue
+
+            converged = np.sum(np.abs(p)) < param_tol or np.abs(f_next - f_x) < obj_tol
+            x, f_x, grad = x_next, f_next, grad_next
+            self.recorder.append(x, f_x)
+            if converged:
+                self.success = True
+                break
+
+        self.radius = radius
+        self.recorder.close()
+        return x, f_x, self.success
+
+    @property
+    def x_path(self):
+        return self.recorder.x
+
+    @property
+    def f_path(self):
+        return self.recorder.f
+
+
+def steihaug_cg(hessp, grad, radius, max_iter=None):
+    """
+    Steihaug's truncated conjugate gradient on the trust-region subproblem
+
+        min g.T p + 1/2 p.T H p   subject to   |p| <= radius
+
+    using only Hessian-vector products (Nocedal & Wright, Algorithm 7.2). The iterations stop
+    at the forcing tolerance min(0.5, sqrt(|grad|)) * |grad| of newton_cg_direction, or on
+    the boundary of the trust region, which is followed from the current iterate when a
+    direction of non-positive curvature is met or a step leaves the region.
+
+    Parameters:
+    -----------
+    hessp: function
+        The Hessian-vector product v -> hess @ v.
+    grad: np.ndarray
+        The gradient at the current location.
+    radius: float
+        The trust-region radius.
+    max_iter: int, optional
+        The maximum number of conjugate gradient iterations, the dimension by default.
+
+    Returns:
+    --------
+    p: np.ndarray
+        The step.
+    hp: np.ndarray
+        The Hessian-vector product hess @ p, for the predicted reduction of the model.
+    on_boundary: bool
+        Whether the step is on the boundary of the trust region.
+    """
+    grad = np.asarray(grad, dtype=float)
+    grad_norm = np.linalg.norm(grad)
+    tol = min(0.5, np.sqrt(grad_norm)) * grad_norm
+    z = np.zeros(grad.shape[0])
+    hz = np.zeros(grad.shape[0])
+    r = grad
+    d = -r
+    rr = r @ r
+    for _ in range(max_iter or grad.shape[0]):
+        hd = hessp(d)
+        curvature = d @ hd
+        if curvature <= 0:
+            tau = _to_boundary(z, d, radius)
+            return z + tau * d, hz + tau * hd, True
+        step = rr / curvature
+        z_next = z + step * d
+        if np.linalg.norm(z_next) >= radius:
+            tau = _to_boundary(z, d, radius)
+            return z + tau * d, hz + tau * hd, True
+        z = z_next
+        hz = hz + step * hd
+        r = r + step * hd
+        rr_next = r @ r
+        if np.sqrt(rr_next) < tol:
+            break
+        d = -r + rr_next / rr * d
+        rr = rr_next
+    return z, hz, False
+
+
+def _to_boundary(z, d, radius):
+    """
+    Returns the tau >= 0 such that |z + tau * d| = radius, for |z| <= radius.
+    """
+    dd = d @ d
+    zd = z @ d
+    return (-zd + np.sqrt(zd ** 2 + dd * (radius ** 2 - z @ z))) / dd
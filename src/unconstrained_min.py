@@ -1,22 +1,62 @@
+from collections import deque
+
 import numpy as np
+from scipy.linalg import cho_factor, cho_solve, LinAlgError
+
+from src.evaluation import CachedObjective
+from src.profiler import NULL_PROFILER
+from src.recorder import PathRecorder
 
 
 class LineSearchMinimization:
     """
     Class for unconstrained minimization using line search methods
 
+    The first-order methods are "gradient_descent", "nesterov", Nesterov's accelerated gradient
+    with the gradient restart of O'Donoghue & Candes, and "barzilai_borwein", spectral step
+    sizes with the nonmonotone line search of Grippo, Lampariello & Lucidi, which always
+    replaces line_search. Neither needs a Hessian, and both take far fewer iterations than
+    gradient descent on ill-conditioned problems.
+
     Attributes:
     method (str): method to use for minimization
+    history_size (int): number of curvature pairs kept by the "lbfgs" method, and of objective
+        values of the nonmonotone line search of "barzilai_borwein"
+    line_search (str): line search to use, "backtracking" or "strong_wolfe"
+    recorder (PathRecorder): recorder of the iterates, x_path and f_path
+    profiler (Profiler): timers of the "objective", "direction", "line_search" and
+        "curvature_update" phases, disabled by default
     """
 
-    HESSIAN_METHODS = ["newton"]
+    HESSIAN_METHODS = ["newton", "newton_cholesky"]
+    QUASI_NEWTON_METHODS = ["bfgs", "lbfgs"]
+    # methods whose line search starts from the initial step on every iteration
+    UNIT_STEP_METHODS = QUASI_NEWTON_METHODS + ["newton_cholesky", "newton_cg"]
+    LINE_SEARCHES = ["backtracking", "strong_wolfe"]
+    # the safeguards of the Barzilai-Borwein step sizes
+    MIN_SPECTRAL_STEP = 1e-10
+    MAX_SPECTRAL_STEP = 1e10
+    # the sufficient decrease parameter of "nesterov", f(y - alpha * grad) <= f(y) - alpha / 2 * |grad| ** 2
+    # holds for the steps alpha <= 1 / L that the acceleration needs
+    NESTEROV_C = 0.5
 
-    def __init__(self, method):
+    def __init__(self, method, history_size=10, line_search="backtracking", recorder=None, profiler=None):
+        if line_search not in self.LINE_SEARCHES:
+            raise ValueError(f"Invalid line search: {line_search}")
         self.method = method
+        self.history_size = history_size
+        self.line_search = line_search
         self.hessian_flag = method in self.HESSIAN_METHODS
         self.success = False
-        self.x_path = []
-        self.f_path = []
+        self.recorder = recorder if recorder is not None else PathRecorder()
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+        self.evaluation_counts = {}
+        self.line_search_evaluations = []
+        self.linear_solves = 0
+        self._inverse_hessian = None
+        self._curvature_pairs = deque(maxlen=history_size)
+        self._f_history = deque(maxlen=history_size)
+        self._momentum = 1.0
 
     def unconstrained_minimization(self,
                                    f,
@@ -28,10 +68,21 @@ class LineSearchMinimization:
                                    c1=0.01,
                                    c2=0.5,
                                    wolfe_tol=1e-6,
+                                   cache_size=8,
+                                   curvature=0.9,
+                                   hessp=None,
+                                   callback=None,
+                                   checkpoint=None,
                                    ):
         """
         This function implements the unconstrained minimization algorithm with Wolfe conditions.
 
+        The objective is evaluated through a CachedObjective, so the iterate, the line search
+        trials and the termination test share their evaluations. The number of function,
+        gradient and Hessian evaluations of the solve is kept in evaluation_counts, and the
+        number of trial evaluations of every line search in line_search_evaluations. The
+        number of Newton systems solved for the directions is kept in linear_solves.
+
         Parameters:
         -----------
         f: function
@@ -56,6 +107,20 @@ class LineSearchMinimization:
             The parameter for reducing the step size.
         wolfe_tol: float, optional
             The tolerance for the step size.
+        cache_size: int, optional
+            The number of recent evaluations kept in the cache, 0 evaluates every request.
+        curvature: float value between (c1, 1), optional
+            The parameter for the curvature condition of the "strong_wolfe" line search.
+        hessp: function, optional
+            Hessian-vector product hessp(x, v) used by the "newton_cg" method. When not given,
+            the products are approximated by finite differences of the gradient.
+        callback: function, optional
+            Called after the line search of every iteration with the iteration state, a dict
+            with the keys "iteration", "x", "f", "grad", "direction" and "alpha". The solve
+            stops, unsuccessfully, when it returns True.
+        checkpoint: Checkpoint, optional
+            Saves the state of the solve every checkpoint.every iterations, and resumes from
+            it when its file exists. The file is deleted when the solve returns.
 
         Returns:
         --------
@@ -66,23 +131,72 @@ class LineSearchMinimization:
         success: bool
             A success/failure boolean flag.
         """
+        self.success = False
+        self.recorder.reset()
+        profiler = self.profiler
+        f = CachedObjective(profiler.wrap("objective", f), max_size=cache_size)
+        self.evaluation_counts = f.counts
         x = x0
         f_x = None
+        x_prev = None
+        grad_prev = None
+        step_size = alpha
+        self.line_search_evaluations = []
+        self.linear_solves = 0
+        self._inverse_hessian = None
+        self._curvature_pairs.clear()
+        self._f_history.clear()
+        self._momentum = 1.0
+        # the previous iterate of "nesterov", x is the extrapolated point
+        x_main = x0
         iter_count = 0
-        for _ in range(max_iter):
+        state = checkpoint.load(self, {"recorder": self.recorder}) if checkpoint is not None else None
+        if state is not None:
+            x, x_prev, grad_prev, x_main, alpha, iter_count = self._restore(state, f, x0)
+        for _ in range(iter_count, max_iter):
             f_x, grad, hess = f(x, hessian_flag=self.hessian_flag)
-            self.x_path.append(x)
-            self.f_path.append(f_x)
+            self.recorder.append(x, f_x)
+
+            if self.method in self.QUASI_NEWTON_METHODS and x_prev is not None:
+                with profiler.phase("curvature_update"):
+                    self._update_curvature(x - x_prev, grad - grad_prev)
 
             # Find the descent direction
-            if self.method == "newton":
-                # using pseudo-inverse to avoid singular matrix
-                hess_pinv = np.linalg.pinv(hess)
-                p = -hess_pinv @ grad
-            else:
-                p = -grad
-            # find the alpha
-            alpha = wolfe_conditions(f=f, x=x, p=p, alpha=alpha, c=c1, t=c2, tol=wolfe_tol)
+            with profiler.phase("direction"):
+                p = self._direction(f, x, grad, hess, hessp)
+            # find the alpha, quasi-Newton and Newton-type methods and the strong Wolfe line search
+            # try the initial step first on every iteration
+            if self.method in self.UNIT_STEP_METHODS or self.line_search == "strong_wolfe":
+                alpha = step_size
+            # the Barzilai-Borwein method starts from the spectral step size
+            if self.method == "barzilai_borwein":
+                self._f_history.append(f_x)
+                alpha = step_size if x_prev is None else spectral_step(
+                    x - x_prev, grad - grad_prev, alpha, self.MIN_SPECTRAL_STEP, self.MAX_SPECTRAL_STEP
+                )
+            with profiler.phase("line_search"):
+                if self.method == "barzilai_borwein":
+                    alpha, trials = nonmonotone_line_search(
+                        f=f, x=x, p=p, alpha=alpha, c=c1, t=c2, f_max=max(self._f_history), tol=wolfe_tol
+                    )
+                elif self.line_search == "strong_wolfe":
+                    alpha, trials = strong_wolfe_line_search(f=f, x=x, p=p, alpha=alpha, c1=c1, c2=curvature)
+                else:
+                    c = self.NESTEROV_C if self.method == "nesterov" else c1
+                    alpha, trials = backtracking_line_search(f=f, x=x, p=p, alpha=alpha, c=c, t=c2, tol=wolfe_tol)
+            self.line_search_evaluations.append(trials)
+            if alpha == 0:
+                # the line search failed, a zero step would pass for convergence in the param_tol test
+                break
+            if callback is not None and callback({
+                "iteration": iter_count,
+                "x": x,
+                "f": f_x,
+                "grad": grad,
+                "direction": p,
+                "alpha": alpha,
+            }):
+                break
             # take the step
             x_next = x + alpha * p
 
@@ -93,18 +207,256 @@ class LineSearchMinimization:
                 self.success = True
                 break
 
+            x_prev = x
+            grad_prev = grad
             x = x_next
+            if self.method == "nesterov":
+                x, x_main = self._extrapolate(x_next, x_main, grad), x_next
             iter_count += 1
+            if checkpoint is not None and checkpoint.due(iter_count):
+                checkpoint.save(
+                    self, self._checkpoint_state(iter_count, x, x_prev, grad_prev, x_main, alpha, f.counts),
+                    {"recorder": self.recorder},
+                )
 
+        self.recorder.close()
+        if checkpoint is not None:
+            checkpoint.clear()
         return x, f_x, self.success
 
+    @property
+    def x_path(self):
+        return self.recorder.x
+
+    @property
+    def f_path(self):
+        return self.recorder.f
+
+    def _direction(self, f, x, grad, hess, hessp):
+        """
+        Returns the descent direction of the method at the current iterate.
+        """
+        if self.method in self.HESSIAN_METHODS + ["newton_cg"]:
+            self.linear_solves += 1
+        if self.method == "newton":
+            # using pseudo-inverse to avoid singular matrix
+            hess_pinv = np.linalg.pinv(hess)
+            return -hess_pinv @ grad
+        if self.method == "newton_cholesky":
+            return -cho_solve(modified_cholesky(hess), grad)
+        if self.method == "newton_cg":
+            if hessp is None:
+                return newton_cg_direction(lambda v: finite_difference_hessp(f, x, grad, v), grad)
+            return newton_cg_direction(lambda v: hessp(x, v), grad)
+        if self.method == "bfgs":
+            if self._inverse_hessian is None:
+                return -grad
+            return -self._inverse_hessian @ grad
+        if self.method == "lbfgs":
+            return -lbfgs_two_loop(grad, self._curvature_pairs)
+        return -grad
+
+    def _extrapolate(self, x_next, x_main, grad):
+        """
+        Returns the next extrapolated point of "nesterov", x_next + beta * (x_next - x_main),
+        where x_main is the previous iterate and grad the gradient at the current extrapolated
+        point. The momentum restarts when the step x_next - x_main makes an acute angle with
+        grad, i.e. when the momentum points uphill.
+        """
+        if grad @ (x_next - x_main) > 0:
+            self._momentum = 1.0
+            return x_next
+        momentum = (1 + np.sqrt(1 + 4 * self._momentum ** 2)) / 2
+        beta = (self._momentum - 1) / momentum
+        self._momentum = momentum
+        return x_next + beta * (x_next - x_main)
+
+    def _checkpoint_state(self, iteration, x, x_prev, grad_prev, x_main, alpha, counts):
+        """
+        Returns the state of the solve at the start of the iteration, for a Checkpoint.
+        """
+        state = {
+            "iteration": iteration,
+            "x": x,
+            "x_prev": x_prev,
+            "grad_prev": grad_prev,
+            "x_main": x_main,
+            "alpha": alpha,
+            "inverse_hessian": self._inverse_hessian,
+            "f_history": np.array(self._f_history),
+            "momentum": self._momentum,
+            "line_search_evaluations": np.array(self.line_search_evaluations, dtype=int),
+            "linear_solves": self.linear_solves,
+        }
+        if self._curvature_pairs:
+            s, y, rho = zip(*self._curvature_pairs)
+            state.update(s=np.array(s), y=np.array(y), rho=np.array(rho))
+        state.update({f"counts.{key}": value for key, value in counts.items()})
+        return state
+
+    def _restore(self, state, f, x0):
+        """
+        Restores the state of a Checkpoint, and returns the local state of the loop.
+        """
+        x = state["x"]
+        if x.shape != np.shape(x0):
+            raise ValueError("The checkpoint is for a problem of another dimension")
+        self._inverse_hessian = state.get("inverse_hessian")
+        if "s" in state:
+            self._curvature_pairs.extend(zip(state["s"], state["y"], state["rho"]))
+        self._f_history.extend(state["f_history"])
+        self._momentum = float(state["momentum"])
+        self.line_search_evaluations = state["line_search_evaluations"].tolist()
+        self.linear_solves = int(state["linear_solves"])
+        f.counts.update({key: int(state[f"counts.{key}"]) for key in f.counts})
+        return (
+            x,
+            state.get("x_prev"),
+            state.get("grad_prev"),
+            state["x_main"],
+            float(state["alpha"]),
+            int(state["iteration"]),
+        )
+
+    def _update_curvature(self, s, y):
+        """
+        Updates the quasi-Newton model with the step s = x_k+1 - x_k and the gradient
+        change y = grad_k+1 - grad_k. Pairs that violate the curvature condition y.T @ s > 0
+        are skipped to keep the inverse Hessian approximation positive definite.
+        """
+        sy = s @ y
+        if sy <= 1e-10 * np.linalg.norm(s) * np.linalg.norm(y):
+            return
+        if self.method == "lbfgs":
+            self._curvature_pairs.append((s, y, 1 / sy))
+            return
+        if self._inverse_hessian is None:
+            # scale the initial approximation to the curvature along the first step
+            self._inverse_hessian = np.eye(s.shape[0]) * sy / (y @ y)
+        rho = 1 / sy
+        hy = self._inverse_hessian @ y
+        self._inverse_hessian += (
+            rho * (1 + rho * (y @ hy)) * np.outer(s, s) -
+            rho * (np.outer(hy, s) + np.outer(s, hy))
+        )
+
+
+def modified_cholesky(hess, beta=1e-3):
+    """
+    Cholesky factorization of hess + tau * I, with the smallest tau in the sequence
+    0 (when the diagonal is positive), beta, 2 * beta, ... that makes the matrix positive
+    definite (Nocedal & Wright, Algorithm 3.3). For a positive definite Hessian this is a
+    plain Cholesky factorization.
+
+    Parameters:
+    -----------
+    hess: np.ndarray
+        The Hessian matrix.
+    beta: float, optional
+        The first multiple of the identity added to an indefinite Hessian.
+
+    Returns:
+    --------
+    factorization: tuple
+        The factorization in the format of scipy.linalg.cho_factor.
+    """
+    hess = np.asarray(hess, dtype=float)
+    min_diag = np.min(np.diag(hess))
+    tau = 0 if min_diag > 0 else beta - min_diag
+    identity = np.eye(hess.shape[0])
+    while True:
+        try:
+            return cho_factor(hess + tau * identity)
+        except LinAlgError:
+            tau = max(2 * tau, beta)
+
+
+def newton_cg_direction(hessp, grad, max_iter=None):
+    """
+    Truncated conjugate gradient on the Newton system hess @ p = -grad, using only
+    Hessian-vector products (Nocedal & Wright, Algorithm 7.1). The iterations stop at the
+    forcing tolerance min(0.5, sqrt(|grad|)) * |grad|, or on a direction of non-positive
+    curvature, where the current iterate (or the steepest descent direction on the first
+    iteration) is returned.
+
+    Parameters:
+    -----------
+    hessp: function
+        The Hessian-vector product v -> hess @ v.
+    grad: np.ndarray
+        The gradient at the current location.
+    max_iter: int, optional
+        The maximum number of conjugate gradient iterations, the dimension by default.
+    """
+    grad = np.asarray(grad, dtype=float)
+    grad_norm = np.linalg.norm(grad)
+    tol = min(0.5, np.sqrt(grad_norm)) * grad_norm
+    z = np.zeros(grad.shape[0])
+    r = grad
+    d = -r
+    rr = r @ r
+    for j in range(max_iter or grad.shape[0]):
+        hd = hessp(d)
+        curvature = d @ hd
+        if curvature <= 0:
+            return -grad if j == 0 else z
+        step = rr / curvature
+        z = z + step * d
+        r = r + step * hd
+        rr_next = r @ r
+        if np.sqrt(rr_next) < tol:
+            break
+        d = -r + rr_next / rr * d
+        rr = rr_next
+    return z
+
+
+def finite_difference_hessp(f, x, grad, v):
+    """
+    Forward difference approximation of the Hessian-vector product from one gradient
+    evaluation, (grad(x + eps * v) - grad(x)) / eps.
+    """
+    v_norm = np.linalg.norm(v)
+    if v_norm == 0:
+        return np.zeros_like(grad, dtype=float)
+    eps = np.sqrt(np.finfo(float).eps) * (1 + np.linalg.norm(x)) / v_norm
+    return (f(x + eps * v, False)[1] - grad) / eps
+
+
+def lbfgs_two_loop(grad, curvature_pairs):
+    """
+    L-BFGS two-loop recursion, returns the product of the implicit inverse Hessian
+    approximation with the gradient, in O(m * n) time and memory.
+
+    Parameters:
+    -----------
+    grad: np.ndarray
+        The gradient at the current location.
+    curvature_pairs: sequence of tuples
+        The (s, y, 1 / y.T @ s) curvature pairs, ordered from the oldest to the newest.
+    """
+    q = np.array(grad, dtype=float)
+    if not curvature_pairs:
+        return q
+    alphas = []
+    for s, y, rho in reversed(curvature_pairs):
+        a = rho * (s @ q)
+        q -= a * y
+        alphas.append(a)
+    s, y, _ = curvature_pairs[-1]
+    r = (s @ y) / (y @ y) * q
+    for (s, y, rho), a in zip(curvature_pairs, reversed(alphas)):
+        b = rho * (y @ r)
+        r += (a - b) * s
+    return r
+
 
 def wolfe_conditions(f, x, p, alpha, c, t, tol=1e-6):
     """
-    1. Armijo condition
-        - f(x) - f(x - alpha * grad) > alpha * c * grad.T * p
-    2. Curvature condition
-        - grad^T * (f(x) - f(x - alpha * grad)) > c * grad.T * p
+    Backtracking line search on the Armijo condition
+        - f(x + alpha * p) - f(x) <= alpha * c * grad.T * p
+    The curvature condition is not checked, see strong_wolfe_line_search for a line search
+    that enforces both Wolfe conditions.
 
     Parameters:
     -----------
@@ -124,11 +476,170 @@ def wolfe_conditions(f, x, p, alpha, c, t, tol=1e-6):
         The tolerance for the step size.
 
     """
+    return backtracking_line_search(f=f, x=x, p=p, alpha=alpha, c=c, t=t, tol=tol)[0]
+
+
+def backtracking_line_search(f, x, p, alpha, c, t, tol=1e-6):
+    """
+    The wolfe_conditions backtracking, also returning the number of trial evaluations.
+
+    Returns:
+    --------
+    alpha: float
+        The step size.
+    trials: int
+        The number of objective evaluations at trial points.
+    """
     _alpha = alpha
     f_x, grad, h = f(x, False)
+    trials = 1
     while f(x + _alpha * p, False)[0] - f_x > _alpha * c * grad.T @ p:
         # backtracking
         _alpha *= t
         if _alpha < tol:
             break
-    return _alpha
+        trials += 1
+    return _alpha, trials
+
+
+def nonmonotone_line_search(f, x, p, alpha, c, t, f_max, tol=1e-6):
+    """
+    Backtracking line search on the nonmonotone Armijo condition
+        - f(x + alpha * p) <= f_max + alpha * c * grad.T * p
+    where f_max is the largest of the recent objective values, so the objective may increase
+    for a few iterations (Grippo, Lampariello & Lucidi, 1986).
+
+    Returns:
+    --------
+    alpha: float
+        The step size.
+    trials: int
+        The number of objective evaluations at trial points.
+    """
+    _alpha = alpha
+    grad = f(x, False)[1]
+    trials = 1
+    while f(x + _alpha * p, False)[0] > f_max + _alpha * c * grad @ p:
+        _alpha *= t
+        if _alpha < tol:
+            break
+        trials += 1
+    return _alpha, trials
+
+
+def spectral_step(s, y, alpha, min_step, max_step):
+    """
+    Barzilai-Borwein step size s.T @ s / s.T @ y, from the step s = x_k+1 - x_k and the
+    gradient change y = grad_k+1 - grad_k, clipped to [min_step, max_step]. The last step
+    size alpha is kept when s.T @ y is not positive.
+    """
+    sy = s @ y
+    if sy <= 0:
+        return alpha
+    return min(max((s @ s) / sy, min_step), max_step)
+
+
+def strong_wolfe_line_search(f, x, p, alpha, c1=1e-4, c2=0.9, max_trials=25):
+    """
+    Line search for a step satisfying the strong Wolfe conditions
+    1. Armijo condition
+        - f(x + alpha * p) <= f(x) + alpha * c1 * grad.T * p
+    2. Curvature condition
+        - |grad(x + alpha * p).T * p| <= c2 * |grad.T * p|
+
+    The step is extrapolated until an interval containing acceptable steps is bracketed,
+    and the interval is then zoomed with safeguarded cubic/quadratic interpolation
+    (Nocedal & Wright, Algorithms 3.5 and 3.6).
+
+    Parameters:
+    -----------
+    f: function
+        The function to be minimized.
+    x: float
+        The current location.
+    p: float
+        The descent direction.
+    alpha: float
+        The initial step size.
+    c1: float value between (0, 1)
+        The parameter for the sufficient decrease condition.
+    c2: float value between (c1, 1)
+        The parameter for the curvature condition.
+    max_trials: int, optional
+        The maximum number of trial evaluations.
+
+    Returns:
+    --------
+    alpha: float
+        The step size, the longest trial step satisfying the Armijo condition when the trials
+        run out, and 0.0 when none does, i.e. when the line search failed.
+    trials: int
+        The number of objective evaluations at trial points.
+    """
+    f_0, grad_0, _ = f(x, False)
+    slope_0 = grad_0 @ p
+    trials = 0
+
+    def phi(a):
+        nonlocal trials
+        trials += 1
+        f_a, grad_a, _ = f(x + a * p, False)
+        return f_a, grad_a @ p
+
+    def zoom(a_lo, f_lo, slope_lo, a_hi, f_hi, slope_hi):
+        a = a_lo
+        while trials < max_trials:
+            a = _interpolate(a_lo, f_lo, slope_lo, a_hi, f_hi, slope_hi)
+            f_a, slope_a = phi(a)
+            if f_a > f_0 + c1 * a * slope_0 or f_a >= f_lo:
+                a_hi, f_hi, slope_hi = a, f_a, slope_a
+                continue
+            if abs(slope_a) <= -c2 * slope_0:
+                break
+            if slope_a * (a_hi - a_lo) >= 0:
+                a_hi, f_hi, slope_hi = a_lo, f_lo, slope_lo
+            a_lo, f_lo, slope_lo = a, f_a, slope_a
+        else:
+            # out of trials, fall back to the best step that satisfies the Armijo condition,
+            # a_lo is 0.0 when no trial did
+            a = a_lo
+        return a
+
+    a_prev, f_prev, slope_prev = 0.0, f_0, slope_0
+    a = alpha
+    while trials < max_trials:
+        f_a, slope_a = phi(a)
+        if f_a > f_0 + c1 * a * slope_0 or (a_prev > 0 and f_a >= f_prev):
+            return zoom(a_prev, f_prev, slope_prev, a, f_a, slope_a), trials
+        if abs(slope_a) <= -c2 * slope_0:
+            return a, trials
+        if slope_a >= 0:
+            return zoom(a, f_a, slope_a, a_prev, f_prev, slope_prev), trials
+        a_prev, f_prev, slope_prev = a, f_a, slope_a
+        a *= 2
+    return a_prev, trials
+
+
+def _interpolate(a_lo, f_lo, slope_lo, a_hi, f_hi, slope_hi):
+    """
+    Minimizer of the cubic interpolating the values and slopes at both ends of the interval,
+    falling back to the quadratic through f_lo, slope_lo and f_hi, and to bisection when
+    the interpolant's minimizer lands too close to the ends of the interval.
+    """
+    a = np.nan
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        d1 = slope_lo + slope_hi - 3 * (f_lo - f_hi) / (a_lo - a_hi)
+        radicand = d1 ** 2 - slope_lo * slope_hi
+        if radicand >= 0:
+            d2 = np.sign(a_hi - a_lo) * np.sqrt(radicand)
+            a = a_hi - (a_hi - a_lo) * (slope_hi + d2 - d1) / (slope_hi - slope_lo + 2 * d2)
+        else:
+            step = a_hi - a_lo
+            curvature = f_hi - f_lo - slope_lo * step
+            if curvature > 0:
+                a = a_lo - slope_lo * step ** 2 / (2 * curvature)
+    low, high = sorted((a_lo, a_hi))
+    margin = 0.1 * (high - low)
+    if not low + margin <= a <= high - margin:
+        a = (a_lo + a_hi) / 2
+    return a
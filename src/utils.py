@@ -1,10 +1,110 @@
-import matplotlib.pyplot as plt
+import os
+import re
+
 import numpy as np
 
-from matplotlib.patches import Polygon
+# the directory figures are written to instead of shown, and the matplotlib backend in use
+# before, see set_headless
+_output_directory = None
+_previous_backend = None
+
+
+def set_headless(directory):
+    """
+    Switches the plots to headless mode, every figure is written to a .png file in directory,
+    named after its title, instead of being shown. directory=None switches back to showing,
+    with the matplotlib backend in use before headless mode.
+    """
+    global _output_directory, _previous_backend
+    if directory is not None:
+        import matplotlib
+        os.makedirs(directory, exist_ok=True)
+        if _output_directory is None:
+            _previous_backend = matplotlib.get_backend()
+        matplotlib.use("Agg")
+    elif _output_directory is not None:
+        import matplotlib
+        matplotlib.use(_previous_backend)
+        _previous_backend = None
+    _output_directory = directory
+
+
+def _pyplot():
+    # matplotlib is only imported when a figure is drawn
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _finish(fig, title, filename=None):
+    """
+    Shows the figure, or writes it to filename, or to the headless output directory.
+    """
+    plt = _pyplot()
+    if filename is None and _output_directory is not None:
+        name = re.sub(r"\W+", "_", title).strip("_").lower()
+        filename = os.path.join(_output_directory, f"{name}.png")
+    if filename is None:
+        plt.show()
+        return
+    fig.savefig(filename)
+    plt.close(fig)
 
 
-def plot_contour(f, title, paths, names):
+def evaluate_grid(f, X, Y, batched=None, chunk_size=10_000):
+    """
+    Evaluates f on every point of the meshgrid X, Y, in batched calls of chunk_size points
+    when f takes batches, and point by point otherwise.
+
+    Parameters:
+    -----------
+    f: function
+        The objective, following the f(x, hessian_flag) protocol.
+    X: np.ndarray
+        The x coordinates of the grid.
+    Y: np.ndarray
+        The y coordinates of the grid.
+    batched: bool, optional
+        Whether f evaluates every row of an (N, 2) batch in one call. By default it is
+        detected by comparing a batched call on a few points with calls on every point.
+    chunk_size: int, optional
+        The number of points of a batched call, unused when f is called point by point.
+
+    Returns:
+    --------
+    Z: np.ndarray
+        The objective values on the grid.
+    """
+    points = np.stack([X.ravel(), Y.ravel()], axis=1)
+    if batched is None:
+        batched = supports_batches(f, points[:3])
+    if batched:
+        values = np.concatenate([
+            np.asarray(f(points[start:start + chunk_size], False)[0], dtype=float)
+            for start in range(0, points.shape[0], chunk_size)
+        ])
+    else:
+        values = np.fromiter((f(point, False)[0] for point in points), dtype=float, count=points.shape[0])
+    return values.reshape(X.shape)
+
+
+def supports_batches(f, points):
+    """
+    Checks whether f evaluates every row of the (N, 2) batch points in one call.
+    """
+    try:
+        values = np.asarray(f(points, False)[0], dtype=float)
+    except Exception:
+        return False
+    try:
+        expected = np.array([f(point, False)[0] for point in points], dtype=float)
+    except Exception:
+        # f only takes batches
+        return values.shape == (points.shape[0],)
+    return values.shape == expected.shape and np.allclose(values, expected)
+
+
+def plot_contour(f, title, paths, names, filename=None):
+    plt = _pyplot()
     fig, ax = plt.subplots()
 
     ls = ["-", "--"]
@@ -30,11 +130,7 @@ def plot_contour(f, title, paths, names):
     x = np.linspace(x_min - 0.5, x_max + 0.5, 100)
     y = np.linspace(y_min - 0.5, y_max + 0.5, 100)
     X, Y = np.meshgrid(x, y)
-    Zs = np.zeros(X.shape)
-    for i in range(X.shape[0]):
-        for j in range(X.shape[1]):
-            Z, _, _ = f(np.array([X[i, j], Y[i, j]]), hessian_flag=False)
-            Zs[i, j] = Z
+    Zs = evaluate_grid(f, X, Y)
 
     CS = ax.contour(X, Y, Zs, levels=20, alpha=0.75, cmap="coolwarm")
     ax.clabel(CS, inline=True, fontsize=10)
@@ -42,10 +138,11 @@ def plot_contour(f, title, paths, names):
     ax.set_title(title)
     ax.set_xlabel("X")
     ax.set_ylabel("Y")
-    plt.show()
+    _finish(fig, title, filename)
 
 
-def plot_iterations(title, f_values, names):
+def plot_iterations(title, f_values, names, filename=None):
+    plt = _pyplot()
     fig, ax = plt.subplots()
     ls = ["-", "--"]
     for i, (f_value, name) in enumerate(zip(f_values, names)):
@@ -54,10 +151,11 @@ def plot_iterations(title, f_values, names):
     ax.set_title(title)
     ax.set_xlabel("Iterations")
     ax.set_ylabel("Objective Value")
-    plt.show()
+    _finish(fig, title, filename)
 
 
-def plot_feasible_region_3d(f, title, paths, names):
+def plot_feasible_region_3d(f, title, paths, names, filename=None):
+    plt = _pyplot()
     fig = plt.figure()
     ax = fig.add_subplot(111, projection="3d")
 
@@ -103,10 +201,13 @@ def plot_feasible_region_3d(f, title, paths, names):
     ax.set_ylabel("Y")
     ax.set_zlabel("Z")
     ax.set_title(title)
-    plt.show()
+    _finish(fig, title, filename)
+
 
+def plot_feasible_region_2d(f, title, paths, names, filename=None):
+    from matplotlib.patches import Polygon
 
-def plot_feasible_region_2d(f, title, paths, names):
+    plt = _pyplot()
     fig, ax = plt.subplots()
 
     x_min = 0
@@ -131,11 +232,7 @@ def plot_feasible_region_2d(f, title, paths, names):
     x = np.linspace(x_min - 0.5, x_max + 0.5, 100)
     y = np.linspace(y_min - 0.5, y_max + 0.5, 100)
     X, Y = np.meshgrid(x, y)
-    Zs = np.zeros(X.shape)
-    for i in range(X.shape[0]):
-        for j in range(X.shape[1]):
-            Z, _, _ = f(np.array([X[i, j], Y[i, j]]), hessian_flag=False)
-            Zs[i, j] = abs(Z)  # correct the contours
+    Zs = np.abs(evaluate_grid(f, X, Y))  # correct the contours
 
     CS = ax.contour(X, Y, Zs, levels=20, alpha=0.75, cmap="coolwarm", zorder=-1)
     ax.clabel(CS, inline=True, fontsize=10)
@@ -160,4 +257,4 @@ def plot_feasible_region_2d(f, title, paths, names):
     ax.set_title(title)
     ax.set_xlabel("X")
     ax.set_ylabel("Y")
-    plt.show()
+    _finish(fig, title, filename)
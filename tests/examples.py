@@ -1,88 +1,433 @@
+"""
+Problem library
+
+Every problem is a callable following the f(x, hessian_flag) -> (f, g, h) protocol, built
+once with its constant matrices, which are read-only and returned without a copy. x is
+either a point of shape (n,) or a batch of shape (N, n), for which f, g and h get a leading
+axis of size N. Constant batched Hessians are broadcast views, not copies.
+"""
 from numpy import (
+    arange,
     array,
+    broadcast_to,
+    cos,
+    diag,
     exp,
-    sqrt,
+    eye,
+    full,
+    log10,
+    logaddexp,
+    logspace,
+    ones,
+    pi,
+    sin,
+    zeros,
 )
+from numpy.random import default_rng
+from scipy import sparse
+
+
+def constant(a):
+    """
+    Returns a read-only float copy of a, for the constants shared between calls.
+    """
+    a = array(a, dtype=float)
+    a.setflags(write=False)
+    return a
+
+
+def batched_constant(a, x):
+    """
+    Returns the constant a, broadcast along the batch axis of x when x is a batch.
+    """
+    return a if x.ndim == 1 else broadcast_to(a, x.shape[:1] + a.shape)
+
+
+class QuadraticProblem:
+    """
+    f(x) = 1/2 * x.T @ Q @ x, for a symmetric Q
+    """
+
+    def __init__(self, Q, x0=None):
+        self.Q = constant(Q)
+        self.n = self.Q.shape[0]
+        self.x0 = ones(self.n) if x0 is None else x0
+
+    def __call__(self, x, hessian_flag):
+        g = x @ self.Q
+        f = 1/2 * (g * x).sum(axis=-1)
+        h = batched_constant(self.Q, x) if hessian_flag else None
+        return f, g, h
+
+    def hessp(self, x, v):
+        return v @ self.Q
+
+
+class ShiftedSquaresProblem:
+    """
+    f(x) = |x - c| ** 2
+    """
+
+    def __init__(self, center):
+        self.center = constant(center)
+        self.n = self.center.shape[0]
+        self.hessian = constant(2 * eye(self.n))
+
+    def __call__(self, x, hessian_flag):
+        r = x - self.center
+        f = (r * r).sum(axis=-1)
+        g = 2 * r
+        h = batched_constant(self.hessian, x) if hessian_flag else None
+        return f, g, h
+
+
+class LinearProblem:
+    """
+    f(x) = a.T @ x - b, with a sparse Hessian for the sparse interior_pt path when sparse_hessian
+    """
+
+    def __init__(self, a, b=0, sparse_hessian=False):
+        self.a = constant(a)
+        self.b = b
+        self.n = self.a.shape[0]
+        self.hessian = sparse.csr_matrix((self.n, self.n)) if sparse_hessian else constant(zeros((self.n, self.n)))
+
+    def __call__(self, x, hessian_flag):
+        f = x @ self.a - self.b
+        g = batched_constant(self.a, x)
+        h = batched_constant(self.hessian, x) if hessian_flag else None
+        return f, g, h
+
+
+class RosenbrockProblem:
+    """
+    f(x) = sum_i 100 * (x2i - x2i-1 ** 2) ** 2 + (1 - x2i-1) ** 2, for an even dimension n
+    """
+
+    def __init__(self, n=2):
+        self.n = n
+        self.x0 = array([-1.0, 2.0] * (n // 2))
+
+    def __call__(self, x, hessian_flag):
+        odd, even = x[..., ::2], x[..., 1::2]
+        f = (100 * (even - odd ** 2) ** 2 + (1 - odd) ** 2).sum(axis=-1)
+        g = zeros(x.shape)
+        g[..., ::2] = 400 * odd ** 3 - 400 * odd * even + 2 * odd - 2
+        g[..., 1::2] = 200 * (even - odd ** 2)
+        h = None
+        if hessian_flag:
+            n = x.shape[-1]
+            h = zeros(x.shape + (n,))
+            i = arange(0, n, 2)
+            h[..., i, i] = 1200 * odd ** 2 - 400 * even + 2
+            h[..., i, i + 1] = h[..., i + 1, i] = -400 * odd
+            h[..., i + 1, i + 1] = 200
+        return f, g, h
+
+    def hessp(self, x, v):
+        odd, even = x[..., ::2], x[..., 1::2]
+        hv = zeros(v.shape)
+        hv[..., ::2] = (1200 * odd ** 2 - 400 * even + 2) * v[..., ::2] - 400 * odd * v[..., 1::2]
+        hv[..., 1::2] = -400 * odd * v[..., ::2] + 200 * v[..., 1::2]
+        return hv
+
+
+class SmoothedCornerTrianglesProblem:
+    """
+    f(x) = sum_i e ** (x1+3xi-0.1) + e ** (x1-3xi-0.1), for i = 2..n, + e **(-x1-0.1)
+    """
+
+    def __init__(self, n=2):
+        self.n = n
+        self.x0 = ones(n)
+
+    def __call__(self, x, hessian_flag):
+        first_power = exp(x[..., :1] + 3 * x[..., 1:] - 0.1)
+        second_power = exp(x[..., :1] - 3 * x[..., 1:] - 0.1)
+        third_power = exp(-x[..., 0] - 0.1)
+        powers = (first_power + second_power).sum(axis=-1)
+        f = powers + third_power
+        g = zeros(x.shape)
+        g[..., 0] = powers - third_power
+        g[..., 1:] = 3 * (first_power - second_power)
+        h = None
+        if hessian_flag:
+            n = x.shape[-1]
+            i = arange(1, n)
+            h = zeros(x.shape + (n,))
+            h[..., 0, 0] = powers + third_power
+            h[..., 0, 1:] = h[..., 1:, 0] = 3 * (first_power - second_power)
+            h[..., i, i] = 9 * (first_power + second_power)
+        return f, g, h
+
+
+def circles(n=2):
+    return QuadraticProblem(eye(n))
+
+
+def ellipses(n=2, condition=100):
+    """
+    Axis-aligned ellipses, the eigenvalues are log-spaced between 1 and condition.
+    """
+    return QuadraticProblem(diag(logspace(0, log10(condition), n)))
+
+
+def rotated_ellipses(n=2, condition=100, angle=pi / 6):
+    """
+    Ellipses with the eigenvalues log-spaced between condition and 1, rotated by angle in
+    the planes of the coordinate pairs (1, 2), (3, 4), ...
+    """
+    rotation = eye(n)
+    for i in range(0, n - 1, 2):
+        rotation[i:i + 2, i:i + 2] = [[cos(angle), -sin(angle)], [sin(angle), cos(angle)]]
+    return QuadraticProblem(rotation.T @ diag(logspace(log10(condition), 0, n)) @ rotation)
+
+
+def linear(n=2):
+    return LinearProblem(arange(1, n + 1))
+
+
+class LeastSquaresProblem:
+    """
+    f(x) = 1/2m * |A x - b| ** 2, a finite sum over the m rows of A
+
+    Called with (x, hessian_flag) it is the full objective, and minibatch(x, indices) is the
+    mean over the rows indices, the protocol of StochasticMinimization.
+    """
+
+    def __init__(self, A, b):
+        self.A = constant(A)
+        self.b = constant(b)
+        self.n_samples, self.n = self.A.shape
+        self.hessian = constant(self.A.T @ self.A / self.n_samples)
+        self.x0 = zeros(self.n)
+
+    def __call__(self, x, hessian_flag):
+        f, g = self.minibatch(x, slice(None))
+        return f, g, self.hessian if hessian_flag else None
+
+    def minibatch(self, x, indices):
+        rows = self.A[indices]
+        r = rows @ x - self.b[indices]
+        return 1/2 * (r @ r) / r.shape[0], rows.T @ r / r.shape[0]
+
+
+class LogisticRegressionProblem:
+    """
+    f(x) = 1/m * sum_i log(1 + e ** (-y_i * a_i.T @ x)) + regularization / 2 * |x| ** 2, for the
+    labels y_i in {-1, 1}, a finite sum over the m rows of A
+
+    Called with (x, hessian_flag) it is the full objective, and minibatch(x, indices) is the
+    mean over the rows indices, the protocol of StochasticMinimization.
+    """
+
+    def __init__(self, A, y, regularization=1e-3):
+        self.A = constant(A)
+        self.y = constant(y)
+        self.regularization = regularization
+        self.n_samples, self.n = self.A.shape
+        self.x0 = zeros(self.n)
+
+    def __call__(self, x, hessian_flag):
+        f, g = self.minibatch(x, slice(None))
+        h = None
+        if hessian_flag:
+            sigma = exp(-logaddexp(0, -self.y * (self.A @ x)))
+            h = (self.A.T * (sigma * (1 - sigma))) @ self.A / self.n_samples + self.regularization * eye(self.n)
+        return f, g, h
+
+    def minibatch(self, x, indices):
+        rows = self.A[indices]
+        margins = self.y[indices] * (rows @ x)
+        # 1 / (1 + e ** margin), computed without overflow
+        weights = exp(-logaddexp(0, margins))
+        f = logaddexp(0, -margins).mean() + self.regularization / 2 * (x @ x)
+        g = -rows.T @ (self.y[indices] * weights) / margins.shape[0] + self.regularization * x
+        return f, g
+
+
+def least_squares(n_samples=10_000, n=10, noise=0.1, seed=0):
+    rng = default_rng(seed)
+    A = rng.normal(size=(n_samples, n))
+    return LeastSquaresProblem(A, A @ rng.normal(size=n) + noise * rng.normal(size=n_samples))
+
+
+def logistic_regression(n_samples=10_000, n=10, seed=0, regularization=1e-3):
+    """
+    Labels drawn from the logistic model of a random weight vector, so the classes overlap.
+    """
+    rng = default_rng(seed)
+    A = rng.normal(size=(n_samples, n))
+    probabilities = 1 / (1 + exp(-A @ rng.normal(size=n)))
+    y = 2.0 * (rng.uniform(size=n_samples) < probabilities) - 1
+    return LogisticRegressionProblem(A, y, regularization)
+
+
+def simplex_qp(n=3):
+    """
+    min |x - (0, ..., 0, -1)| ** 2
+    Subject to: sum(x) = 1
+    x ≥ 0
+    The closest probability vector to the point (0, ..., 0, −1), in the format of interior_pt.
+    """
+    center = zeros(n)
+    center[-1] = -1
+    return {
+        "func": ShiftedSquaresProblem(center),
+        "ineq_constraints": array([LinearProblem(-eye(n)[i]) for i in range(n)]),
+        "eq_constraints_mat": ones((1, n)),
+        "eq_constraints_rhs": array([1]),
+        "x0": full(n, 1 / n),
+    }
+
+
+def box_lp(n=2):
+    """
+    max[sum(x)]
+    Subject to: sum(x) ≥ 1
+    xi ≤ 1, for i = 2..n
+    x1 ≤ 2
+    xi ≥ 0, for i = 2..n
+    in the format of interior_pt, the maximum is at (2, 1, ..., 1).
+    """
+    identity = eye(n)
+    return {
+        "func": LinearProblem(-ones(n)),
+        "ineq_constraints": array(
+            [LinearProblem(-ones(n), -1)] +
+            [LinearProblem(identity[i], 1) for i in range(1, n)] +
+            [LinearProblem(identity[0], 2)] +
+            [LinearProblem(-identity[i]) for i in range(1, n)]
+        ),
+        "eq_constraints_mat": array([]),
+        "eq_constraints_rhs": array([]),
+        "x0": array([0.5] + [0.75] * (n - 1)),
+    }
+
+
+def sparse_lp(n=1000, nonzeros=3, seed=0):
+    """
+    min c.T @ x
+    Subject to: A x = b
+    0 ≤ x ≤ 1
+    with n / 2 equality constraints of nonzeros entries each, in the format of interior_pt with
+    scipy.sparse matrices. The row i of A has an entry in the column 2i, so A has full row rank,
+    and the others in random odd columns of the band 2i..2i+10. x0 is strictly feasible.
+    """
+    rng = default_rng(seed)
+    eq_n = n // 2
+    rows = arange(eq_n).repeat(nonzeros)
+    offsets = 2 * rng.integers(0, 5, size=(eq_n, nonzeros)) + 1
+    offsets[:, 0] = 0
+    columns = (2 * rows + offsets.ravel()) % n
+    eq_constraints_mat = sparse.coo_matrix((rng.normal(size=eq_n * nonzeros), (rows, columns)), shape=(eq_n, n))
+    x0 = rng.uniform(0.25, 0.75, size=n)
+    return {
+        "func": LinearProblem(rng.normal(size=n), sparse_hessian=True),
+        "ineq_constraints": array([]),
+        "eq_constraints_mat": eq_constraints_mat.tocsr(),
+        "eq_constraints_rhs": eq_constraints_mat @ x0,
+        "x0": x0,
+        "ineq_constraints_mat": sparse.vstack([-sparse.eye(n), sparse.eye(n)], format="csr"),
+        "ineq_constraints_rhs": array([0.0] * n + [1.0] * n),
+    }
+
+
+_CIRCLES = circles()
+_ELLIPSES = ellipses()
+_ROTATED_ELLIPSES = rotated_ellipses()
+_ROSENBROCK = RosenbrockProblem()
+_LINEAR = linear()
+_SMOOTHED_CORNER_TRIANGLES = SmoothedCornerTrianglesProblem()
+_QP = simplex_qp()
+_LP = box_lp()
 
 
 def test_circles(x, hessian_flag):
     """
     f(x) = (x.T) * Q * x
     """
-    Q = array([[1, 0], [0, 1]])
-    f = 1/2 * x.T @ Q @ x
-    g = Q @ x
-    h = Q if hessian_flag else None
-    return f, g, h
+    return _CIRCLES(x, hessian_flag)
 
 
 def test_ellipses(x, hessian_flag):
     """
     f(x) = (x.T) * Q * x
     """
-    Q = array([[1, 0], [0, 100]])
-    f = 1/2 * x.T @ Q @ x
-    g = Q @ x
-    h = Q if hessian_flag else None
-    return f, g, h
+    return _ELLIPSES(x, hessian_flag)
 
 
 def test_rotated_ellipses(x, hessian_flag):
     """
     f(x) = (x.T) * Q * x
     """
-    Q = array([[sqrt(3)/2, -0.5], [0.5, sqrt(3)/2]])
-    Q = Q.T @ array([[100, 0], [0, 1]]) @ Q
-    f = 1/2 * x.T @ Q @ x
-    g = Q @ x
-    h = Q if hessian_flag else None
-    return f, g, h
+    return _ROTATED_ELLIPSES(x, hessian_flag)
 
 
 def test_rosenbrock(x, hessian_flag):
     """
     f(x) = 100 * (x2 - x1 ** 2) ** 2 + (1 - x1) ** 2
     """
-    f = 100 * (x[1] - x[0] ** 2) ** 2 + (1 - x[0]) ** 2
-    g = array([
-        400 * x[0] ** 3 - 400 * x[0] * x[1] + 2 * x[0] - 2,
-        200 * (x[1] - x[0] ** 2)
-    ])
-    h = array([
-        [1200 * x[0] ** 2 - 400 * x[1] + 2, -400 * x[0]],
-        [-400 * x[0], 200]
-    ]) if hessian_flag else None
-    return f, g, h
+    return _ROSENBROCK(x, hessian_flag)
+
+
+def test_ellipses_batched(x, hessian_flag):
+    """
+    f(x) = (x.T) * Q * x, evaluated on every row of an (N, 2) batch
+    """
+    return _ELLIPSES(x, hessian_flag)
+
+
+def test_rosenbrock_batched(x, hessian_flag):
+    """
+    f(x) = 100 * (x2 - x1 ** 2) ** 2 + (1 - x1) ** 2, evaluated on every row of an (N, 2) batch
+    """
+    return _ROSENBROCK(x, hessian_flag)
+
+
+def test_extended_rosenbrock(x, hessian_flag):
+    """
+    f(x) = sum_i 100 * (x2i - x2i-1 ** 2) ** 2 + (1 - x2i-1) ** 2, for an even dimension n
+    """
+    return _ROSENBROCK(x, hessian_flag)
+
+
+def test_rosenbrock_value(x):
+    """
+    f(x) = 100 * (x2 - x1 ** 2) ** 2 + (1 - x1) ** 2, value only, on a point or on every row of a batch
+    """
+    return 100 * (x[..., 1] - x[..., 0] ** 2) ** 2 + (1 - x[..., 0]) ** 2
+
+
+def test_extended_rosenbrock_value(x):
+    """
+    f(x) = sum_i 100 * (x2i - x2i-1 ** 2) ** 2 + (1 - x2i-1) ** 2, value only, on a point or on
+    every row of a batch
+    """
+    odd, even = x[..., ::2], x[..., 1::2]
+    return (100 * (even - odd ** 2) ** 2 + (1 - odd) ** 2).sum(axis=-1)
+
+
+def test_smoothed_corner_triangles_value(x):
+    """
+    f(x1, x2) = e ** (x1+3x2-0.1) + e ** (x1-3x2-0.1) + e **(-x1-0.1), value only, on a point or
+    on every row of a batch
+    """
+    return exp(x[..., 0] + 3 * x[..., 1] - 0.1) + exp(x[..., 0] - 3 * x[..., 1] - 0.1) + exp(-x[..., 0] - 0.1)
 
 
 def test_linear(x, hessian_flag):
     """
     f(x) = a.T * x
     """
-    a = array([1, 2])
-    f = a.T @ x
-    g = a
-    h = array([[0, 0], [0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _LINEAR(x, hessian_flag)
 
 
 def test_smoothed_corner_triangles(x, hessian_flag):
     """
     f(x1, x2) = e ** (x1+3x2-0.1) + e ** (x1-3x2-0.1) + e **(-x1-0.1)
     """
-    first_power = exp(x[0] + 3 * x[1] - 0.1)
-    second_power = exp(x[0] - 3 * x[1] - 0.1)
-    third_power = exp(-x[0] - 0.1)
-    f = first_power + second_power + third_power
-    g = array([
-        first_power + second_power - third_power,
-        3 * (first_power - second_power),
-    ])
-    h = array([
-        [first_power + second_power + third_power, 0],
-        [0, 9 * (first_power + second_power)],
-    ]) if hessian_flag else None
-    return f, g, h
+    return _SMOOTHED_CORNER_TRIANGLES(x, hessian_flag)
 
 
 def test_qp(x, hessian_flag):
@@ -94,31 +439,19 @@ def test_qp(x, hessian_flag):
     z ≥ 0
     The problem finds the closest probability vector to the point (0,0, −1) = 0.
     """
-    f = x[0] ** 2 + x[1] ** 2 + (x[2] + 1) ** 2
-    g = array([2 * x[0], 2 * x[1], 2 * (x[2] + 1)])
-    h = array([[2, 0, 0], [0, 2, 0], [0, 0, 2]]) if hessian_flag else None
-    return f, g, h
+    return _QP["func"](x, hessian_flag)
 
 
 def test_qp_ineq_constraint_1(x, hessian_flag):
-    f = -x[0]
-    g = array([-1, 0, 0])
-    h = array([[0, 0, 0], [0, 0, 0], [0, 0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _QP["ineq_constraints"][0](x, hessian_flag)
 
 
 def test_qp_ineq_constraint_2(x, hessian_flag):
-    f = -x[1]
-    g = array([0, -1, 0])
-    h = array([[0, 0, 0], [0, 0, 0], [0, 0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _QP["ineq_constraints"][1](x, hessian_flag)
 
 
 def test_qp_ineq_constraint_3(x, hessian_flag):
-    f = -x[2]
-    g = array([0, 0, -1])
-    h = array([[0, 0, 0], [0, 0, 0], [0, 0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _QP["ineq_constraints"][2](x, hessian_flag)
 
 
 def test_lp(x, hessian_flag):
@@ -129,35 +462,20 @@ def test_lp(x, hessian_flag):
     x ≤ 2
     y ≥ 0
     """
-    f = -x[0] - x[1]
-    g = array([-1, -1])
-    h = array([[0, 0], [0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _LP["func"](x, hessian_flag)
 
 
 def test_lp_ineq_constraint_1(x, hessian_flag):
-    f = -x[1] - x[0] + 1
-    g = array([-1, -1])
-    h = array([[0, 0], [0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _LP["ineq_constraints"][0](x, hessian_flag)
 
 
 def test_lp_ineq_constraint_2(x, hessian_flag):
-    f = x[1] - 1
-    g = array([0, 1])
-    h = array([[0, 0], [0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _LP["ineq_constraints"][1](x, hessian_flag)
 
 
 def test_lp_ineq_constraint_3(x, hessian_flag):
-    f = x[0] - 2
-    g = array([1, 0])
-    h = array([[0, 0], [0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _LP["ineq_constraints"][2](x, hessian_flag)
 
 
 def test_lp_ineq_constraint_4(x, hessian_flag):
-    f = -x[1]
-    g = array([0, -1])
-    h = array([[0, 0], [0, 0]]) if hessian_flag else None
-    return f, g, h
+    return _LP["ineq_constraints"][3](x, hessian_flag)
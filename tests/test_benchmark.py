@@ -0,0 +1,61 @@
+import copy
+import os
+import tempfile
+import unittest
+
+from src.benchmark import (
+    BenchmarkSuite,
+    compare_results,
+    main,
+    read_results,
+    write_results,
+)
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_benchmark_suite(self):
+        suite = BenchmarkSuite(sizes=[10, 100], constrained_sizes=[10, 50], max_iter=300)
+        results = suite.run()
+        for case in results["results"]:
+            print(
+                f"{case['problem']} n={case['n']} {case['method']}: {case['wall_time']:.4f}s, "
+                f"iterations: {case['iterations']}, linear solves: {case['linear_solves']}, "
+                f"success: {case['success']}"
+            )
+        problems = {case["problem"] for case in results["results"]}
+        self.assertEqual(
+            problems,
+            set(BenchmarkSuite.UNCONSTRAINED_PROBLEMS) | set(BenchmarkSuite.CONSTRAINED_PROBLEMS),
+        )
+        for case in results["results"]:
+            self.assertLessEqual(case["n"], BenchmarkSuite.DENSE_LIMITS.get(case["method"], case["n"]))
+            self.assertGreater(case["iterations"], 0)
+            self.assertGreaterEqual(case["f_evaluations"], case["iterations"])
+            if case["method"] in ["newton", "newton_cholesky", "newton_cg", "barrier", "primal_dual"]:
+                self.assertGreater(case["linear_solves"], 0)
+            if case["problem"] in BenchmarkSuite.CONSTRAINED_PROBLEMS:
+                self.assertTrue(case["success"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, "baseline.json")
+            current = os.path.join(directory, "current.json")
+            write_results(results, baseline)
+            self.assertEqual(read_results(baseline), results)
+            self.assertEqual(compare_results(results, results), [])
+
+            # a slower and less efficient version
+            slower = copy.deepcopy(results)
+            case = slower["results"][0]
+            case["wall_time"] = 2 * max(case["wall_time"], 1e-3)
+            case["iterations"] += 1
+            write_results(slower, current)
+            regressions = compare_results(results, slower)
+            print(f"regressions: {regressions}")
+            self.assertEqual(len(regressions), 2)
+            self.assertEqual(main(["compare", baseline, current]), 1)
+            self.assertEqual(main(["compare", baseline, baseline]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from examples import (
+    box_lp,
+    sparse_lp,
+    test_rosenbrock,
+)
+from src.checkpoint import Checkpoint
+from src.constrained_min import InteriorPointMinimizer
+from src.recorder import PathRecorder
+from src.unconstrained_min import LineSearchMinimization
+
+
+class Preempted(Exception):
+    pass
+
+
+def preempt(iterations):
+    """
+    A callback interrupting the solve on its iterations-th iteration, as a preempted worker.
+    """
+    def callback(state):
+        callback.count += 1
+        if callback.count == iterations:
+            raise Preempted
+    callback.count = 0
+    return callback
+
+
+class TestCheckpoint(unittest.TestCase):
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+    MAX_ITER = 2_000
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "solve.npz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def rosenbrock(self, **kwargs):
+        return dict(
+            f=test_rosenbrock,
+            x0=np.array([-1.0, 2.0]),
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER,
+            **kwargs,
+        )
+
+    def test_line_search_resume(self):
+        for method in ["gradient_descent", "nesterov", "barzilai_borwein", "bfgs", "lbfgs", "newton"]:
+            minimizer = LineSearchMinimization(method)
+            x, f_x, success = minimizer.unconstrained_minimization(**self.rosenbrock())
+            iterations = len(minimizer.x_path)
+
+            checkpoint = Checkpoint(self.filename, every=7, path_tail=5)
+            checkpoint.clear()
+            with self.assertRaises(Preempted):
+                LineSearchMinimization(method).unconstrained_minimization(
+                    **self.rosenbrock(checkpoint=checkpoint, callback=preempt(iterations // 2))
+                )
+            resumed = LineSearchMinimization(method)
+            x_resumed, f_resumed, success_resumed = resumed.unconstrained_minimization(
+                **self.rosenbrock(checkpoint=checkpoint)
+            )
+            print(f"method: {method} - iterations: {iterations}, checkpoints written: {checkpoint.writes}")
+
+            # the resumed solve follows the path of the uninterrupted one
+            self.assertEqual(success_resumed, success)
+            np.testing.assert_array_equal(x_resumed, x)
+            self.assertEqual(f_resumed, f_x)
+            self.assertEqual(resumed.recorder.iterations, iterations)
+            self.assertEqual(resumed.line_search_evaluations, minimizer.line_search_evaluations)
+            self.assertEqual(resumed.linear_solves, minimizer.linear_solves)
+            # the path tail of the checkpoint and the resumed iterates
+            restart = (iterations // 2 - 1) // 7 * 7
+            np.testing.assert_array_equal(resumed.x_path, minimizer.x_path[restart - 5:])
+
+    def test_interior_point_resume(self):
+        for problem in [sparse_lp(200), box_lp(3)]:
+            minimizer = InteriorPointMinimizer()
+            x, f_x, success = minimizer.interior_pt(tol=1e-10, **problem)
+            self.assertTrue(success)
+
+            checkpoint = Checkpoint(self.filename, every=5, path_tail=3)
+            checkpoint.clear()
+            with self.assertRaises(Preempted):
+                InteriorPointMinimizer().interior_pt(
+                    tol=1e-10, checkpoint=checkpoint, callback=preempt(len(minimizer.x_path_inner) // 2), **problem
+                )
+            resumed = InteriorPointMinimizer()
+            x_resumed, f_resumed, success_resumed = resumed.interior_pt(tol=1e-10, checkpoint=checkpoint, **problem)
+            print(f"newton systems: {minimizer.newton_systems}, checkpoints written: {checkpoint.writes}")
+            self.assertTrue(success_resumed)
+            np.testing.assert_array_equal(x_resumed, x)
+            self.assertEqual(f_resumed, f_x)
+            self.assertEqual(resumed.newton_systems, minimizer.newton_systems)
+            self.assertEqual(resumed.inner_recorder.iterations, minimizer.inner_recorder.iterations)
+            np.testing.assert_array_equal(resumed.lambda_, minimizer.lambda_)
+            np.testing.assert_array_equal(resumed.x_path_outer[-1], minimizer.x_path_outer[-1])
+
+    def test_repeated_solves(self):
+        # a finished solve deletes its checkpoint, the next solve with the same Checkpoint starts from x0
+        checkpoint = Checkpoint(self.filename, every=7)
+        for _ in range(2):
+            minimizer = LineSearchMinimization("bfgs")
+            x, f_x, success = minimizer.unconstrained_minimization(**self.rosenbrock(checkpoint=checkpoint))
+            self.assertTrue(success)
+            np.testing.assert_allclose(minimizer.x_path[0], [-1.0, 2.0])
+            self.assertFalse(os.path.exists(self.filename))
+        self.assertGreater(checkpoint.writes, 0)
+
+        problem = box_lp(3)
+        checkpoint = Checkpoint(self.filename, every=2)
+        for _ in range(2):
+            minimizer = InteriorPointMinimizer()
+            x, f_x, success = minimizer.interior_pt(tol=1e-10, checkpoint=checkpoint, **problem)
+            self.assertTrue(success)
+            np.testing.assert_allclose(minimizer.x_path_inner[0], problem["x0"])
+            self.assertFalse(os.path.exists(self.filename))
+        self.assertGreater(checkpoint.writes, 0)
+
+    def test_format(self):
+        checkpoint = Checkpoint(self.filename, every=10)
+        with self.assertRaises(Preempted):
+            LineSearchMinimization("bfgs").unconstrained_minimization(
+                **self.rosenbrock(checkpoint=checkpoint, callback=preempt(15))
+            )
+        with np.load(self.filename, allow_pickle=False) as archive:
+            self.assertEqual(int(archive["version"]), Checkpoint.VERSION)
+            self.assertEqual(str(archive["method"]), "bfgs")
+            self.assertEqual(archive["inverse_hessian"].shape, (2, 2))
+            self.assertNotIn("recorder.x", archive.files)
+        self.assertFalse(os.path.exists(f"{self.filename}.tmp.npz"))
+
+        # a checkpoint of another method, another dimension or another version is refused
+        with self.assertRaises(ValueError):
+            LineSearchMinimization("lbfgs").unconstrained_minimization(**self.rosenbrock(checkpoint=checkpoint))
+        with self.assertRaises(ValueError):
+            LineSearchMinimization("bfgs").unconstrained_minimization(
+                **dict(self.rosenbrock(checkpoint=checkpoint), x0=np.zeros(3))
+            )
+        with np.load(self.filename, allow_pickle=False) as archive:
+            arrays = dict(archive)
+        np.savez(self.filename, **dict(arrays, version=Checkpoint.VERSION + 1))
+        with self.assertRaises(ValueError):
+            LineSearchMinimization("bfgs").unconstrained_minimization(**self.rosenbrock(checkpoint=checkpoint))
+
+        checkpoint.clear()
+        self.assertFalse(os.path.exists(self.filename))
+
+    def test_recorder_restore(self):
+        x = np.arange(20.0).reshape(10, 2)
+        f = np.arange(10.0)
+        for mode, expected in [("full", 10), ("every", 10), ("last", 4)]:
+            recorder = PathRecorder(mode=mode, k=3, n=4)
+            recorder.restore(x, f, iterations=30)
+            self.assertEqual(len(recorder), expected)
+            self.assertEqual(recorder.iterations, 30)
+            np.testing.assert_array_equal(recorder.x, x[10 - expected:])
+            # the iteration 30 is recorded by the "every" mode as well
+            recorder.append(np.zeros(2), -1.0)
+            self.assertEqual(recorder.f[-1], -1.0)
+        recorder = PathRecorder(mode="off")
+        recorder.restore(x, f, iterations=30)
+        self.assertEqual(len(recorder), 0)
+        self.assertEqual(recorder.iterations, 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
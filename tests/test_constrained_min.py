@@ -1,5 +1,6 @@
 import numpy as np
 import unittest
+from scipy import sparse
 
 from examples import (
     test_qp,
@@ -11,8 +12,14 @@ from examples import (
     test_lp_ineq_constraint_2,
     test_lp_ineq_constraint_3,
     test_lp_ineq_constraint_4,
+    box_lp,
+    simplex_qp,
+    sparse_lp,
+    LinearProblem,
 )
 from src.constrained_min import InteriorPointMinimizer
+from src.kkt import KKTSystem
+from src.primal_dual_min import PrimalDualInteriorPointMinimizer
 from src.utils import (
     plot_feasible_region_2d,
     plot_feasible_region_3d,
@@ -83,6 +90,322 @@ class TestUnconstrainedMin(unittest.TestCase):
                 names=["interior_pt_outer", "interior_pt_inner"],
             )
 
+    def test_linear_inequality_matrix(self):
+        x0 = np.array([0.5, 0.75])
+        ineq_constraints = np.array([
+            test_lp_ineq_constraint_1,
+            test_lp_ineq_constraint_2,
+            test_lp_ineq_constraint_3,
+            test_lp_ineq_constraint_4,
+        ])
+        # the same constraints as G x <= h
+        G = np.array([[-1, -1], [0, 1], [1, 0], [0, -1]])
+        h = np.array([-1, 1, 2, 0])
+        A = np.array([])
+        b = np.array([])
+
+        solutions = []
+        for callables, rows in [(ineq_constraints, []), ([], slice(None)), (ineq_constraints[:2], slice(2, None))]:
+            minimizer = InteriorPointMinimizer()
+            x, f_x, success = minimizer.interior_pt(
+                func=test_lp,
+                ineq_constraints=callables,
+                eq_constraints_mat=A,
+                eq_constraints_rhs=b,
+                x0=x0,
+                tol=self.OBJ_TOL,
+                max_iter=self.MAX_ITER,
+                ineq_constraints_mat=G[rows],
+                ineq_constraints_rhs=h[rows],
+            )
+            print(f"(x, y): {x.round(7)}, f(x, y): {round(f_x, 7)}, success: {success}")
+            self.assertTrue(success)
+            solutions.append(x)
+        np.testing.assert_allclose(solutions[1], solutions[0])
+        np.testing.assert_allclose(solutions[2], solutions[0])
+        np.testing.assert_allclose(solutions[0], [2, 1], atol=1e-6)
+
+    def test_kkt_system(self):
+        rng = np.random.default_rng(0)
+        n, eq_n = 30, 10
+        M = rng.normal(size=(n, n))
+        H = M @ M.T + np.eye(n)
+        A = rng.normal(size=(eq_n, n))
+        g = rng.normal(size=n)
+        r = rng.normal(size=eq_n)
+
+        for method in KKTSystem.METHODS:
+            kkt = KKTSystem(A, n, method=method)
+            kkt.update(H)
+            dx, w = kkt.solve(g, r)
+            print(f"method: {method} - residuals: {np.linalg.norm(H @ dx + A.T @ w + g)}, {np.linalg.norm(A @ dx + r)}")
+            np.testing.assert_allclose(H @ dx + A.T @ w, -g, atol=1e-8)
+            np.testing.assert_allclose(A @ dx, -r, atol=1e-8)
+
+        # the inner Newton steps agree whatever the elimination
+        for method in KKTSystem.METHODS:
+            minimizer = InteriorPointMinimizer()
+            x, f_x, success = minimizer.interior_pt(
+                func=test_qp,
+                ineq_constraints=np.array([
+                    test_qp_ineq_constraint_1,
+                    test_qp_ineq_constraint_2,
+                    test_qp_ineq_constraint_3,
+                ]),
+                eq_constraints_mat=np.array([[1, 1, 1]]),
+                eq_constraints_rhs=np.array([1]),
+                x0=np.array([0.1, 0.2, 0.7]),
+                tol=self.OBJ_TOL,
+                max_iter=self.MAX_ITER,
+                kkt_method=method,
+            )
+            print(f"method: {method} - (x, y): {x.round(7)}, f(x, y): {round(f_x, 7)}, success: {success}")
+            self.assertTrue(success)
+            np.testing.assert_allclose(x, [0.5, 0.5, 0], atol=1e-6)
+
+    def test_primal_dual_interior_pt(self):
+        problems = {
+            test_qp: dict(
+                ineq_constraints=np.array([
+                    test_qp_ineq_constraint_1,
+                    test_qp_ineq_constraint_2,
+                    test_qp_ineq_constraint_3,
+                ]),
+                eq_constraints_mat=np.array([[1, 1, 1]]),
+                eq_constraints_rhs=np.array([1]),
+                x0=np.array([0.1, 0.2, 0.7]),
+            ),
+            test_lp: dict(
+                ineq_constraints=np.array([
+                    test_lp_ineq_constraint_1,
+                    test_lp_ineq_constraint_2,
+                    test_lp_ineq_constraint_3,
+                    test_lp_ineq_constraint_4,
+                ]),
+                eq_constraints_mat=np.array([]),
+                eq_constraints_rhs=np.array([]),
+                x0=np.array([0.5, 0.75]),
+            ),
+        }
+
+        for func, problem in problems.items():
+            print(f"Testing function: {func.__name__}")
+            solutions = []
+            newton_systems = []
+            for minimizer in [InteriorPointMinimizer(), PrimalDualInteriorPointMinimizer()]:
+                x, f_x, success = minimizer.interior_pt(
+                    func=func,
+                    tol=self.OBJ_TOL,
+                    max_iter=self.MAX_ITER,
+                    **problem,
+                )
+                print(
+                    f"{type(minimizer).__name__} - (x, y): {x.round(7)}, f(x, y): {round(f_x, 7)}, "
+                    f"success: {success}, Newton systems: {minimizer.newton_systems}"
+                )
+                self.assertTrue(success)
+                solutions.append(x)
+                newton_systems.append(minimizer.newton_systems)
+            np.testing.assert_allclose(solutions[1], solutions[0], atol=1e-6)
+            self.assertLess(5 * newton_systems[1], newton_systems[0])
+
+    def test_infeasible_start(self):
+        qp_constraints = np.array([
+            test_qp_ineq_constraint_1,
+            test_qp_ineq_constraint_2,
+            test_qp_ineq_constraint_3,
+        ])
+        lp_constraints = np.array([
+            test_lp_ineq_constraint_1,
+            test_lp_ineq_constraint_2,
+            test_lp_ineq_constraint_3,
+            test_lp_ineq_constraint_4,
+        ])
+
+        for minimizer_class in [InteriorPointMinimizer, PrimalDualInteriorPointMinimizer]:
+            print(f"Testing minimizer: {minimizer_class.__name__}")
+            # outside of the inequality constraints and off the plane x + y + z = 1
+            x, f_x, success = minimizer_class().interior_pt(
+                func=test_qp,
+                ineq_constraints=qp_constraints,
+                eq_constraints_mat=np.array([[1, 1, 1]]),
+                eq_constraints_rhs=np.array([1]),
+                x0=np.array([2, -1, 3]),
+                tol=self.OBJ_TOL,
+                max_iter=self.MAX_ITER,
+            )
+            print(f"(x, y): {x.round(7)}, f(x, y): {round(f_x, 7)}, success: {success}")
+            self.assertTrue(success)
+            np.testing.assert_allclose(x, [0.5, 0.5, 0], atol=1e-6)
+
+            # strictly feasible for the inequality constraints, off the line x - y = 1
+            x, f_x, success = minimizer_class().interior_pt(
+                func=test_lp,
+                ineq_constraints=lp_constraints,
+                eq_constraints_mat=np.array([[1, -1]]),
+                eq_constraints_rhs=np.array([1]),
+                x0=np.array([0.5, 0.75]),
+                tol=self.OBJ_TOL,
+                max_iter=self.MAX_ITER,
+            )
+            print(f"(x, y): {x.round(7)}, f(x, y): {round(f_x, 7)}, success: {success}")
+            self.assertTrue(success)
+            np.testing.assert_allclose(x, [2, 1], atol=1e-6)
+
+            with self.assertRaises(ValueError):
+                minimizer_class().interior_pt(
+                    func=test_lp,
+                    ineq_constraints=lp_constraints,
+                    eq_constraints_mat=np.array([[1, 0]]),
+                    eq_constraints_rhs=np.array([5]),
+                    x0=np.array([3, 0.75]),
+                    tol=self.OBJ_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+
+            # strictly feasible for x >= 0, and x + y + z = -1 has no solution there
+            x, f_x, success = minimizer_class().interior_pt(
+                func=LinearProblem(np.ones(3)),
+                ineq_constraints=np.array([]),
+                eq_constraints_mat=np.array([[1, 1, 1]]),
+                eq_constraints_rhs=np.array([-1]),
+                x0=np.array([0.1, 0.2, 0.7]),
+                tol=self.OBJ_TOL,
+                max_iter=self.MAX_ITER,
+                ineq_constraints_mat=-np.eye(3),
+                ineq_constraints_rhs=np.zeros(3),
+            )
+            print(f"infeasible equality constraints - x: {x}, success: {success}")
+            self.assertFalse(success)
+            self.assertTrue(np.all(x >= 0))
+
+    def test_resolve(self):
+        minimizer = InteriorPointMinimizer()
+        x, f_x, success = minimizer.interior_pt(
+            func=test_qp,
+            ineq_constraints=np.array([
+                test_qp_ineq_constraint_1,
+                test_qp_ineq_constraint_2,
+                test_qp_ineq_constraint_3,
+            ]),
+            eq_constraints_mat=np.array([[1, 1, 1]]),
+            eq_constraints_rhs=np.array([1]),
+            x0=np.array([0.1, 0.2, 0.7]),
+            tol=self.OBJ_TOL,
+            max_iter=self.MAX_ITER,
+        )
+        cold_newton_systems = minimizer.newton_systems
+        nu = minimizer.nu
+        calls = []
+        interior_pt = minimizer.interior_pt
+        minimizer.interior_pt = lambda **problem: calls.append(problem) or interior_pt(**problem)
+
+        # a shifted b, the last solution is off the plane x + y + z = 1.2
+        x, f_x, success = minimizer.resolve(eq_constraints_rhs=np.array([1.2]))
+        print(f"(x, y): {x.round(7)}, success: {success}, Newton systems: {minimizer.newton_systems}")
+        self.assertTrue(success)
+        np.testing.assert_allclose(x, [0.6, 0.6, 0], atol=1e-6)
+        self.assertLess(5 * minimizer.newton_systems, cold_newton_systems)
+        # the residual steps start from the last multipliers, scaled to the barrier parameter
+        self.assertNotEqual(nu[0], 0)
+        np.testing.assert_allclose(calls[-1]["nu0"], nu * calls[-1]["t0"])
+        np.testing.assert_allclose(minimizer.nu, 1.2 * nu, rtol=1e-6)
+        # the multipliers of another A are not reused
+        minimizer.resolve(eq_constraints_mat=np.array([[1, 1, 2]]))
+        self.assertNotIn("nu0", calls[-1])
+
+        # an extra constraint that cuts off the last solution
+        minimizer = InteriorPointMinimizer()
+        minimizer.interior_pt(
+            func=test_lp,
+            ineq_constraints=np.array([
+                test_lp_ineq_constraint_1,
+                test_lp_ineq_constraint_2,
+                test_lp_ineq_constraint_3,
+                test_lp_ineq_constraint_4,
+            ]),
+            eq_constraints_mat=np.array([]),
+            eq_constraints_rhs=np.array([]),
+            x0=np.array([0.5, 0.75]),
+            tol=self.OBJ_TOL,
+            max_iter=self.MAX_ITER,
+        )
+        x, f_x, success = minimizer.resolve(
+            ineq_constraints_mat=np.array([[1, 0]]),
+            ineq_constraints_rhs=np.array([1.5]),
+        )
+        print(f"(x, y): {x.round(7)}, success: {success}, Newton systems: {minimizer.newton_systems}")
+        self.assertTrue(success)
+        np.testing.assert_allclose(x, [1.5, 1], atol=1e-6)
+
+        with self.assertRaises(ValueError):
+            InteriorPointMinimizer().resolve()
+
+    def test_problem_library(self):
+        for n in [3, 10, 30]:
+            for problem, solution in [
+                (simplex_qp(n), np.array([1 / (n - 1)] * (n - 1) + [0])),
+                (box_lp(n), np.array([2] + [1] * (n - 1))),
+            ]:
+                minimizer = InteriorPointMinimizer()
+                x, f_x, success = minimizer.interior_pt(tol=self.OBJ_TOL, max_iter=self.MAX_ITER, **problem)
+                print(f"n: {n}, f(x): {round(f_x, 7)}, newton systems: {minimizer.newton_systems}, success: {success}")
+                self.assertTrue(success)
+                np.testing.assert_allclose(x, solution, atol=1e-6)
+
+    def test_sparse_constraints(self):
+        rng = np.random.default_rng(0)
+        n = 200
+        problem = sparse_lp(n)
+        A = problem["eq_constraints_mat"]
+        g = rng.normal(size=n)
+        r = rng.normal(size=A.shape[0])
+
+        # the normal equations for a diagonal H, the block matrix otherwise
+        for H in [sparse.diags(rng.uniform(1, 1e6, size=n)), sparse.diags(rng.uniform(1, 2, size=n)) + 0.1 * A.T @ A]:
+            kkt = KKTSystem(A, n, method="sparse")
+            kkt.update(H)
+            dx, w = kkt.solve(g, r)
+            np.testing.assert_allclose(H @ dx + A.T @ w, -g, atol=1e-8)
+            np.testing.assert_allclose(A @ dx, -r, atol=1e-8)
+
+        # the sparse path agrees with the dense one, from a feasible and from an infeasible start
+        dense_problem = dict(
+            problem,
+            func=LinearProblem(problem["func"].a),
+            eq_constraints_mat=A.toarray(),
+            ineq_constraints_mat=problem["ineq_constraints_mat"].toarray(),
+        )
+        x_dense, f_dense, success = InteriorPointMinimizer().interior_pt(tol=self.OBJ_TOL, **dense_problem)
+        self.assertTrue(success)
+        for x0 in [problem["x0"], np.zeros(n)]:
+            minimizer = InteriorPointMinimizer()
+            x, f_x, success = minimizer.interior_pt(tol=self.OBJ_TOL, **dict(problem, x0=x0))
+            print(f"n: {n}, f(x): {round(f_x, 7)}, newton systems: {minimizer.newton_systems}, success: {success}")
+            self.assertTrue(success)
+            self.assertEqual(minimizer._kkt.method, "sparse")
+            np.testing.assert_allclose(x, x_dense, atol=1e-6)
+        # the primal-dual method takes the same sparse or dense arguments
+        for arguments in [problem, dense_problem]:
+            minimizer = PrimalDualInteriorPointMinimizer()
+            x, f_x, success = minimizer.interior_pt(tol=self.OBJ_TOL, **arguments)
+            print(f"primal-dual - f(x): {round(f_x, 7)}, newton systems: {minimizer.newton_systems}")
+            self.assertTrue(success)
+            np.testing.assert_allclose(x, x_dense, atol=1e-6)
+
+        # a size the dense path could not hold in memory
+        n = 20000
+        problem = sparse_lp(n)
+        minimizer = InteriorPointMinimizer()
+        x, f_x, success = minimizer.interior_pt(tol=1e-8, **problem)
+        print(f"n: {n}, f(x): {round(f_x, 7)}, newton systems: {minimizer.newton_systems}, success: {success}")
+        self.assertTrue(success)
+        np.testing.assert_allclose(problem["eq_constraints_mat"] @ x, problem["eq_constraints_rhs"], atol=1e-6)
+        self.assertTrue(np.all((x >= 0) & (x <= 1)))
+        x_primal_dual, f_primal_dual, success = PrimalDualInteriorPointMinimizer().interior_pt(tol=1e-8, **problem)
+        self.assertTrue(success)
+        self.assertAlmostEqual(f_primal_dual, f_x, places=5)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+
+from examples import (
+    test_rosenbrock,
+    test_extended_rosenbrock,
+    test_smoothed_corner_triangles,
+    test_rosenbrock_value,
+    test_extended_rosenbrock_value,
+    test_smoothed_corner_triangles_value,
+)
+from src.derivatives import FiniteDifferenceObjective, ForwardModeObjective
+from src.unconstrained_min import LineSearchMinimization
+
+
+class TestDerivatives(unittest.TestCase):
+    x0 = np.array([1, 1]).T
+    ROSENBROCK_X0 = np.array([-1, 2]).T
+    TEST_FUNCTIONS = {
+        test_rosenbrock_value: test_rosenbrock,
+        test_smoothed_corner_triangles_value: test_smoothed_corner_triangles,
+    }
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+    MAX_ITER = 100
+
+    def test_derivative_providers(self):
+        points = np.random.default_rng(0).uniform(-1, 1, size=(5, 2))
+
+        for value_func, func in self.TEST_FUNCTIONS.items():
+            print(f"Testing function: {value_func.__name__}")
+            providers = {
+                "forward": (FiniteDifferenceObjective(value_func, method="forward"), 1e-5, 1e-3),
+                "central": (FiniteDifferenceObjective(value_func), 1e-7, 1e-3),
+                "central, looped": (FiniteDifferenceObjective(value_func, vectorized=False), 1e-7, 1e-3),
+                "forward mode": (ForwardModeObjective(value_func), 1e-12, 1e-12),
+            }
+            for x in points:
+                f_x, g_x, h_x = func(x, True)
+                for name, (provider, grad_tol, hess_tol) in providers.items():
+                    f_approx, g_approx, h_approx = provider(x, True)
+                    self.assertAlmostEqual(f_approx, f_x)
+                    np.testing.assert_allclose(g_approx, g_x, rtol=grad_tol, atol=grad_tol)
+                    np.testing.assert_allclose(h_approx, h_x, rtol=hess_tol, atol=hess_tol)
+                    self.assertIsNone(provider(x, False)[2])
+
+            for name, (provider, _, _) in providers.items():
+                calls_per_evaluation = provider.calls / (2 * points.shape[0])
+                print(f"provider: {name} - calls per evaluation: {calls_per_evaluation}")
+                if name != "central, looped":
+                    self.assertEqual(calls_per_evaluation, 1)
+
+    def test_minimization_with_derivative_providers(self):
+
+        for value_func, func in self.TEST_FUNCTIONS.items():
+            print(f"Testing function: {value_func.__name__}")
+            x0 = self.ROSENBROCK_X0 if func == test_rosenbrock else self.x0
+            expected_x, _, _ = LineSearchMinimization(method="newton_cholesky").unconstrained_minimization(
+                f=func,
+                x0=x0,
+                obj_tol=self.OBJ_TOL,
+                param_tol=self.PARAM_TOL,
+                max_iter=self.MAX_ITER,
+            )
+            for provider in [FiniteDifferenceObjective(value_func), ForwardModeObjective(value_func)]:
+                minimizer = LineSearchMinimization(method="newton_cholesky")
+                x, f_x, success = minimizer.unconstrained_minimization(
+                    f=provider,
+                    x0=x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+                print(
+                    f"provider: {type(provider).__name__} - iterations: {len(minimizer.x_path)}, "
+                    f"calls: {provider.calls}, success: {success}"
+                )
+                self.assertTrue(success)
+                np.testing.assert_allclose(x, expected_x, atol=1e-5)
+
+        # an n-dimensional Hessian from a single batched call
+        x = np.tile([-1.2, 1.0], 10)
+        f_x, g_x, h_x = test_extended_rosenbrock(x, True)
+        provider = FiniteDifferenceObjective(test_extended_rosenbrock_value)
+        _, g_approx, h_approx = provider(x, True)
+        print(f"n: {x.shape[0]} - calls: {provider.calls}, points: {provider.points}")
+        self.assertEqual(provider.calls, 1)
+        np.testing.assert_allclose(g_approx, g_x, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(h_approx, h_x, rtol=1e-3, atol=1e-3)
+        _, g_exact, h_exact = ForwardModeObjective(test_extended_rosenbrock_value)(x, True)
+        np.testing.assert_allclose(g_exact, g_x)
+        np.testing.assert_allclose(h_exact, h_x)
+
+        # the O(n^3) Hessians are refused above max_hessian_dimension, the gradients are not
+        x = np.tile([-1.2, 1.0], 150)
+        provider = ForwardModeObjective(test_extended_rosenbrock_value)
+        with self.assertRaises(ValueError):
+            provider(x, True)
+        np.testing.assert_allclose(provider(x, False)[1], test_extended_rosenbrock(x, False)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import pickle
+import tempfile
+import tracemalloc
+import unittest
+import numpy as np
+
+from examples import (
+    least_squares,
+    logistic_regression,
+)
+from src.constrained_min import InteriorPointMinimizer
+from src.out_of_core import ChunkedObjective
+from src.stochastic_min import StochasticMinimization
+from src.unconstrained_min import LineSearchMinimization
+
+
+class TestOutOfCore(unittest.TestCase):
+    N_SAMPLES = 50_000
+    CHUNK_SIZE = 1_000
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+    MAX_ITER = 100
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def save(self, problem, targets):
+        """
+        Writes the dataset of problem to .npy files, chunk by chunk through a memory map.
+        """
+        paths = (os.path.join(self.directory.name, "A.npy"), os.path.join(self.directory.name, "b.npy"))
+        A = np.lib.format.open_memmap(paths[0], mode="w+", shape=problem.A.shape)
+        for start in range(0, problem.n_samples, self.CHUNK_SIZE):
+            A[start:start + self.CHUNK_SIZE] = problem.A[start:start + self.CHUNK_SIZE]
+        A.flush()
+        del A
+        np.save(paths[1], targets)
+        return paths
+
+    def test_chunked_objective(self):
+        rng = np.random.default_rng(0)
+        problems = {
+            "least_squares": least_squares(self.N_SAMPLES),
+            "logistic": logistic_regression(self.N_SAMPLES, regularization=1e-3),
+        }
+        for loss, problem in problems.items():
+            print(f"Testing loss: {loss}")
+            targets = problem.b if loss == "least_squares" else problem.y
+            regularization = 0.0 if loss == "least_squares" else problem.regularization
+            with ChunkedObjective(
+                *self.save(problem, targets), loss=loss, chunk_size=self.CHUNK_SIZE, max_workers=4,
+                regularization=regularization,
+            ) as objective:
+                self.assertIsInstance(objective.A, np.memmap)
+                # the chunked sums match the in-memory objective
+                x = rng.normal(size=problem.n)
+                f_x, g_x, h_x = objective(x, True)
+                f_ref, g_ref, h_ref = problem(x, True)
+                self.assertAlmostEqual(f_x, f_ref)
+                np.testing.assert_allclose(g_x, g_ref, atol=1e-12)
+                np.testing.assert_allclose(h_x, h_ref, atol=1e-12)
+                self.assertEqual(objective.chunk_evaluations, self.N_SAMPLES // self.CHUNK_SIZE)
+                indices = rng.choice(self.N_SAMPLES, size=100, replace=False)
+                np.testing.assert_allclose(objective.minibatch(x, indices)[1], problem.minibatch(x, indices)[1])
+
+                # and solve to the same minimum
+                x_ref, _, _ = LineSearchMinimization(method="newton_cholesky").unconstrained_minimization(
+                    f=problem, x0=problem.x0, obj_tol=self.OBJ_TOL, param_tol=self.PARAM_TOL, max_iter=self.MAX_ITER,
+                )
+                minimizer = LineSearchMinimization(method="newton_cholesky")
+                x, f_x, success = minimizer.unconstrained_minimization(
+                    f=objective,
+                    x0=objective.x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+                print(f"iterations: {len(minimizer.x_path)}, chunks: {objective.chunk_evaluations}, success: {success}")
+                self.assertTrue(success)
+                np.testing.assert_allclose(x, x_ref, atol=1e-6)
+
+                # a copy in another process re-opens the memory maps
+                copy = pickle.loads(pickle.dumps(objective))
+                self.assertIsInstance(copy.A, np.memmap)
+                self.assertAlmostEqual(copy(x, False)[0], f_x)
+
+                minimizer = StochasticMinimization(method="sgd", variance_reduction=True, seed=0)
+                x_sgd, _, _ = minimizer.stochastic_minimization(
+                    f=objective.minibatch, x0=objective.x0, n_samples=objective.n_samples, obj_tol=1e-10, max_epochs=3,
+                )
+                np.testing.assert_allclose(x_sgd, x_ref, atol=1e-2)
+
+    def test_constrained(self):
+        # nonnegative least squares through the barrier method
+        problem = least_squares(self.N_SAMPLES)
+        n = problem.n
+        with ChunkedObjective(*self.save(problem, problem.b), chunk_size=self.CHUNK_SIZE) as objective:
+            x, f_x, success = InteriorPointMinimizer().interior_pt(
+                func=objective,
+                ineq_constraints=np.array([]),
+                eq_constraints_mat=np.array([]),
+                eq_constraints_rhs=np.array([]),
+                x0=np.ones(n),
+                tol=1e-10,
+                ineq_constraints_mat=-np.eye(n),
+                ineq_constraints_rhs=np.zeros(n),
+            )
+        print(f"(x): {x.round(4)}, f(x): {f_x}, success: {success}")
+        self.assertTrue(success)
+        self.assertTrue(np.all(x >= 0))
+        # the KKT conditions of the bound constraints
+        g_x = problem(x, False)[1]
+        active = x < 1e-6
+        np.testing.assert_allclose(g_x[~active], 0, atol=1e-6)
+        self.assertTrue(np.all(g_x[active] > -1e-6))
+
+    def test_peak_memory(self):
+        problem = least_squares(self.N_SAMPLES)
+        with ChunkedObjective(*self.save(problem, problem.b), chunk_size=self.CHUNK_SIZE, max_workers=2) as objective:
+            x = np.ones(problem.n)
+            objective(x, True)
+            tracemalloc.start()
+            objective(x, True)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        data_size = problem.A.nbytes
+        print(f"dataset: {data_size} bytes, peak memory: {peak} bytes")
+        self.assertLess(peak, data_size / 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
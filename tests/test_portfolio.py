@@ -0,0 +1,105 @@
+import os
+import unittest
+import numpy as np
+
+from examples import (
+    test_rosenbrock,
+    test_qp,
+    test_qp_ineq_constraint_1,
+    test_qp_ineq_constraint_2,
+    test_qp_ineq_constraint_3,
+    LinearProblem,
+)
+from src.constrained_min import InteriorPointMinimizer
+from src.portfolio import PortfolioRunner
+from src.unconstrained_min import LineSearchMinimization
+
+
+class TestPortfolio(unittest.TestCase):
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+    MAX_ITER = 100
+
+    def problems(self):
+        starts = np.random.default_rng(0).uniform(-2, 2, size=(20, 2))
+        for x0 in starts:
+            yield LineSearchMinimization(method="newton_cholesky"), {
+                "f": test_rosenbrock,
+                "x0": x0,
+                "obj_tol": self.OBJ_TOL,
+                "param_tol": self.PARAM_TOL,
+                "max_iter": self.MAX_ITER,
+            }
+        yield InteriorPointMinimizer(), {
+            "func": test_qp,
+            "ineq_constraints": np.array([
+                test_qp_ineq_constraint_1,
+                test_qp_ineq_constraint_2,
+                test_qp_ineq_constraint_3,
+            ]),
+            "eq_constraints_mat": np.array([[1, 1, 1]]),
+            "eq_constraints_rhs": np.array([1]),
+            "x0": np.array([0.1, 0.2, 0.7]),
+        }
+
+    def test_portfolio_runner(self):
+        runner = PortfolioRunner(max_workers=2, chunk_size=4)
+        results = runner.solve(self.problems())
+        print(
+            f"problems: {results.shape[0]}, successes: {results['success'].sum()}, "
+            f"workers: {np.unique(results['worker']).shape[0]}, solve time: {results['time'].sum():.3f}s"
+        )
+        self.assertEqual(results.dtype, PortfolioRunner.RESULTS_DTYPE)
+        np.testing.assert_array_equal(results["index"], np.arange(len(list(self.problems()))))
+
+        # the same results as a sequential solve
+        for row, (minimizer, kwargs) in zip(results, self.problems()):
+            solve = getattr(minimizer, PortfolioRunner.SOLVE_METHODS[type(minimizer).__name__])
+            x, f_x, success = solve(**kwargs)
+            np.testing.assert_allclose(runner.locations[row["index"]], x)
+            self.assertEqual(row["f"], f_x)
+            self.assertEqual(row["success"], success)
+            self.assertGreater(row["iterations"], 0)
+
+        # the results are streamed back as the chunks finish, to a caller without the BLAS limits of the workers
+        saved = {variable: os.environ.pop(variable, None) for variable in PortfolioRunner.BLAS_ENVIRONMENT_VARIABLES}
+        try:
+            streamed = []
+            for row, x in PortfolioRunner(max_workers=2).run(self.problems()):
+                streamed.append(row)
+                for variable in PortfolioRunner.BLAS_ENVIRONMENT_VARIABLES:
+                    self.assertNotIn(variable, os.environ)
+        finally:
+            os.environ.update({variable: value for variable, value in saved.items() if value is not None})
+        self.assertEqual(sorted(row[0] for row in streamed), list(results["index"]))
+
+    def test_failing_problem(self):
+        # x <= -1 and x >= 1 have no strictly feasible point, Phase I raises
+        infeasible = (InteriorPointMinimizer(), {
+            "func": LinearProblem(np.ones(1)),
+            "ineq_constraints": np.array([]),
+            "eq_constraints_mat": np.array([]),
+            "eq_constraints_rhs": np.array([]),
+            "x0": np.zeros(1),
+            "ineq_constraints_mat": np.array([[1.0], [-1.0]]),
+            "ineq_constraints_rhs": np.array([-1.0, -1.0]),
+        })
+        problems = list(self.problems())
+        problems.insert(3, infeasible)
+        runner = PortfolioRunner(max_workers=2, chunk_size=4)
+        results = runner.solve(problems)
+        print(f"error: {results['error'][3]}")
+
+        # one row per problem, the failure in its own row only
+        np.testing.assert_array_equal(results["index"], np.arange(len(problems)))
+        self.assertFalse(results["success"][3])
+        self.assertTrue(np.isnan(results["f"][3]))
+        self.assertIn("ValueError", results["error"][3])
+        self.assertIsNone(runner.locations[3])
+        others = np.delete(results, 3)
+        self.assertTrue(np.all(others["error"] == ""))
+        self.assertTrue(np.all(np.isfinite(others["f"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
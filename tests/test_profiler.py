@@ -0,0 +1,120 @@
+import unittest
+import numpy as np
+
+from examples import (
+    test_rosenbrock,
+    test_lp,
+    test_lp_ineq_constraint_1,
+    test_lp_ineq_constraint_2,
+    test_lp_ineq_constraint_3,
+    test_lp_ineq_constraint_4,
+)
+from src.constrained_min import InteriorPointMinimizer
+from src.primal_dual_min import PrimalDualInteriorPointMinimizer
+from src.profiler import NULL_PROFILER, Profiler
+from src.unconstrained_min import LineSearchMinimization
+
+
+class TestProfiler(unittest.TestCase):
+    ROSENBROCK_X0 = np.array([-1, 2]).T
+    LP_X0 = np.array([0.5, 0.75])
+    LP_INEQ_CONSTRAINTS = np.array([
+        test_lp_ineq_constraint_1,
+        test_lp_ineq_constraint_2,
+        test_lp_ineq_constraint_3,
+        test_lp_ineq_constraint_4,
+    ])
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+    MAX_ITER = 100
+
+    def solve_lp(self, minimizer, callback=None):
+        return minimizer.interior_pt(
+            func=test_lp,
+            ineq_constraints=self.LP_INEQ_CONSTRAINTS,
+            eq_constraints_mat=np.array([]),
+            eq_constraints_rhs=np.array([]),
+            x0=self.LP_X0,
+            callback=callback,
+        )
+
+    def test_unconstrained_profiler_and_callback(self):
+        for method in ["newton_cholesky", "bfgs"]:
+            profiler = Profiler()
+            states = []
+            minimizer = LineSearchMinimization(method=method, profiler=profiler)
+            x, f_x, success = minimizer.unconstrained_minimization(
+                f=test_rosenbrock,
+                x0=self.ROSENBROCK_X0,
+                obj_tol=self.OBJ_TOL,
+                param_tol=self.PARAM_TOL,
+                max_iter=self.MAX_ITER,
+                callback=states.append,
+            )
+            print(f"method: {method}\n{profiler.report()}")
+            self.assertTrue(success)
+            self.assertEqual(profiler.counts["objective"], minimizer.evaluation_counts["f"])
+            self.assertEqual(profiler.counts["direction"], len(minimizer.x_path))
+            self.assertEqual(profiler.counts["line_search"], len(minimizer.x_path))
+            self.assertEqual(method == "bfgs", "curvature_update" in profiler.counts)
+            self.assertLessEqual(profiler.times["objective"], sum(profiler.times.values()))
+            self.assertEqual(len(states), len(minimizer.x_path))
+            np.testing.assert_allclose([state["x"] for state in states], minimizer.x_path)
+            np.testing.assert_allclose([state["f"] for state in states], minimizer.f_path)
+
+        # a callback returning True stops the solve
+        minimizer = LineSearchMinimization(method="newton_cholesky")
+        x, f_x, success = minimizer.unconstrained_minimization(
+            f=test_rosenbrock,
+            x0=self.ROSENBROCK_X0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER,
+            callback=lambda state: state["iteration"] == 2,
+        )
+        self.assertFalse(success)
+        self.assertEqual(len(minimizer.x_path), 3)
+
+    def test_constrained_profiler_and_callback(self):
+        for minimizer_class, phases in [
+            (InteriorPointMinimizer, ["objective", "barrier", "kkt", "line_search"]),
+            (PrimalDualInteriorPointMinimizer, ["objective", "constraints", "kkt", "step"]),
+        ]:
+            profiler = Profiler()
+            states = []
+            minimizer = minimizer_class(profiler=profiler)
+            x, f_x, success = self.solve_lp(minimizer, callback=states.append)
+            print(f"minimizer: {minimizer_class.__name__}\n{profiler.report()}")
+            self.assertTrue(success)
+            self.assertEqual(set(profiler.counts), set(phases))
+            self.assertGreater(len(states), 0)
+
+            stopped = minimizer_class()
+            _, _, success = self.solve_lp(stopped, callback=lambda state: len(stopped.x_path_inner) == 3)
+            self.assertFalse(success)
+            self.assertEqual(len(stopped.x_path_inner), 3)
+
+    def test_null_profiler(self):
+        minimizer = LineSearchMinimization(method="newton")
+        self.assertIs(minimizer.profiler, NULL_PROFILER)
+        self.assertIs(NULL_PROFILER.phase("direction"), NULL_PROFILER.phase("line_search"))
+        self.assertIs(NULL_PROFILER.wrap("objective", test_rosenbrock), test_rosenbrock)
+        self.assertEqual(NULL_PROFILER.summary(), {})
+
+        ticks = iter(range(100))
+        profiler = Profiler(clock=lambda: next(ticks))
+        with profiler.phase("outer"):
+            with profiler.phase("inner"):
+                pass
+        profiler.count("events", 3)
+        self.assertEqual(profiler.summary(), {
+            "inner": {"time": 1, "calls": 1},
+            "outer": {"time": 3, "calls": 1},
+            "events": {"time": 0.0, "calls": 3},
+        })
+        profiler.reset()
+        self.assertEqual(profiler.summary(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
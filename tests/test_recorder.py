@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from examples import test_rosenbrock
+from src.recorder import PathRecorder
+from src.unconstrained_min import LineSearchMinimization
+
+
+class TestPathRecorder(unittest.TestCase):
+    x0 = np.array([-1, 2])
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+    MAX_ITER = 1_000
+
+    def solve(self, recorder):
+        minimizer = LineSearchMinimization(method="gradient_descent", recorder=recorder)
+        minimizer.unconstrained_minimization(
+            f=test_rosenbrock,
+            x0=self.x0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER,
+        )
+        return minimizer
+
+    def test_modes(self):
+        full = self.solve(PathRecorder()).recorder
+        print(f"mode: full - records: {len(full)}")
+        self.assertEqual(len(full), self.MAX_ITER)
+        self.assertEqual(full.x.shape, (self.MAX_ITER, 2))
+        np.testing.assert_allclose(full.x[0], self.x0)
+
+        off = self.solve(PathRecorder(mode="off")).recorder
+        self.assertEqual(len(off), 0)
+        self.assertEqual(off.iterations, self.MAX_ITER)
+        self.assertEqual(off.x.shape, (0, 0))
+        self.assertEqual(off.f.shape, (0,))
+
+        every = self.solve(PathRecorder(mode="every", k=7)).recorder
+        np.testing.assert_allclose(every.x, full.x[::7])
+        np.testing.assert_allclose(every.f, full.f[::7])
+
+        last = self.solve(PathRecorder(mode="last", n=50)).recorder
+        np.testing.assert_allclose(last.x, full.x[-50:])
+        np.testing.assert_allclose(last.f, full.f[-50:])
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "path.npy")
+            # the solve closes the recorder, the file holds the recorded iterates only
+            memmap = self.solve(PathRecorder(mode="memmap", filename=filename)).recorder
+            spilled = np.load(filename, mmap_mode="r")
+            print(f"mode: memmap - records: {spilled.shape[0]}")
+            self.assertEqual(spilled.shape, (self.MAX_ITER,))
+            np.testing.assert_allclose(spilled["x"], full.x)
+            np.testing.assert_allclose(spilled["f"], full.f)
+            del spilled
+            # a closed recorder grows again
+            memmap.append(np.zeros(2), -1.0)
+            self.assertEqual(len(memmap), self.MAX_ITER + 1)
+            self.assertEqual(memmap.f[-1], -1.0)
+            del memmap
+
+    def test_reused_minimizer(self):
+        minimizer = self.solve(None)
+        records = len(minimizer.x_path)
+        minimizer.unconstrained_minimization(
+            f=test_rosenbrock,
+            x0=self.x0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER,
+        )
+        self.assertEqual(len(minimizer.x_path), records)
+
+
+if __name__ == "__main__":
+    unittest.main()
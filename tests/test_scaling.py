@@ -0,0 +1,135 @@
+import unittest
+import numpy as np
+from scipy import sparse
+
+from examples import (
+    ellipses,
+    sparse_lp,
+    LinearProblem,
+    QuadraticProblem,
+    RosenbrockProblem,
+)
+from src.constrained_min import InteriorPointMinimizer
+from src.scaling import ProblemScaling, ScaledObjective, hessian_diagonal, ruiz_column_scale
+from src.trust_region_min import TrustRegionMinimization
+from src.unconstrained_min import LineSearchMinimization
+
+
+class TestScaling(unittest.TestCase):
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+    MAX_ITER = 10_000
+
+    def test_scaled_objective(self):
+        rng = np.random.default_rng(0)
+        problem = RosenbrockProblem()
+        scale = np.array([10.0, 0.1])
+        scaled = ScaledObjective(problem, scale)
+        z = rng.normal(size=2)
+        f_x, g_x, h_x = problem(scale * z, True)
+        f_z, g_z, h_z = scaled(z, True)
+        self.assertEqual(f_z, f_x)
+        np.testing.assert_allclose(g_z, scale * g_x)
+        np.testing.assert_allclose(h_z, np.diag(scale) @ h_x @ np.diag(scale))
+
+        # the finite differences of the gradient when there is no Hessian
+        gradient_only = lambda x, hessian_flag: problem(x, False)
+        np.testing.assert_allclose(hessian_diagonal(gradient_only, z), np.diag(problem(z, True)[2]), rtol=1e-5)
+
+        # the equilibrated matrix has its largest entries close to 1 in every row and column
+        mat = rng.normal(size=(5, 8)) * np.logspace(-4, 4, 8) * np.logspace(3, -3, 5)[:, None]
+        for m in [mat, sparse.csr_matrix(mat)]:
+            column_scale = ruiz_column_scale(m, iterations=20)
+            equilibrated = np.abs(mat * column_scale)
+            equilibrated /= equilibrated.max(axis=1)[:, None]
+            np.testing.assert_allclose(equilibrated.max(axis=0), 1, rtol=0.1)
+
+    def test_unconstrained_scaling(self):
+        # quadratics whose variables are in units across eight orders of magnitude
+        problems = [
+            (ellipses(2), np.array([1.0, 1.0])),
+            (QuadraticProblem(np.diag(np.logspace(-4, 4, 10))), np.ones(10)),
+        ]
+        for problem, x0 in problems:
+            for method in ["gradient_descent", "newton_cg"]:
+                print(f"Testing method: {method}, n: {x0.shape[0]}")
+                unscaled = LineSearchMinimization(method)
+                unscaled.unconstrained_minimization(problem, x0, self.OBJ_TOL, self.PARAM_TOL, self.MAX_ITER)
+                minimizer = LineSearchMinimization(method)
+                x, f_x, success = ProblemScaling().minimize(
+                    minimizer, f=problem, x0=x0, obj_tol=self.OBJ_TOL, param_tol=self.PARAM_TOL, max_iter=self.MAX_ITER,
+                )
+                print(f"iterations: {len(unscaled.x_path)} unscaled, {len(minimizer.x_path)} scaled")
+                self.assertTrue(success)
+                self.assertLessEqual(len(minimizer.x_path), len(unscaled.x_path))
+                np.testing.assert_allclose(x, 0, atol=1e-6)
+                # the path is in the original variables
+                np.testing.assert_allclose(minimizer.x_path[0], x0)
+                np.testing.assert_allclose(minimizer.x_path[-1], x)
+                self.assertEqual(minimizer.f_path[0], problem(x0, False)[0])
+            # a diagonal Hessian is the identity in the scaled variables
+            self.assertLess(len(minimizer.x_path), 5)
+
+        # the scaled Hessian-vector products of the trust region
+        problem, x0 = problems[1]
+        unscaled = TrustRegionMinimization()
+        unscaled.unconstrained_minimization(problem, x0, self.OBJ_TOL, self.PARAM_TOL, 100, hessp=problem.hessp)
+        minimizer = TrustRegionMinimization()
+        recorder = minimizer.recorder
+        x, f_x, success = ProblemScaling().minimize(
+            minimizer,
+            f=problem,
+            x0=x0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=100,
+            hessp=problem.hessp,
+        )
+        print(f"Hessian-vector products: {unscaled.hessian_vector_products} unscaled, "
+              f"{minimizer.hessian_vector_products} scaled")
+        self.assertTrue(success)
+        np.testing.assert_allclose(x, 0, atol=1e-6)
+        self.assertIs(minimizer.recorder, recorder)
+        self.assertLess(minimizer.hessian_vector_products, unscaled.hessian_vector_products)
+
+    def test_constrained_scaling(self):
+        # the LP in the variables x = d * y, with columns in units across six orders of magnitude
+        n = 100
+        problem = sparse_lp(n)
+        d = np.logspace(-3, 3, n)
+        A = problem["eq_constraints_mat"]
+        G = problem["ineq_constraints_mat"]
+        reference = InteriorPointMinimizer()
+        y, f_y, success = reference.interior_pt(tol=1e-10, **problem)
+        self.assertTrue(success)
+
+        for dense in [False, True]:
+            units = dict(
+                problem,
+                func=LinearProblem(problem["func"].a / d, sparse_hessian=not dense),
+                eq_constraints_mat=(A @ sparse.diags(1 / d)).tocsr(),
+                ineq_constraints_mat=(G @ sparse.diags(1 / d)).tocsr(),
+                x0=d * problem["x0"],
+            )
+            if dense:
+                units["eq_constraints_mat"] = units["eq_constraints_mat"].toarray()
+                units["ineq_constraints_mat"] = units["ineq_constraints_mat"].toarray()
+            for method in ProblemScaling.METHODS:
+                minimizer = InteriorPointMinimizer()
+                scaling = ProblemScaling(method)
+                x, f_x, success = scaling.minimize(minimizer, tol=1e-10, **units)
+                print(f"dense: {dense}, method: {method}, newton systems: {minimizer.newton_systems}, f: {f_x}")
+                self.assertTrue(success)
+                self.assertAlmostEqual(f_x, f_y, places=6)
+                np.testing.assert_allclose(x / d, y, atol=1e-5)
+                np.testing.assert_allclose(minimizer.x_path_inner[0], units["x0"])
+                np.testing.assert_allclose(minimizer.x_path_outer[-1], x, atol=1e-8)
+                # the multipliers of the original rows, lambda_i * (h - G x)_i = 1 / t on the central path,
+                # and the change of units leaves the multipliers of A unchanged
+                slackness = minimizer.lambda_ * (units["ineq_constraints_rhs"] - units["ineq_constraints_mat"] @ x)
+                np.testing.assert_allclose(slackness, slackness.mean(), rtol=1e-2)
+                np.testing.assert_allclose(minimizer.nu, reference.nu, rtol=1e-4, atol=1e-8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import itertools
+import unittest
+import numpy as np
+
+from examples import (
+    box_lp,
+    test_rosenbrock,
+)
+from src.constrained_min import InteriorPointMinimizer
+from src.stepwise import SteppedSolve, solve_async
+from src.trust_region_min import TrustRegionMinimization
+from src.unconstrained_min import LineSearchMinimization
+
+
+class TestStepwise(unittest.TestCase):
+    OBJ_TOL = 1e-12
+    PARAM_TOL = 1e-8
+    MAX_ITER = 10_000
+
+    def rosenbrock(self, **kwargs):
+        return dict(
+            f=test_rosenbrock,
+            x0=np.array([-1.0, 2.0]),
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER,
+            **kwargs,
+        )
+
+    def test_stepped_solve(self):
+        # the steps follow the path of the blocking solve
+        for minimizer in [LineSearchMinimization("newton"), TrustRegionMinimization()]:
+            print(f"Testing minimizer: {type(minimizer).__name__}")
+            x, f_x, success = minimizer.unconstrained_minimization(**self.rosenbrock())
+            x_path = minimizer.x_path
+            with SteppedSolve(minimizer, **self.rosenbrock()) as solve:
+                states = [state["x"] for state in solve]
+            self.assertEqual(solve.stop_reason, "success")
+            self.assertEqual(solve.iterations, len(states))
+            np.testing.assert_array_equal(solve.result[0], x)
+            np.testing.assert_array_equal(minimizer.x_path, x_path)
+            self.assertFalse(solve._thread.is_alive())
+
+        problem = box_lp(3)
+        solve = SteppedSolve(InteriorPointMinimizer(), tol=1e-10, **problem)
+        for state in solve:
+            self.assertTrue(np.all(state["x"] <= [2, 1, 1]))
+        self.assertEqual(solve.stop_reason, "success")
+        np.testing.assert_allclose(solve.result[0], [2, 1, 1], atol=1e-6)
+
+    def test_budgets(self):
+        solve = SteppedSolve(LineSearchMinimization("gradient_descent"), max_evaluations=1_000, **self.rosenbrock())
+        for state in solve:
+            self.assertLess(solve.evaluations, 1_000)
+        x, f_x, success = solve.result
+        print(f"iterations: {solve.iterations}, evaluations: {solve.evaluations}, f(x): {f_x}")
+        self.assertEqual(solve.stop_reason, "max_evaluations")
+        self.assertFalse(success)
+        self.assertEqual(f_x, test_rosenbrock(x, False)[0])
+        self.assertLess(f_x, test_rosenbrock(np.array([-1.0, 2.0]), False)[0])
+
+        # a clock ticking one second per reading, read twice per iteration, the budget runs out in the 5th one
+        solve = SteppedSolve(
+            LineSearchMinimization("gradient_descent"),
+            max_time=10,
+            clock=itertools.count().__next__,
+            **self.rosenbrock(),
+        )
+        self.assertEqual(len(list(solve)), 5)
+        self.assertEqual(solve.stop_reason, "max_time")
+
+        # the callback of the arguments is still called, and can stop the solve
+        iterations = []
+        callback = lambda state: iterations.append(state) or len(iterations) == 5
+        solve = SteppedSolve(LineSearchMinimization("newton"), **self.rosenbrock(callback=callback))
+        self.assertEqual(len(list(solve)), 4)
+        self.assertEqual(solve.stop_reason, "callback")
+
+    def test_cancel(self):
+        solve = SteppedSolve(LineSearchMinimization("gradient_descent"), **self.rosenbrock())
+        for i, state in enumerate(solve):
+            if i == 9:
+                solve.cancel()
+        self.assertEqual(solve.stop_reason, "cancelled")
+        self.assertEqual(solve.iterations, 10)
+        self.assertFalse(solve._thread.is_alive())
+
+        # closing stops a solve that waits for its next step, and one that never started
+        solve = SteppedSolve(LineSearchMinimization("gradient_descent"), **self.rosenbrock())
+        next(solve)
+        solve.close()
+        self.assertEqual(solve.stop_reason, "cancelled")
+        self.assertEqual(solve.iterations, 1)
+        self.assertFalse(solve._thread.is_alive())
+        solve = SteppedSolve(LineSearchMinimization("gradient_descent"), **self.rosenbrock())
+        solve.close()
+        self.assertEqual(solve.stop_reason, "cancelled")
+        self.assertIsNone(solve._thread)
+
+    def test_solve_async(self):
+        async def solve_all():
+            # the solves advance side by side, every one of them with one iteration at most in flight
+            turns = []
+            results = await asyncio.gather(*[
+                solve_async(
+                    LineSearchMinimization("gradient_descent"),
+                    max_evaluations=300,
+                    **self.rosenbrock(callback=lambda state, i=i: turns.append(i)),
+                )
+                for i in range(4)
+            ])
+            for x, f_x, success in results:
+                self.assertFalse(success)
+                np.testing.assert_array_equal(x, results[0][0])
+            first_finished = min(max(j for j, turn in enumerate(turns) if turn == i) for i in range(4))
+            self.assertEqual(set(turns[:first_finished]), {0, 1, 2, 3})
+
+            # a cancelled task stops its solve
+            minimizer = LineSearchMinimization("gradient_descent")
+            task = asyncio.create_task(solve_async(minimizer, **self.rosenbrock()))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertLess(len(minimizer.x_path), self.MAX_ITER)
+
+        asyncio.run(solve_all())
+
+
+if __name__ == "__main__":
+    unittest.main()
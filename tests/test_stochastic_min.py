@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+
+from examples import (
+    least_squares,
+    logistic_regression,
+)
+from src.stochastic_min import StochasticMinimization
+from src.unconstrained_min import LineSearchMinimization
+
+
+class TestStochasticMin(unittest.TestCase):
+    N_SAMPLES = 20_000
+    OBJ_TOL = 1e-8
+    MAX_EPOCHS = 20
+
+    def minimum(self, problem):
+        x, f_x, success = LineSearchMinimization(method="newton_cholesky").unconstrained_minimization(
+            f=problem, x0=problem.x0, obj_tol=1e-14, param_tol=1e-10, max_iter=100,
+        )
+        self.assertTrue(success)
+        return x, f_x
+
+    def test_minibatch_protocol(self):
+        rng = np.random.default_rng(0)
+        for problem in [least_squares(1_000), logistic_regression(1_000)]:
+            x = rng.normal(size=problem.n)
+            f_x, g_x, _ = problem(x, False)
+            # the mean over all the samples is the full objective, and the mean of the batch means
+            f_all, g_all = problem.minibatch(x, np.arange(problem.n_samples))
+            self.assertAlmostEqual(f_all, f_x)
+            np.testing.assert_allclose(g_all, g_x)
+            batches = np.split(rng.permutation(problem.n_samples), 10)
+            np.testing.assert_allclose(np.mean([problem.minibatch(x, batch)[1] for batch in batches], axis=0), g_x)
+
+    def test_stochastic_minimization(self):
+        for problem in [least_squares(self.N_SAMPLES), logistic_regression(self.N_SAMPLES)]:
+            print(f"Testing problem: {type(problem).__name__}")
+            x_star, f_star = self.minimum(problem)
+            for method in StochasticMinimization.METHODS:
+                minimizer = StochasticMinimization(method=method, seed=0)
+                x, f_x, success = minimizer.stochastic_minimization(
+                    f=problem.minibatch,
+                    x0=problem.x0,
+                    n_samples=problem.n_samples,
+                    obj_tol=self.OBJ_TOL,
+                    max_epochs=self.MAX_EPOCHS,
+                )
+                excess = problem(x, False)[0] - f_star
+                print(f"method: {method} - epochs: {len(minimizer.x_path)}, excess objective: {excess}")
+                self.assertLess(excess, 1e-3)
+                self.assertEqual(minimizer.sample_gradients, len(minimizer.x_path) * problem.n_samples)
+
+            # the SVRG steps converge to the minimum with a constant learning rate
+            minimizer = StochasticMinimization(method="sgd", variance_reduction=True, seed=0)
+            x, f_x, success = minimizer.stochastic_minimization(
+                f=problem.minibatch,
+                x0=problem.x0,
+                n_samples=problem.n_samples,
+                obj_tol=self.OBJ_TOL,
+                max_epochs=self.MAX_EPOCHS,
+            )
+            excess = problem(x, False)[0] - f_star
+            print(
+                f"method: sgd, SVRG - epochs: {len(minimizer.x_path)}, excess objective: {excess}, "
+                f"success: {success}"
+            )
+            self.assertTrue(success)
+            self.assertLess(excess, 1e-8)
+            np.testing.assert_allclose(x, x_star, atol=1e-4)
+            self.assertEqual(minimizer.sample_gradients, 3 * len(minimizer.x_path) * problem.n_samples)
+
+    def test_reproducibility(self):
+        problem = logistic_regression(1_000)
+        paths = []
+        for _ in range(2):
+            minimizer = StochasticMinimization(method="adam", batch_size=64, seed=1)
+            minimizer.stochastic_minimization(problem.minibatch, problem.x0, problem.n_samples, self.OBJ_TOL, 3)
+            paths.append(minimizer.x_path)
+        np.testing.assert_array_equal(paths[0], paths[1])
+
+        # the callback stops the solve after the second epoch
+        epochs = []
+
+        def callback(state):
+            epochs.append(state["epoch"])
+            return state["epoch"] == 1
+
+        minimizer = StochasticMinimization(method="sgd", seed=1)
+        x, f_x, success = minimizer.stochastic_minimization(
+            problem.minibatch, problem.x0, problem.n_samples, self.OBJ_TOL, 10, callback=callback,
+        )
+        self.assertFalse(success)
+        self.assertEqual(epochs, [0, 1])
+        self.assertEqual(len(minimizer.x_path), 2)
+        with self.assertRaises(ValueError):
+            StochasticMinimization(method="newton")
+
+
+if __name__ == "__main__":
+    unittest.main()
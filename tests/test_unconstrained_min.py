@@ -8,8 +8,23 @@ from examples import (
     test_rosenbrock,
     test_linear,
     test_smoothed_corner_triangles,
+    test_ellipses_batched,
+    test_rosenbrock_batched,
+    test_extended_rosenbrock,
+    circles,
+    ellipses,
+    rotated_ellipses,
+    RosenbrockProblem,
+    SmoothedCornerTrianglesProblem,
+)
+from src.batched_min import BatchedLineSearchMinimization
+from src.trust_region_min import steihaug_cg, TrustRegionMinimization
+from src.unconstrained_min import (
+    LineSearchMinimization,
+    modified_cholesky,
+    nonmonotone_line_search,
+    strong_wolfe_line_search,
 )
-from src.unconstrained_min import LineSearchMinimization
 from src.utils import (
     plot_contour,
     plot_iterations,
@@ -32,6 +47,14 @@ class TestUnconstrainedMin(unittest.TestCase):
     PARAM_TOL = 1e-8
     MAX_ITER = 100
     MAX_ITER_ROSENBROCK = 10_000
+    MAX_ITER_FIRST_ORDER = 1_000
+    MINIMA = {
+        test_circles: np.array([0, 0]),
+        test_ellipses: np.array([0, 0]),
+        test_rotated_ellipses: np.array([0, 0]),
+        test_rosenbrock: np.array([1, 1]),
+        test_smoothed_corner_triangles: np.array([-np.log(2) / 2, 0]),
+    }
 
     def test_unconstrained_minimization(self):
 
@@ -74,6 +97,375 @@ class TestUnconstrainedMin(unittest.TestCase):
                 names=self.METHODS,
             )
 
+    def test_quasi_newton_minimization(self):
+
+        for func, minimum in self.MINIMA.items():
+            print(f"Testing function: {func.__name__}")
+            for method in LineSearchMinimization.QUASI_NEWTON_METHODS:
+                x0 = self.ROSENBROCK_X0 if func == test_rosenbrock else self.x0
+                minimizer = LineSearchMinimization(method=method)
+                x, f_x, success = minimizer.unconstrained_minimization(
+                    f=func,
+                    x0=x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+                print(f"method: {method} - iterations: {len(minimizer.x_path)}, success: {success}")
+                self.assertTrue(success)
+                np.testing.assert_allclose(x, minimum, atol=1e-5)
+
+        # a large problem, where no Hessian is ever formed
+        x0 = np.tile([-1.2, 1.0], 1_000)
+        minimizer = LineSearchMinimization(method="lbfgs", history_size=5)
+        x, f_x, success = minimizer.unconstrained_minimization(
+            f=test_extended_rosenbrock,
+            x0=x0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER_ROSENBROCK,
+        )
+        print(f"method: lbfgs - n: {x0.shape[0]}, iterations: {len(minimizer.x_path)}, success: {success}")
+        self.assertTrue(success)
+        np.testing.assert_allclose(x, np.ones(x0.shape[0]), atol=1e-4)
+
+    def test_newton_variants(self):
+
+        for func, minimum in self.MINIMA.items():
+            print(f"Testing function: {func.__name__}")
+            for method in ["newton_cholesky", "newton_cg"]:
+                x0 = self.ROSENBROCK_X0 if func == test_rosenbrock else self.x0
+                minimizer = LineSearchMinimization(method=method)
+                x, f_x, success = minimizer.unconstrained_minimization(
+                    f=func,
+                    x0=x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+                print(f"method: {method} - iterations: {len(minimizer.x_path)}, success: {success}")
+                self.assertTrue(success)
+                np.testing.assert_allclose(x, minimum, atol=1e-5)
+
+        # the modified Cholesky factorization shifts an indefinite Hessian
+        hess = test_rosenbrock(np.array([0, 1]), True)[2]
+        factor, _ = modified_cholesky(hess)
+        shifted = np.triu(factor).T @ np.triu(factor)
+        self.assertLess(np.min(np.linalg.eigvalsh(hess)), 0)
+        self.assertTrue(np.all(np.linalg.eigvalsh(shifted) > 0))
+        np.testing.assert_allclose(shifted - hess, np.eye(2) * (shifted - hess)[0, 0])
+
+        # a large problem, solved with Hessian-vector products only
+        x0 = np.tile([-1.2, 1.0], 5_000)
+        minimizer = LineSearchMinimization(method="newton_cg")
+        x, f_x, success = minimizer.unconstrained_minimization(
+            f=test_extended_rosenbrock,
+            x0=x0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER,
+        )
+        print(f"method: newton_cg - n: {x0.shape[0]}, iterations: {len(minimizer.x_path)}, success: {success}")
+        self.assertTrue(success)
+        self.assertEqual(minimizer.evaluation_counts["hess"], 0)
+        np.testing.assert_allclose(x, np.ones(x0.shape[0]), atol=1e-4)
+
+    def test_accelerated_first_order(self):
+
+        for func, minimum in self.MINIMA.items():
+            print(f"Testing function: {func.__name__}")
+            x0 = self.ROSENBROCK_X0 if func == test_rosenbrock else self.x0
+            iterations = {}
+            for method in ["gradient_descent", "nesterov", "barzilai_borwein"]:
+                minimizer = LineSearchMinimization(method=method)
+                x, f_x, success = minimizer.unconstrained_minimization(
+                    f=func,
+                    x0=x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER_ROSENBROCK,
+                )
+                iterations[method] = len(minimizer.x_path)
+                print(f"method: {method} - iterations: {iterations[method]}, success: {success}")
+                self.assertEqual(minimizer.evaluation_counts["hess"], 0)
+                if method == "gradient_descent":
+                    continue
+                self.assertTrue(success)
+                self.assertLessEqual(iterations[method], self.MAX_ITER_FIRST_ORDER)
+                np.testing.assert_allclose(x, minimum, atol=1e-3)
+            self.assertLessEqual(iterations["nesterov"], iterations["gradient_descent"])
+            self.assertLessEqual(iterations["barzilai_borwein"], iterations["gradient_descent"])
+
+        # the nonmonotone line search accepts a step that increases f up to the largest recent value
+        p = -test_ellipses(self.x0, False)[1]
+        f_x = test_ellipses(self.x0, False)[0]
+        alpha, _ = nonmonotone_line_search(test_ellipses, self.x0, p, alpha=0.03, c=0.01, t=0.5, f_max=f_x)
+        alpha_increase, _ = nonmonotone_line_search(
+            test_ellipses, self.x0, p, alpha=0.03, c=0.01, t=0.5, f_max=10 * f_x
+        )
+        self.assertLess(alpha, 0.03)
+        self.assertEqual(alpha_increase, 0.03)
+        self.assertGreater(test_ellipses(self.x0 + alpha_increase * p, False)[0], f_x)
+
+    def test_trust_region(self):
+
+        for func, minimum in self.MINIMA.items():
+            print(f"Testing function: {func.__name__}")
+            x0 = self.ROSENBROCK_X0 if func == test_rosenbrock else self.x0
+            minimizer = TrustRegionMinimization()
+            x, f_x, success = minimizer.unconstrained_minimization(
+                f=func,
+                x0=x0,
+                obj_tol=self.OBJ_TOL,
+                param_tol=self.PARAM_TOL,
+                max_iter=self.MAX_ITER,
+            )
+            print(
+                f"method: trust_region - iterations: {len(minimizer.x_path)}, "
+                f"evaluations: {minimizer.evaluation_counts}, rejected steps: {minimizer.rejected_steps}"
+            )
+            self.assertTrue(success)
+            self.assertEqual(minimizer.evaluation_counts["hess"], 0)
+            np.testing.assert_allclose(x, minimum, atol=1e-5)
+            # the accepted steps decrease the objective
+            self.assertTrue(np.all(np.diff(minimizer.f_path) < 0))
+
+        # fewer objective evaluations than Newton with backtracking on Rosenbrock
+        newton = LineSearchMinimization(method="newton")
+        newton.unconstrained_minimization(
+            f=test_rosenbrock,
+            x0=self.ROSENBROCK_X0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER_ROSENBROCK,
+        )
+        minimizer = TrustRegionMinimization()
+        minimizer.unconstrained_minimization(
+            f=test_rosenbrock,
+            x0=self.ROSENBROCK_X0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER,
+            hessp=RosenbrockProblem().hessp,
+        )
+        print(f"evaluations: newton {newton.evaluation_counts['f']}, trust_region {minimizer.evaluation_counts['f']}")
+        self.assertLess(minimizer.evaluation_counts["f"], newton.evaluation_counts["f"])
+
+        # on the unbounded linear problem the steps stay within the largest radius
+        minimizer = TrustRegionMinimization()
+        x, f_x, success = minimizer.unconstrained_minimization(
+            f=test_linear,
+            x0=self.x0,
+            obj_tol=self.OBJ_TOL,
+            param_tol=self.PARAM_TOL,
+            max_iter=self.MAX_ITER,
+            max_radius=10,
+        )
+        steps = np.linalg.norm(np.diff(minimizer.x_path, axis=0), axis=1)
+        print(f"method: trust_region - f(x, y): {round(f_x, 3)}, largest step: {steps.max()}, success: {success}")
+        self.assertFalse(success)
+        self.assertTrue(np.all(steps <= 10 + 1e-9))
+        self.assertTrue(np.all(np.diff(minimizer.f_path) < 0))
+
+        # the subproblem step, inside the region it solves the Newton system to the forcing
+        # tolerance, else it is on the boundary
+        hess = test_rosenbrock(np.array([0, 1]), True)[2]
+        grad = test_rosenbrock(np.array([0, 1]), False)[1]
+        p, hp, on_boundary = steihaug_cg(lambda v: hess @ v, grad, radius=0.5)
+        self.assertTrue(on_boundary)
+        self.assertAlmostEqual(np.linalg.norm(p), 0.5)
+        np.testing.assert_allclose(hp, hess @ p)
+        hess = test_ellipses(self.x0, True)[2]
+        grad = test_ellipses(self.x0, False)[1]
+        p, hp, on_boundary = steihaug_cg(lambda v: hess @ v, grad, radius=100)
+        self.assertFalse(on_boundary)
+        grad_norm = np.linalg.norm(grad)
+        self.assertLess(np.linalg.norm(hess @ p + grad), min(0.5, np.sqrt(grad_norm)) * grad_norm)
+        np.testing.assert_allclose(hp, hess @ p)
+
+    def test_evaluation_counts(self):
+
+        for func in self.TEST_FUNCTIONS:
+            print(f"Testing function: {func.__name__}")
+            for method in self.METHODS + LineSearchMinimization.QUASI_NEWTON_METHODS:
+                calls = {"f": 0, "hess": 0}
+
+                def counted_func(x, hessian_flag):
+                    calls["f"] += 1
+                    calls["hess"] += int(hessian_flag)
+                    return func(x, hessian_flag)
+
+                x0 = self.ROSENBROCK_X0 if func == test_rosenbrock else self.x0
+                minimizer = LineSearchMinimization(method=method)
+                minimizer.unconstrained_minimization(
+                    f=counted_func,
+                    x0=x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+                counts = minimizer.evaluation_counts
+                iterations = len(minimizer.line_search_evaluations)
+                trials = sum(minimizer.line_search_evaluations)
+                print(f"method: {method} - iterations: {iterations}, trials: {trials}, evaluations: {counts}")
+                self.assertEqual(counts["f"], calls["f"])
+                self.assertEqual(counts["hess"], calls["hess"])
+                self.assertEqual(counts["grad"], calls["f"])
+
+                # without the cache, the same path costs an evaluation of every iterate, every line search
+                # trial and every termination test
+                uncached = LineSearchMinimization(method=method)
+                uncached.unconstrained_minimization(
+                    f=func,
+                    x0=x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                    cache_size=0,
+                )
+                np.testing.assert_array_equal(uncached.x_path, minimizer.x_path)
+                self.assertGreaterEqual(uncached.evaluation_counts["f"], iterations + trials)
+                self.assertLess(counts["f"], uncached.evaluation_counts["f"])
+                # with it, every evaluation but those of x0 and of the Hessians is a line search trial
+                self.assertLessEqual(counts["f"] - counts["hess"], trials + 1)
+                if counts["hess"] == 0:
+                    self.assertLess(counts["f"], iterations + trials)
+
+    def test_strong_wolfe_line_search(self):
+        c1 = 0.01
+        c2 = 0.9
+
+        for func in self.TEST_FUNCTIONS:
+            if func == test_linear:
+                continue
+            print(f"Testing function: {func.__name__}")
+            x0 = self.ROSENBROCK_X0 if func == test_rosenbrock else self.x0
+            f_x, grad, _ = func(x0, False)
+            alpha, trials = strong_wolfe_line_search(f=func, x=x0, p=-grad, alpha=1.0, c1=c1, c2=c2)
+            f_next, grad_next, _ = func(x0 - alpha * grad, False)
+            print(f"alpha: {alpha}, trials: {trials}")
+            self.assertLessEqual(f_next, f_x - c1 * alpha * grad @ grad)
+            self.assertLessEqual(abs(grad_next @ grad), c2 * grad @ grad)
+
+        # out of trials before any step satisfies the Armijo condition, the line search fails
+        steep = lambda x, hessian_flag: (-x[0] + 1e6 * x[0] ** 2, np.array([-1 + 2e6 * x[0]]), None)
+        self.assertEqual(strong_wolfe_line_search(steep, np.zeros(1), np.ones(1), 1.0, max_trials=3), (0.0, 3))
+        # and the solve stops unsuccessfully instead of taking the zero step as convergence, here on a
+        # gradient of the wrong sign, whose direction goes uphill
+        uphill = lambda x, hessian_flag: (x @ x, -2 * x, None)
+        minimizer = LineSearchMinimization(method="gradient_descent", line_search="strong_wolfe")
+        x, f_x, success = minimizer.unconstrained_minimization(
+            f=uphill, x0=np.ones(2), obj_tol=self.OBJ_TOL, param_tol=self.PARAM_TOL, max_iter=self.MAX_ITER,
+        )
+        self.assertFalse(success)
+        np.testing.assert_array_equal(x, np.ones(2))
+
+        for func in [test_ellipses, test_rotated_ellipses]:
+            evaluations = {}
+            for line_search in LineSearchMinimization.LINE_SEARCHES:
+                minimizer = LineSearchMinimization(method="gradient_descent", line_search=line_search)
+                x, f_x, success = minimizer.unconstrained_minimization(
+                    f=func,
+                    x0=self.x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+                evaluations[line_search] = sum(minimizer.line_search_evaluations)
+                print(
+                    f"line search: {line_search} - iterations: {len(minimizer.x_path)}, "
+                    f"trial evaluations: {evaluations[line_search]}, success: {success}"
+                )
+            self.assertTrue(success)
+            self.assertLess(evaluations["strong_wolfe"], evaluations["backtracking"])
+
+    def test_batched_unconstrained_minimization(self):
+        starts = np.random.default_rng(0).uniform(-2, 2, size=(20, 2))
+
+        for batched_func, func in [
+            (test_ellipses_batched, test_ellipses),
+            (test_rosenbrock_batched, test_rosenbrock),
+        ]:
+            print(f"Testing function: {batched_func.__name__}")
+            for method in self.METHODS:
+                minimizer = BatchedLineSearchMinimization(method=method)
+                xs, f_xs, successes = minimizer.unconstrained_minimization(
+                    f=batched_func,
+                    x0=starts,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+                print(f"method: {method} - converged starts: {successes.sum()}/{starts.shape[0]}")
+
+                # every start must follow the same path as a sequential solve
+                for x0, x, f_x, success in zip(starts, xs, f_xs, successes):
+                    expected_x, expected_f_x, expected_success = LineSearchMinimization(
+                        method=method
+                    ).unconstrained_minimization(
+                        f=func,
+                        x0=x0,
+                        obj_tol=self.OBJ_TOL,
+                        param_tol=self.PARAM_TOL,
+                        max_iter=self.MAX_ITER,
+                    )
+                    np.testing.assert_allclose(x, expected_x, atol=1e-6)
+                    self.assertAlmostEqual(f_x, expected_f_x, places=6)
+                    self.assertEqual(success, expected_success)
+
+    def test_problem_library(self):
+        problems = {
+            circles: lambda n: np.zeros(n),
+            ellipses: lambda n: np.zeros(n),
+            rotated_ellipses: lambda n: np.zeros(n),
+            RosenbrockProblem: lambda n: np.ones(n),
+            SmoothedCornerTrianglesProblem: lambda n: np.array([-np.log(2 * (n - 1)) / 2] + [0] * (n - 1)),
+        }
+        points = np.random.default_rng(0).uniform(-1, 1, size=(5, 10))
+
+        for problem_class, minimum in problems.items():
+            for n in [2, 10, 100]:
+                problem = problem_class(n)
+                minimizer = LineSearchMinimization(method="newton_cholesky")
+                x, f_x, success = minimizer.unconstrained_minimization(
+                    f=problem,
+                    x0=problem.x0,
+                    obj_tol=self.OBJ_TOL,
+                    param_tol=self.PARAM_TOL,
+                    max_iter=self.MAX_ITER,
+                )
+                print(
+                    f"problem: {problem_class.__name__} - n: {n}, iterations: {len(minimizer.x_path)}, "
+                    f"success: {success}"
+                )
+                self.assertTrue(success)
+                np.testing.assert_allclose(x, minimum(n), atol=1e-5)
+
+            # a batch is evaluated row by row
+            problem = problem_class(points.shape[1])
+            f_batch, g_batch, h_batch = problem(points, True)
+            for i, point in enumerate(points):
+                f_x, g_x, h_x = problem(point, True)
+                self.assertAlmostEqual(f_batch[i], f_x)
+                np.testing.assert_allclose(g_batch[i], g_x)
+                np.testing.assert_allclose(h_batch[i], h_x)
+
+            # the Hessian is the derivative of the gradient, by central differences
+            point = points[0]
+            eps = 1e-6
+            identity = np.eye(point.shape[0])
+            h_approx = np.array([
+                (problem(point + eps * e, False)[1] - problem(point - eps * e, False)[1]) / (2 * eps) for e in identity
+            ])
+            np.testing.assert_allclose(problem(point, True)[2], h_approx, rtol=1e-6, atol=1e-6)
+
+        # the constant Hessians are shared between calls, and read-only
+        problem = rotated_ellipses(10)
+        h_x = problem(points[0], True)[2]
+        self.assertIs(problem(points[1], True)[2], h_x)
+        self.assertFalse(h_x.flags.writeable)
+        self.assertFalse(problem(points, True)[2].flags.owndata)
+
 
 if __name__ == "__main__":
     unittest.main()
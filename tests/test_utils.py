@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from examples import (
+    test_ellipses,
+    test_ellipses_batched,
+    test_rosenbrock,
+    test_rosenbrock_batched,
+)
+from src.utils import (
+    evaluate_grid,
+    plot_contour,
+    plot_iterations,
+    set_headless,
+    supports_batches,
+)
+
+
+class TestUtils(unittest.TestCase):
+
+    def test_evaluate_grid(self):
+        X, Y = np.meshgrid(np.linspace(-2, 2, 100), np.linspace(-1, 3, 100))
+
+        for batched_func, func in [
+            (test_ellipses_batched, test_ellipses),
+            (test_rosenbrock_batched, test_rosenbrock),
+        ]:
+            print(f"Testing function: {batched_func.__name__}")
+            calls = {"batched": 0}
+
+            def counted_func(x, hessian_flag):
+                calls["batched"] += 1
+                return batched_func(x, hessian_flag)
+
+            def pointwise_func(x, hessian_flag):
+                # indexes the coordinates of a single point, a batch is evaluated wrongly
+                return func(np.array([x[0], x[1]]), hessian_flag)
+
+            points = np.stack([X.ravel(), Y.ravel()], axis=1)[:3]
+            self.assertTrue(supports_batches(batched_func, points))
+            self.assertFalse(supports_batches(pointwise_func, points))
+            np.testing.assert_allclose(evaluate_grid(pointwise_func, X, Y), evaluate_grid(func, X, Y))
+
+            Z = evaluate_grid(func, X, Y)
+            np.testing.assert_allclose(evaluate_grid(counted_func, X, Y, batched=True), Z)
+            self.assertEqual(calls["batched"], 1)
+            np.testing.assert_allclose(evaluate_grid(batched_func, X, Y, chunk_size=999), Z)
+            np.testing.assert_allclose(Z[7, 11], func(np.array([X[7, 11], Y[7, 11]]), False)[0])
+
+    def test_headless_plots(self):
+        path = np.array([[-1.0, 2.0], [0.0, 0.5], [1.0, 1.0]])
+
+        with tempfile.TemporaryDirectory() as directory:
+            set_headless(directory)
+            try:
+                plot_contour(
+                    f=test_rosenbrock_batched,
+                    title="Rosenbrock: Contour lines",
+                    paths=[path],
+                    names=["newton"],
+                )
+                plot_iterations(
+                    title="Rosenbrock: Function values vs. iteration number",
+                    f_values=[test_rosenbrock_batched(path, False)[0]],
+                    names=["newton"],
+                )
+            finally:
+                set_headless(None)
+            filename = os.path.join(directory, "explicit.png")
+            plot_iterations(title="Explicit", f_values=[[3, 2, 1]], names=["newton"], filename=filename)
+
+            written = sorted(os.listdir(directory))
+            print(f"written figures: {written}")
+            self.assertEqual(written, [
+                "explicit.png",
+                "rosenbrock_contour_lines.png",
+                "rosenbrock_function_values_vs_iteration_number.png",
+            ])
+
+    def test_headless_backend(self):
+        import matplotlib
+        backend = matplotlib.get_backend()
+        matplotlib.use("pdf")
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                # switching the directory keeps the backend to restore
+                set_headless(directory)
+                set_headless(os.path.join(directory, "other"))
+                self.assertEqual(matplotlib.get_backend().lower(), "agg")
+                set_headless(None)
+                self.assertEqual(matplotlib.get_backend().lower(), "pdf")
+                # leaving headless mode twice is harmless
+                set_headless(None)
+                self.assertEqual(matplotlib.get_backend().lower(), "pdf")
+        finally:
+            matplotlib.use(backend)
+
+
+if __name__ == "__main__":
+    unittest.main()